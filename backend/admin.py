@@ -0,0 +1,24 @@
+import os
+import secrets
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import Header, HTTPException, Request
+
+load_dotenv()
+
+# When set, admin endpoints require it in the X-Admin-Token header; when
+# unset, they only answer requests made directly from this host
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+LOOPBACK_HOSTS = frozenset({"127.0.0.1", "::1"})
+
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Dependency guarding the /api/v1/admin endpoints."""
+    if ADMIN_TOKEN:
+        if not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+            raise HTTPException(status_code=403, detail="Admin token required")
+        return
+    # A reverse proxy on this host makes every client look local, so forwarded requests need the token too
+    client_host = request.client.host if request.client else None
+    if client_host not in LOOPBACK_HOSTS or "x-forwarded-for" in request.headers:
+        raise HTTPException(status_code=403, detail="Admin endpoints need ADMIN_TOKEN set, or a local request")
@@ -0,0 +1,203 @@
+"""Admission control for the API: per-class concurrency limits and bounded wait queues.
+
+Requests are sorted into classes: "heavy" for writes under /api/v1 (uploads,
+updates, evaluate, rerank), which run the parsers and the scorer, and "light"
+for everything else under /api/v1, including enqueueing work for the task
+workers. Each class may run at most its own number
+of requests at once, and all classes together at most
+ADMISSION_MAX_CONCURRENCY. When a slot frees up, waiting light requests get
+it before heavy ones. A request that finds its class's queue full, or waits
+longer than the class's queue timeout, is answered with 429 and a Retry-After
+estimate instead of piling up. Limits are per worker process.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .metrics import REGISTRY
+
+load_dotenv()
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+ADMISSION_HEAVY_CONCURRENCY = int(os.getenv("ADMISSION_HEAVY_CONCURRENCY", "4"))
+ADMISSION_HEAVY_QUEUE = int(os.getenv("ADMISSION_HEAVY_QUEUE", "16"))
+ADMISSION_HEAVY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_HEAVY_QUEUE_TIMEOUT_SECONDS", "10"))
+ADMISSION_LIGHT_CONCURRENCY = int(os.getenv("ADMISSION_LIGHT_CONCURRENCY", "32"))
+ADMISSION_LIGHT_QUEUE = int(os.getenv("ADMISSION_LIGHT_QUEUE", "128"))
+ADMISSION_LIGHT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_LIGHT_QUEUE_TIMEOUT_SECONDS", "5"))
+
+# Requests outside the controller: probes, metrics scrapes and admin tools must work under load
+ADMISSION_EXEMPT_PATHS = ("/api/v1/admin",)
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+# Writes that only queue work for the task workers (see worker.py)
+QUEUED_WORK_PATHS = ("/api/v1/tasks",)
+
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot, by class.", ("request_class",)
+)
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "admission_in_flight", "Admitted requests currently running, by class.", ("request_class",)
+)
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "admission_rejections_total", "Requests answered with 429, by class and reason (queue_full or timeout).",
+    ("request_class", "reason")
+)
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "admission_wait_seconds", "Time admitted requests spent queued, by class.", ("request_class",)
+)
+
+class AdmissionRejected(Exception):
+    """The request was not admitted; retry_after is a suggested wait in whole seconds."""
+
+    def __init__(self, request_class: str, reason: str, retry_after: int):
+        self.request_class = request_class
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{request_class} request rejected ({reason}), retry after {retry_after}s")
+
+class RequestClass:
+    """Limits of one class of requests. Lower priority values are served first."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, priority: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.priority = priority
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # Moving average of request duration, for Retry-After estimates
+        self.service_seconds = 0.1
+
+class AdmissionController:
+    """Hands out request slots by class limit and priority. Use from one event loop."""
+
+    def __init__(self, classes: Iterable[RequestClass], max_concurrent: int = ADMISSION_MAX_CONCURRENCY):
+        self.classes: Dict[str, RequestClass] = {request_class.name: request_class for request_class in classes}
+        self.max_concurrent = max(1, max_concurrent)
+        self.active = 0
+        self._waiters: List[Tuple[int, int, RequestClass, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+        for request_class in self.classes.values():
+            ADMISSION_QUEUE_DEPTH.set_function(lambda c=request_class: c.waiting, request_class=request_class.name)
+            ADMISSION_IN_FLIGHT.set_function(lambda c=request_class: c.active, request_class=request_class.name)
+
+    def _can_run(self, request_class: RequestClass) -> bool:
+        return self.active < self.max_concurrent and request_class.active < request_class.max_concurrent
+
+    def _grant(self, request_class: RequestClass):
+        self.active += 1
+        request_class.active += 1
+
+    def _queued_ahead(self, request_class: RequestClass) -> bool:
+        """Whether a waiter of the same or higher priority should be served first."""
+        return any(
+            priority <= request_class.priority and not future.done()
+            for priority, _, _, future in self._waiters
+        )
+
+    def retry_after(self, request_class: RequestClass) -> int:
+        """Seconds until the class's current backlog should have drained."""
+        backlog = request_class.waiting + request_class.active + 1
+        return max(1, math.ceil(backlog * request_class.service_seconds / request_class.max_concurrent))
+
+    def _reject(self, request_class: RequestClass, reason: str) -> AdmissionRejected:
+        ADMISSION_REJECTIONS.inc(request_class=request_class.name, reason=reason)
+        return AdmissionRejected(request_class.name, reason, self.retry_after(request_class))
+
+    async def acquire(self, name: str) -> float:
+        """Wait for a slot of the named class. Returns seconds spent queued; raises AdmissionRejected."""
+        request_class = self.classes[name]
+        if self._can_run(request_class) and not self._queued_ahead(request_class):
+            self._grant(request_class)
+            ADMISSION_WAIT_SECONDS.observe(0.0, request_class=name)
+            return 0.0
+        if request_class.waiting >= request_class.max_queue:
+            raise self._reject(request_class, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (request_class.priority, next(self._sequence), request_class, future))
+        request_class.waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait({future}, timeout=request_class.queue_timeout or None)
+        except asyncio.CancelledError:
+            # Client went away while queued; hand back a slot granted in the meantime
+            if future.done() and not future.cancelled():
+                self.release(name)
+            else:
+                self._remove(future)
+            raise
+        finally:
+            request_class.waiting -= 1
+
+        if not future.done():
+            self._remove(future)
+            raise self._reject(request_class, "timeout")
+        waited = time.perf_counter() - start
+        ADMISSION_WAIT_SECONDS.observe(waited, request_class=name)
+        return waited
+
+    def _remove(self, future: asyncio.Future):
+        future.cancel()
+        self._waiters = [waiter for waiter in self._waiters if waiter[3] is not future]
+        heapq.heapify(self._waiters)
+
+    def release(self, name: str, duration: Optional[float] = None):
+        request_class = self.classes[name]
+        self.active -= 1
+        request_class.active -= 1
+        if duration is not None:
+            request_class.service_seconds = 0.8 * request_class.service_seconds + 0.2 * duration
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots to waiters in priority order, skipping classes at their own limit."""
+        pending = []
+        while self._waiters and self.active < self.max_concurrent:
+            waiter = heapq.heappop(self._waiters)
+            _, _, request_class, future = waiter
+            if future.done():
+                continue
+            if request_class.active < request_class.max_concurrent:
+                self._grant(request_class)
+                future.set_result(True)
+            else:
+                pending.append(waiter)
+        for waiter in pending:
+            heapq.heappush(self._waiters, waiter)
+
+    @asynccontextmanager
+    async def slot(self, name: str):
+        await self.acquire(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(name, time.perf_counter() - start)
+
+def classify_request(method: str, path: str) -> Optional[str]:
+    """Admission class of a request, or None if it bypasses admission control."""
+    if not path.startswith("/api/v1/") or path.startswith(ADMISSION_EXEMPT_PATHS):
+        return None
+    if path.endswith("/stream"):
+        # Streams outlive the middleware's slot; they take a heavy slot per batch themselves
+        return None
+    if path.startswith(QUEUED_WORK_PATHS):
+        return "light"
+    return "heavy" if method in WRITE_METHODS else "light"
+
+def default_controller() -> AdmissionController:
+    return AdmissionController([
+        RequestClass("light", ADMISSION_LIGHT_CONCURRENCY, ADMISSION_LIGHT_QUEUE, 0, ADMISSION_LIGHT_QUEUE_TIMEOUT_SECONDS),
+        RequestClass("heavy", ADMISSION_HEAVY_CONCURRENCY, ADMISSION_HEAVY_QUEUE, 1, ADMISSION_HEAVY_QUEUE_TIMEOUT_SECONDS),
+    ])
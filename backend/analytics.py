@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.orm import Query, Session
+
+from .models import Evaluation, JobDescription
+from .search import location_condition
+
+VERDICTS = ("High", "Medium", "Low")
+
+def _filtered(
+    query: Query,
+    job_id: Optional[int] = None,
+    verdict: Optional[str] = None,
+    min_score: Optional[float] = None,
+    location: Optional[str] = None
+) -> Query:
+    """Apply the same filters as the results endpoint."""
+    if job_id:
+        query = query.filter(Evaluation.job_description_id == job_id)
+    if verdict:
+        query = query.filter(Evaluation.verdict == verdict)
+    if min_score is not None:
+        query = query.filter(Evaluation.overall_score >= min_score)
+    if location:
+        query = query.filter(location_condition(query.session, location, Evaluation.resume_id))
+    return query
+
+def score_histogram(db: Session, bucket_width: int = 10, **filters) -> Dict:
+    """Evaluation counts per overall-score bucket; a score of 100 falls in the top bucket."""
+    scaled = Evaluation.overall_score / bucket_width
+    if db.get_bind().dialect.name == "sqlite":
+        # CAST truncates there, the same as floor for scores >= 0, and floor()
+        # needs SQLite's optional math functions
+        bucket = cast(scaled, Integer)
+    else:
+        # PostgreSQL's CAST rounds, which would put 15.0 in the 20-30 bucket
+        bucket = func.floor(scaled)
+    rows = _filtered(db.query(bucket, func.count(Evaluation.id)), **filters).group_by(bucket).all()
+
+    top_bucket = (100 - 1) // bucket_width
+    counts = [0] * (top_bucket + 1)
+    for index, count in rows:
+        counts[min(max(int(index or 0), 0), top_bucket)] += count
+    return {
+        "bucket_width": bucket_width,
+        "buckets": [
+            {"min": i * bucket_width, "max": min((i + 1) * bucket_width, 100), "count": count}
+            for i, count in enumerate(counts)
+        ]
+    }
+
+def verdicts_by_job(db: Session, **filters) -> List[Dict]:
+    """High/Medium/Low counts for each job, largest jobs first."""
+    rows = (
+        _filtered(db.query(Evaluation.job_description_id, Evaluation.verdict, func.count(Evaluation.id)), **filters)
+        .group_by(Evaluation.job_description_id, Evaluation.verdict)
+        .all()
+    )
+    by_job: Dict[int, Dict] = {}
+    for job_id, verdict, count in rows:
+        entry = by_job.setdefault(job_id, {"job_id": job_id, **{v: 0 for v in VERDICTS}, "total": 0})
+        if verdict in VERDICTS:
+            entry[verdict] += count
+        entry["total"] += count
+
+    titles = dict(
+        db.query(JobDescription.id, JobDescription.title).filter(JobDescription.id.in_(list(by_job))).all()
+    ) if by_job else {}
+    for job_id, entry in by_job.items():
+        entry["title"] = titles.get(job_id)
+    return sorted(by_job.values(), key=lambda entry: (-entry["total"], entry["job_id"]))
+
+def component_averages(db: Session, **filters) -> Dict:
+    """Average overall and component scores."""
+    row = _filtered(db.query(
+        func.count(Evaluation.id),
+        func.avg(Evaluation.overall_score),
+        func.avg(Evaluation.skills_match_score),
+        func.avg(Evaluation.semantic_similarity_score),
+        func.avg(Evaluation.experience_score)
+    ), **filters).one()
+    count, overall, skills, semantic, experience = row
+    return {
+        "total_evaluations": count,
+        "overall_score": round(overall or 0.0, 2),
+        "skills_match_score": round(skills or 0.0, 2),
+        "semantic_similarity_score": round(semantic or 0.0, 2),
+        "experience_score": round(experience or 0.0, 2)
+    }
+
+def evaluations_per_day(db: Session, days: int = 30, **filters) -> List[Dict]:
+    """Evaluations and their average score per calendar day (UTC) over the last N days."""
+    since = datetime.utcnow() - timedelta(days=days)
+    day = func.date(Evaluation.created_at)
+    rows = (
+        _filtered(db.query(day, func.count(Evaluation.id), func.avg(Evaluation.overall_score)), **filters)
+        .filter(Evaluation.created_at >= since)
+        .group_by(day)
+        .order_by(day)
+        .all()
+    )
+    return [
+        {"date": str(date), "count": count, "average_score": round(average or 0.0, 2)}
+        for date, count, average in rows
+    ]
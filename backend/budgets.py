@@ -0,0 +1,114 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+
+from .admission import ADMISSION_HEAVY_CONCURRENCY
+from .profiling import attributed
+
+load_dotenv()
+
+# Per-stage deadlines in seconds; 0 disables the deadline for that stage.
+# The semantic budget is per resume, so a batch of N gets N times as long.
+EXTRACTION_BUDGET_SECONDS = float(os.getenv("EXTRACTION_BUDGET_SECONDS", "10"))
+SKILLS_BUDGET_SECONDS = float(os.getenv("SKILLS_BUDGET_SECONDS", "2"))
+SEMANTIC_BUDGET_SECONDS = float(os.getenv("SEMANTIC_BUDGET_SECONDS", "3"))
+DB_WRITE_BUDGET_SECONDS = float(os.getenv("DB_WRITE_BUDGET_SECONDS", "5"))
+
+# Input size caps
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+MAX_TEXT_CHARS = int(os.getenv("MAX_TEXT_CHARS", "100000"))
+
+# Stages run concurrently by the heavy requests (progressive ranking batches
+# included) and the re-scoring scheduler, plus room for abandoned overruns
+STAGE_ABANDONED_LIMIT = int(os.getenv("STAGE_ABANDONED_LIMIT", "4"))
+STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", "0")) or ADMISSION_HEAVY_CONCURRENCY + 1 + STAGE_ABANDONED_LIMIT
+
+class StageTimeout(Exception):
+    """A pipeline stage did not finish within its budget."""
+
+    def __init__(self, stage: str, budget: float):
+        self.stage = stage
+        self.budget = budget
+        super().__init__(f"Stage '{stage}' exceeded its {budget:.2f}s budget")
+
+class StageOverloaded(StageTimeout):
+    """Every stage worker is busy, mostly with abandoned overruns; the stage was not started.
+
+    Also raised when a shared resource the stage needs (the model server) is
+    too busy to answer in time.
+    """
+
+    def __init__(self, stage: str, budget: float, reason: str = "all stage workers are busy"):
+        super().__init__(stage, budget)
+        self.args = (f"Stage '{stage}' not started: {reason}",)
+
+class StageBudgets:
+    """Runs pipeline stages under per-stage deadlines.
+
+    Python can't interrupt a running computation, so a budgeted stage runs on
+    a worker pool and the caller stops waiting once the deadline passes. The
+    abandoned work finishes in the background, still holding its worker; the
+    request gets a bounded answer (an error or a cheaper fallback) instead of
+    waiting for it. A stage is only submitted when a worker is free, so its
+    deadline counts from when it starts, never time spent queued behind
+    abandoned work; when none is free it fails at once with StageOverloaded.
+    """
+
+    def __init__(
+        self,
+        extraction: float = EXTRACTION_BUDGET_SECONDS,
+        skills: float = SKILLS_BUDGET_SECONDS,
+        semantic: float = SEMANTIC_BUDGET_SECONDS,
+        max_workers: int = STAGE_WORKERS
+    ):
+        self.budgets: Dict[str, float] = {
+            'extraction': extraction,
+            'skills': skills,
+            'semantic': semantic
+        }
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        self._free_workers = threading.BoundedSemaphore(max_workers)
+        self._executor_lock = threading.Lock()
+
+    def run(self, stage: str, fn: Callable, *args, scale: float = 1.0, **kwargs):
+        """Call fn(*args, **kwargs), raising StageTimeout if it overruns the stage budget."""
+        budget = self.budgets[stage] * scale
+        if budget <= 0:
+            return fn(*args, **kwargs)
+
+        if not self._free_workers.acquire(blocking=False):
+            raise StageOverloaded(stage, budget)
+        started = threading.Event()
+        # The pool thread doesn't inherit the caller's context; take the profiler along
+        target = attributed(fn)
+
+        def call():
+            started.set()
+            try:
+                return target(*args, **kwargs)
+            finally:
+                self._free_workers.release()
+
+        try:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="stage")
+            future = self._executor.submit(call)
+        except BaseException:
+            self._free_workers.release()
+            raise
+        # A worker is free, so this only waits for the handoff
+        started.wait()
+        try:
+            return future.result(timeout=budget)
+        except FutureTimeoutError:
+            raise StageTimeout(stage, budget)
+
+def truncate_text(text: str, max_chars: int = MAX_TEXT_CHARS) -> str:
+    """Cap text length so a single huge document can't dominate processing time."""
+    if max_chars > 0 and len(text) > max_chars:
+        return text[:max_chars]
+    return text
@@ -1,32 +1,163 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import UniqueConstraint, create_engine, event, inspect, literal, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
-from .models import Base
+from .models import Base, Evaluation
+from .budgets import DB_WRITE_BUDGET_SECONDS
+from .metrics import STAGE_SECONDS
+from .versions import seed_table_versions, touch, track_table_versions
+from .search import create_search_index
+from .skill_stats import rebuild_skill_stats
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./resume_system.db")
 
-# Create engine
+# Create engine. The DB write budget bounds how long a statement may wait on
+# locks (SQLite busy timeout) or run (PostgreSQL statement_timeout).
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         DATABASE_URL,
-        connect_args={"check_same_thread": False},
+        connect_args={"check_same_thread": False, "timeout": DB_WRITE_BUDGET_SECONDS or 5},
         poolclass=StaticPool,
     )
+elif DATABASE_URL.startswith("postgresql") and DB_WRITE_BUDGET_SECONDS > 0:
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"options": f"-c statement_timeout={int(DB_WRITE_BUDGET_SECONDS * 1000)}"},
+    )
 else:
     engine = create_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Time every commit (including its final flush) as the db_commit stage
+@event.listens_for(SessionLocal, "before_commit")
+def _start_commit_timer(session):
+    session.info["commit_started"] = time.perf_counter()
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_commit_time(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="db_commit")
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_commit_timer(session):
+    session.info.pop("commit_started", None)
+
+# Maintain the table change counters behind the read endpoints' ETags
+track_table_versions(SessionLocal)
+
+def _default_sql(column, dialect) -> str:
+    """The column's scalar default as a SQL literal, or "" if it has none."""
+    default = column.default
+    if default is None or not default.is_scalar:
+        return ""
+    value = literal(default.arg, column.type).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    return f" DEFAULT {value}"
+
+def add_missing_columns(bind=engine) -> list:
+    """Add columns (and their indexes) that the models gained after a table was created.
+
+    create_all only creates missing tables, so databases created by an older
+    version lack the newer columns. Existing rows get the column's default.
+    Safe to run repeatedly; returns the "table.column" names it added.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            missing = [c for c in table.columns if c.name not in existing]
+            for column in missing:
+                column_type = column.type.compile(dialect=bind.dialect)
+                default_sql = _default_sql(column, bind.dialect)
+                # NOT NULL needs a default to fill the existing rows
+                not_null = " NOT NULL" if not column.nullable and default_sql else ""
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default_sql}{not_null}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+            if missing:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+    return added
+
+def add_missing_unique_constraints(bind=engine) -> dict:
+    """Enforce unique constraints that the models gained after a table was created.
+
+    Rows that would violate a constraint are deleted first, keeping the one
+    with the highest primary key (the newest), and the constraint is added as
+    a unique index of the same name, which SQLite can add to an existing table
+    and ON CONFLICT accepts on both databases. Safe to run repeatedly; returns
+    the number of rows deleted per table it changed.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    # Inspect everything first: with the shared SQLite connection, the
+    # inspector's reads would roll back the DELETEs below
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        enforced = {
+            tuple(c["column_names"]) for c in inspector.get_unique_constraints(table.name)
+        } | {
+            tuple(i["column_names"]) for i in inspector.get_indexes(table.name) if i["unique"]
+        }
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint) and tuple(c.name for c in constraint.columns) not in enforced:
+                missing.append((table, constraint))
+
+    deleted = {}
+    with bind.begin() as conn:
+        for table, constraint in missing:
+            key = table.primary_key.columns.values()[0].name
+            columns = [c.name for c in constraint.columns]
+            column_list = ", ".join(columns)
+            # Rows with a NULL in the key columns never conflict
+            not_null = " AND ".join(f"{name} IS NOT NULL" for name in columns)
+            result = conn.execute(text(
+                f"DELETE FROM {table.name} WHERE {not_null} AND {key} NOT IN "
+                f"(SELECT MAX({key}) FROM {table.name} GROUP BY {column_list})"
+            ))
+            deleted[table.name] = deleted.get(table.name, 0) + result.rowcount
+            conn.execute(text(f"CREATE UNIQUE INDEX {constraint.name} ON {table.name} ({column_list})"))
+    return deleted
+
 def create_tables():
-    """Create all tables in the database."""
+    """Create all tables in the database, and add any columns and constraints missing from older ones."""
     Base.metadata.create_all(bind=engine)
+    for name in add_missing_columns(engine):
+        print(f"Added column {name}")
+    deleted = add_missing_unique_constraints(engine)
+    create_search_index(engine)
+    db = SessionLocal()
+    try:
+        seed_table_versions(db)
+        for table, count in deleted.items():
+            print(f"Added unique constraint on {table}, removing {count} duplicate rows")
+        if deleted.get(Evaluation.__tablename__):
+            # The counters still include the removed duplicates
+            rebuild_skill_stats(db)
+            touch(db, Evaluation.__tablename__)
+            db.commit()
+    finally:
+        db.close()
 
-def get_db():
-    """Dependency to get database session."""
+async def get_db():
+    """Dependency to get database session.
+    
+    Async so FastAPI closes the session on the event loop: closing rolls back
+    the shared SQLite connection, and from a worker thread that could land in
+    the middle of another request's commit.
+    """
     db = SessionLocal()
     try:
         yield db
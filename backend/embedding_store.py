@@ -0,0 +1,388 @@
+"""Memory-mapped, quantized store of resume embeddings.
+
+Usage (from the project root):
+    python -m backend.embedding_store backfill [--all] [--batch-size 256]
+    python -m backend.embedding_store compact
+    python -m backend.embedding_store stats
+
+Layout under EMBEDDING_STORE_DIR:
+    CURRENT                 name of the live generation directory
+    gen-000001/meta.json    {"dtype": "float16" | "int8", "dim": 384}
+    gen-000001/vectors.bin  fixed-width rows, one per write
+    gen-000001/scales.bin   float32 per-row scale (int8 only)
+    gen-000001/ids.bin      int64 resume ID per row; -ID marks a deletion
+    store.lock              serialises writers across worker processes
+
+All files are append-only. A row is committed once its ID is appended, so
+a crashed write is cut off by the next writer; the newest row for an ID
+wins. Vectors are L2-normalised before quantisation, so a scan is one
+matrix-vector product over the mapped rows. Compaction rewrites the live
+rows into a new generation and switches CURRENT atomically; workers still
+mapping the old generation keep reading it until they notice the switch.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialised within a process
+    fcntl = None
+
+load_dotenv()
+
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "./embedding_store")
+EMBEDDING_STORE_DTYPE = os.getenv("EMBEDDING_STORE_DTYPE", "float16")
+EMBEDDING_STORE_ENABLED = os.getenv("EMBEDDING_STORE_ENABLED", "True").lower() == "true"
+
+SUPPORTED_DTYPES = ("float16", "int8")
+SCAN_CHUNK_ROWS = 65536
+
+class _View:
+    """Memory-mapped arrays of one generation at a given committed row count."""
+
+    def __init__(self, generation: str, count: int, vectors, scales, ids):
+        self.generation = generation
+        self.count = count
+        self.vectors = vectors
+        self.scales = scales
+        self.ids = ids
+
+        # The newest row of each ID is the live one, unless it is a deletion
+        if count:
+            absolute = np.abs(np.asarray(ids))
+            _, reversed_index = np.unique(absolute[::-1], return_index=True)
+            latest_rows = count - 1 - reversed_index
+            self.live_rows = np.sort(latest_rows[np.asarray(ids)[latest_rows] > 0])
+        else:
+            self.live_rows = np.zeros(0, dtype=np.int64)
+        self.live_ids = np.asarray(ids)[self.live_rows] if count else np.zeros(0, dtype=np.int64)
+        self.row_by_id = dict(zip(self.live_ids.tolist(), self.live_rows.tolist()))
+
+class EmbeddingStore:
+    """Append-only embedding matrix shared by all workers through the OS page cache."""
+
+    def __init__(self, root: Optional[str] = None, dtype: str = EMBEDDING_STORE_DTYPE):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype: {dtype}")
+        self.root = root or EMBEDDING_STORE_DIR
+        self.dtype = dtype  # Used when creating a store; an existing store keeps its own
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.RLock()
+        self._view: Optional[_View] = None
+
+    # Files and locking
+
+    @contextmanager
+    def _write_lock(self):
+        with self._lock:
+            with open(os.path.join(self.root, "store.lock"), "a+") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _generation(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, "CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _path(self, generation: str, name: str) -> str:
+        return os.path.join(self.root, generation, name)
+
+    def _meta(self, generation: str) -> Dict:
+        with open(self._path(generation, "meta.json")) as f:
+            return json.load(f)
+
+    def _committed_rows(self, generation: str) -> int:
+        return os.path.getsize(self._path(generation, "ids.bin")) // 8
+
+    def _row_bytes(self, meta: Dict) -> int:
+        return meta["dim"] * np.dtype(meta["dtype"]).itemsize
+
+    def _create_generation(self, meta: Dict, number: int) -> str:
+        generation = f"gen-{number:06d}"
+        os.makedirs(os.path.join(self.root, generation), exist_ok=True)
+        with open(self._path(generation, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        for name in ("vectors.bin", "scales.bin", "ids.bin"):
+            open(self._path(generation, name), "wb").close()
+        return generation
+
+    def _set_current(self, generation: str):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(generation)
+        os.replace(tmp_path, os.path.join(self.root, "CURRENT"))
+
+    # Quantisation
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
+    @staticmethod
+    def _quantize(embeddings: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if dtype == "float16":
+            return embeddings.astype(np.float16), None
+        # Symmetric per-row int8: row ~= q * scale
+        scales = np.abs(embeddings).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    # Writes
+
+    def add(self, resume_id: int, embedding: np.ndarray):
+        """Store (or replace) one resume's embedding."""
+        self.add_many([resume_id], np.asarray(embedding).reshape(1, -1))
+
+    def add_many(self, resume_ids: Iterable[int], embeddings: np.ndarray):
+        resume_ids = np.asarray(list(resume_ids), dtype=np.int64)
+        if len(resume_ids) == 0:
+            return
+        if np.any(resume_ids <= 0):
+            raise ValueError("Resume IDs must be positive")
+        self._append(resume_ids, self._normalize(np.asarray(embeddings).reshape(len(resume_ids), -1)))
+
+    def delete(self, resume_id: int):
+        """Remove a resume from scans. The row is reclaimed by the next compaction."""
+        if self.get(resume_id) is None:
+            return
+        meta = self._meta(self._generation())
+        self._append(np.array([-resume_id], dtype=np.int64), np.zeros((1, meta["dim"]), dtype=np.float32))
+
+    def _append(self, row_ids: np.ndarray, embeddings: np.ndarray):
+        with self._write_lock():
+            generation = self._generation()
+            if generation is None:
+                generation = self._create_generation({"dtype": self.dtype, "dim": int(embeddings.shape[1])}, 1)
+                self._set_current(generation)
+            meta = self._meta(generation)
+            if embeddings.shape[1] != meta["dim"]:
+                raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match store dimension {meta['dim']}")
+
+            vectors, scales = self._quantize(embeddings, meta["dtype"])
+            count = self._committed_rows(generation)
+
+            # Cut off any rows a crashed writer left behind, then append data before IDs
+            with open(self._path(generation, "vectors.bin"), "r+b") as f:
+                f.truncate(count * self._row_bytes(meta))
+                f.seek(0, os.SEEK_END)
+                f.write(vectors.tobytes())
+            if scales is not None:
+                with open(self._path(generation, "scales.bin"), "r+b") as f:
+                    f.truncate(count * 4)
+                    f.seek(0, os.SEEK_END)
+                    f.write(scales.tobytes())
+            with open(self._path(generation, "ids.bin"), "ab") as f:
+                f.write(row_ids.astype("<i8").tobytes())
+
+    # Reads
+
+    def _current_view(self) -> Optional[_View]:
+        """Map the current generation, remapping only when it changed or grew."""
+        for _ in range(3):
+            try:
+                return self._map_current()
+            except FileNotFoundError:
+                # A compaction in another process replaced the generation under us
+                continue
+        return self._map_current()
+
+    def _map_current(self) -> Optional[_View]:
+        generation = self._generation()
+        if generation is None:
+            return None
+        count = self._committed_rows(generation)
+        with self._lock:
+            view = self._view
+            if view is not None and view.generation == generation and view.count == count:
+                return view
+
+            meta = self._meta(generation)
+            if count:
+                vectors = np.memmap(self._path(generation, "vectors.bin"), dtype=meta["dtype"], mode="r",
+                                    shape=(count, meta["dim"]))
+                scales = None
+                if meta["dtype"] == "int8":
+                    scales = np.memmap(self._path(generation, "scales.bin"), dtype=np.float32, mode="r", shape=(count,))
+                ids = np.memmap(self._path(generation, "ids.bin"), dtype="<i8", mode="r", shape=(count,))
+            else:
+                vectors, scales, ids = None, None, np.zeros(0, dtype=np.int64)
+            self._view = _View(generation, count, vectors, scales, ids)
+            return self._view
+
+    def get(self, resume_id: int) -> Optional[np.ndarray]:
+        """A resume's stored (dequantised, normalised) embedding, or None."""
+        view = self._current_view()
+        if view is None or resume_id not in view.row_by_id:
+            return None
+        row = view.row_by_id[resume_id]
+        vector = np.asarray(view.vectors[row], dtype=np.float32)
+        return vector * view.scales[row] if view.scales is not None else vector
+
+    def __contains__(self, resume_id: int) -> bool:
+        view = self._current_view()
+        return view is not None and resume_id in view.row_by_id
+
+    def __len__(self) -> int:
+        view = self._current_view()
+        return 0 if view is None else len(view.live_rows)
+
+    def scan(
+        self,
+        query: np.ndarray,
+        top_k: Optional[int] = None,
+        min_similarity: Optional[float] = None
+    ) -> List[Tuple[int, float]]:
+        """Cosine similarity (0-100, like semantic_similarity_score) of every stored resume to a query.
+
+        Returns (resume_id, similarity) pairs, best first. Rows are read
+        straight from the mapping; they are widened to float32 a chunk at a
+        time so the product runs on BLAS without copying the whole matrix.
+        """
+        view = self._current_view()
+        if view is None or not len(view.live_rows):
+            return []
+
+        query = self._normalize(np.asarray(query).reshape(-1))
+        similarities = np.empty(view.count, dtype=np.float32)
+        for start in range(0, view.count, SCAN_CHUNK_ROWS):
+            stop = min(start + SCAN_CHUNK_ROWS, view.count)
+            similarities[start:stop] = np.asarray(view.vectors[start:stop], dtype=np.float32) @ query
+        if view.scales is not None:
+            similarities *= view.scales
+
+        scores = similarities[view.live_rows] * 100
+        ids = view.live_ids
+        if min_similarity is not None:
+            keep = scores >= min_similarity
+            scores, ids = scores[keep], ids[keep]
+        if top_k is not None and top_k < len(scores):
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            order = top[np.argsort(-scores[top], kind="stable")]
+        else:
+            order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    # Maintenance
+
+    def compact(self) -> Dict:
+        """Rewrite only the live rows into a new generation."""
+        with self._write_lock():
+            old_generation = self._generation()
+            if old_generation is None:
+                return {"rows_before": 0, "rows_after": 0}
+            view = self._current_view()
+            meta = self._meta(old_generation)
+            number = int(old_generation.split("-")[1]) + 1
+            generation = self._create_generation(meta, number)
+
+            rows = view.live_rows
+            if len(rows):
+                with open(self._path(generation, "vectors.bin"), "wb") as f:
+                    f.write(np.ascontiguousarray(view.vectors[rows]).tobytes())
+                if view.scales is not None:
+                    with open(self._path(generation, "scales.bin"), "wb") as f:
+                        f.write(np.ascontiguousarray(view.scales[rows]).tobytes())
+                with open(self._path(generation, "ids.bin"), "wb") as f:
+                    f.write(np.asarray(view.ids[rows], dtype="<i8").tobytes())
+            self._set_current(generation)
+
+            # Open mappings of the old files stay valid after unlinking
+            for name in ("vectors.bin", "scales.bin", "ids.bin", "meta.json"):
+                try:
+                    os.remove(self._path(old_generation, name))
+                except FileNotFoundError:
+                    pass
+            try:
+                os.rmdir(os.path.join(self.root, old_generation))
+            except OSError:
+                pass
+            return {"rows_before": view.count, "rows_after": len(rows)}
+
+    def stats(self) -> Dict:
+        generation = self._generation()
+        if generation is None:
+            return {"generation": None, "rows": 0, "live": 0}
+        meta = self._meta(generation)
+        view = self._current_view()
+        return {
+            "generation": generation,
+            "dtype": meta["dtype"],
+            "dim": meta["dim"],
+            "rows": view.count,
+            "live": len(view.live_rows),
+            "bytes": view.count * (self._row_bytes(meta) + 8 + (4 if meta["dtype"] == "int8" else 0))
+        }
+
+def backfill(store: EmbeddingStore, scorer, include_existing: bool = False, batch_size: int = 256) -> int:
+    """Embed resumes missing from the store (or all of them). Returns how many were written."""
+    from .db import SessionLocal
+    from .models import Resume
+
+    db = SessionLocal()
+    written = 0
+    last_id = 0
+    try:
+        while True:
+            rows = (
+                db.query(Resume.id, Resume.content)
+                .filter(Resume.id > last_id)
+                .order_by(Resume.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            todo = [row for row in rows if include_existing or row.id not in store]
+            if todo:
+                store.add_many([row.id for row in todo], scorer.embed_resumes([row.content for row in todo]))
+                written += len(todo)
+                print(f"Embedded up to resume {last_id} ({written} written)")
+    finally:
+        db.close()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the memory-mapped resume embedding store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="Embed resumes that are not in the store yet")
+    backfill_parser.add_argument("--all", action="store_true", help="Re-embed every resume (e.g. after reprocessing)")
+    backfill_parser.add_argument("--batch-size", type=int, default=256)
+    subparsers.add_parser("compact", help="Drop replaced and deleted rows")
+    subparsers.add_parser("stats", help="Show store size")
+    args = parser.parse_args()
+
+    store = EmbeddingStore()
+    if args.command == "backfill":
+        from .db import create_tables
+        from .scoring import ResumeScorer
+        create_tables()
+        written = backfill(store, ResumeScorer(), include_existing=args.all, batch_size=args.batch_size)
+        print(f"Done: {written} embeddings written.")
+    elif args.command == "compact":
+        result = store.compact()
+        print(f"Compacted {result['rows_before']} rows to {result['rows_after']}.")
+    else:
+        print(json.dumps(store.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional
+import json
+
+from .models import Evaluation
+from .skill_stats import skill_deltas, apply_skill_deltas
+from .upserts import insert_for
+from .versions import touch
+
+def _locked_evaluation(db: Session, resume_id: int, job_id: int) -> Optional[Evaluation]:
+    return db.query(Evaluation).filter(
+        Evaluation.resume_id == resume_id,
+        Evaluation.job_description_id == job_id
+    ).with_for_update().populate_existing().first()
+
+def upsert_evaluation(db: Session, resume_id: int, job_id: int, score_result: Dict) -> Evaluation:
+    """Create or overwrite the evaluation for a resume/job pair and update the
+    job's skill counters to match. Does not commit.
+
+    A new pair is first inserted as an empty row with ON CONFLICT DO NOTHING,
+    so when several writers evaluate it at once one row wins and the others
+    overwrite it. The row is then read FOR UPDATE (PostgreSQL; SQLite
+    serialises writers), so the counter deltas are taken from the committed
+    evaluation.
+    """
+    evaluation = _locked_evaluation(db, resume_id, job_id)
+    if evaluation is None:
+        table = Evaluation.__table__
+        db.execute(
+            insert_for(db, table)
+            .values(resume_id=resume_id, job_description_id=job_id, overall_score=0.0)
+            .on_conflict_do_nothing(index_elements=[table.c.resume_id, table.c.job_description_id])
+        )
+        touch(db, Evaluation.__tablename__)
+        evaluation = _locked_evaluation(db, resume_id, job_id)
+    old_matched = evaluation.get_matched_skills()
+    old_missing = evaluation.get_missing_skills()
+    
+    for key, value in score_result.items():
+        if key in ['matched_skills', 'missing_skills']:
+            setattr(evaluation, key, json.dumps(value))
+        else:
+            setattr(evaluation, key, value)
+    evaluation.is_stale = False
+    
+    apply_skill_deltas(db, job_id, skill_deltas(
+        old_matched, old_missing, evaluation.get_matched_skills(), evaluation.get_missing_skills()
+    ))
+    return evaluation
+
+def mark_evaluations_stale(
+    db: Session,
+    resume_ids: Optional[Iterable[int]] = None,
+    job_id: Optional[int] = None
+) -> int:
+    """Flag the evaluations touching the given resumes or job for re-scoring. Does not commit."""
+    query = db.query(Evaluation).filter(Evaluation.is_stale == False)
+    if resume_ids is not None:
+        query = query.filter(Evaluation.resume_id.in_(list(resume_ids)))
+    if job_id is not None:
+        query = query.filter(Evaluation.job_description_id == job_id)
+    touch(db, Evaluation.__tablename__)
+    return query.update({Evaluation.is_stale: True}, synchronize_session=False)
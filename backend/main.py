@@ -1,16 +1,36 @@
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, Form, Query
+from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import json
 import os
 from dotenv import load_dotenv
 
-from .db import get_db, init_db
-from .models import Resume, JobDescription, Evaluation, ResumeUpload, JobDescriptionUpload, EvaluationResult, DashboardStats, ResumeDetail
+from .db import get_db, init_db, engine, SessionLocal
+from .models import Resume, JobDescription, Evaluation, Task, ResumeUpload, JobDescriptionUpload, JobDescriptionUpdate, RerankRequest, EvaluationResult, DashboardStats, ResumeDetail
 from .parsers import ContentProcessor
 from .scoring import ResumeScorer
+from .storage import BlobStore
+from .budgets import StageOverloaded, StageTimeout
+from .uploads import UploadTooLarge, spool_upload
+from .evaluations import upsert_evaluation, mark_evaluations_stale
+from .rescoring import RescoringScheduler, RESCORE_ENABLED
+from .profiles import JobProfileCache, compile_and_store_profile, load_job_profile
+from .ranking import rerank_job, match_jobs_for_resume, match_resumes_for_job
+from .progressive import ranking_events
+from .metrics import REGISTRY, CONTENT_TYPE
+from .middleware import AdmissionMiddleware, RequestMetricsMiddleware, SlowRequestMiddleware
+from .profiling import SlowRequestProfiler, run_in_threadpool
+from .admin import require_admin
+from .admission import ADMISSION_CONTROL_ENABLED, default_controller
+from .embedding_store import EmbeddingStore, EMBEDDING_STORE_ENABLED
+from .skill_stats import top_skills
+from .versions import compute_etag, etag_matches
+from .search import location_condition, search_resumes, search_jobs
+from .tasks import TASK_STATUSES, enqueue, retry as retry_task, status_counts, task_summary
+from .analytics import score_histogram, verdicts_by_job, component_averages, evaluations_per_day
+from .memory import TracemallocSnapshots, rss_bytes, peak_rss_bytes, object_counts, count_instances, model_footprint, job_profile_cache_footprint
 
 load_dotenv()
 
@@ -21,30 +41,76 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# CORS middleware
-origins = os.getenv("CORS_ORIGINS", "http://localhost:8501").split(",")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # Initialize processors
 content_processor = ContentProcessor()
 resume_scorer = ResumeScorer()
+blob_store = BlobStore()
+job_profile_cache = JobProfileCache()
+rescoring_scheduler = RescoringScheduler(resume_scorer, job_profile_cache)
+slow_request_profiler = SlowRequestProfiler()
+memory_snapshots = TracemallocSnapshots()
+embedding_store = EmbeddingStore() if EMBEDDING_STORE_ENABLED else None
+admission_controller = default_controller() if ADMISSION_CONTROL_ENABLED else None
+
+def store_resume_embedding(resume: Resume):
+    """Write a resume's embedding to the corpus store. Failures are logged; backfill catches up later."""
+    if embedding_store is None:
+        return
+    try:
+        embedding_store.add(resume.id, resume_scorer.embed_resumes([resume.content])[0])
+    except Exception as e:
+        print(f"Error storing embedding for resume {resume.id}: {e}")
+
+def not_modified(request: Request, response: Response, db: Session, tables: List[str]) -> Optional[Response]:
+    """Tag a read of these tables with an ETag; return a 304 if the client's If-None-Match is current."""
+    etag = compute_etag(db, tables, request.url.path, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+REGISTRY.gauge("job_profile_cache_entries", "Compiled job profiles currently cached.").set_function(
+    lambda: len(job_profile_cache)
+)
 
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    if RESCORE_ENABLED:
+        rescoring_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await rescoring_scheduler.stop()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "message": "Resume Relevance Check API is running"}
 
+# Middleware, innermost first: upload size check and admission control (so
+# the metrics and profiles also see queueing, 413s and 429s), then CORS last
+# so it is outermost and its headers are on every response
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(SlowRequestMiddleware, profiler=slow_request_profiler)
+origins = os.getenv("CORS_ORIGINS", "http://localhost:8501").split(",")
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["Retry-After", "ETag"],
+)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.post("/api/v1/resume/upload")
 async def upload_resume(
     file: UploadFile = File(...),
@@ -64,11 +130,13 @@ async def upload_resume(
                 detail=f"File type {file_extension} not supported. Allowed types: {', '.join(allowed_types)}"
             )
         
-        # Read file content
-        file_content = await file.read()
-        
-        # Process resume
-        processed_data = content_processor.process_resume(file_content, file.filename)
+        # Spool to disk in chunks; the extractors and blob store read the file from there
+        with await run_in_threadpool(spool_upload, file.file, file_extension) as upload:
+            # Keep the original so the corpus can be re-parsed when extractors improve
+            file_hash = await run_in_threadpool(blob_store.put_file, upload.path, upload.digest)
+            
+            # Process resume
+            processed_data = await run_in_threadpool(content_processor.process_resume, upload.path, file.filename)
         
         # Create resume record
         resume = Resume(
@@ -78,12 +146,14 @@ async def upload_resume(
             extracted_skills=json.dumps(processed_data['skills']),
             location=location or processed_data['location'],
             job_role=job_role or processed_data['job_role'],
-            experience_years=processed_data['experience_years']
+            experience_years=processed_data['experience_years'],
+            file_hash=file_hash
         )
         
         db.add(resume)
         db.commit()
         db.refresh(resume)
+        await run_in_threadpool(store_resume_embedding, resume)
         
         return {
             "message": "Resume uploaded successfully",
@@ -94,6 +164,14 @@ async def upload_resume(
             "job_role": resume.job_role
         }
         
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except StageTimeout as e:
+        raise HTTPException(status_code=422, detail=f"Resume too complex to process: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing resume: {str(e)}")
 
@@ -105,7 +183,7 @@ async def upload_job_description(
     """Upload and process a job description."""
     try:
         # Process job description
-        processed_data = content_processor.process_job_description(jd_data.content)
+        processed_data = await run_in_threadpool(content_processor.process_job_description, jd_data.content)
         
         # Create job description record
         job_desc = JobDescription(
@@ -121,6 +199,12 @@ async def upload_job_description(
         db.commit()
         db.refresh(job_desc)
         
+        # Compile the scoring profile once so evaluations don't redo per-JD work.
+        # Committed first: no transaction may stay open on the shared connection
+        # while other requests run, and load_job_profile covers the brief gap.
+        await run_in_threadpool(compile_and_store_profile, db, job_desc, resume_scorer, job_profile_cache)
+        db.commit()
+        
         return {
             "message": "Job description uploaded successfully",
             "job_id": job_desc.id,
@@ -129,9 +213,148 @@ async def upload_job_description(
             "location": job_desc.location
         }
         
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except StageTimeout as e:
+        raise HTTPException(status_code=422, detail=f"Job description too complex to process: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing job description: {str(e)}")
 
+@app.put("/api/v1/resume/{resume_id}")
+async def update_resume(
+    resume_id: int,
+    file: Optional[UploadFile] = File(None),
+    job_role: Optional[str] = Form(None),
+    location: Optional[str] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """Update a resume. A new file is re-processed and its evaluations are marked for re-scoring."""
+    try:
+        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        
+        if not resume:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        
+        stale_evaluations = 0
+        if file is not None:
+            allowed_types = ['pdf', 'docx', 'txt']
+            file_extension = file.filename.split('.')[-1].lower()
+            
+            if file_extension not in allowed_types:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"File type {file_extension} not supported. Allowed types: {', '.join(allowed_types)}"
+                )
+            
+            with await run_in_threadpool(spool_upload, file.file, file_extension) as upload:
+                file_hash = await run_in_threadpool(blob_store.put_file, upload.path, upload.digest)
+                processed_data = await run_in_threadpool(content_processor.process_resume, upload.path, file.filename)
+            
+            resume.filename = file.filename
+            resume.file_type = file_extension
+            resume.file_hash = file_hash
+            resume.content = processed_data['content']
+            resume.extracted_skills = json.dumps(processed_data['skills'])
+            resume.experience_years = processed_data['experience_years']
+            resume.location = location or processed_data['location']
+            resume.job_role = job_role or processed_data['job_role']
+            resume.version += 1
+            stale_evaluations = mark_evaluations_stale(db, resume_ids=[resume_id])
+        else:
+            if location is not None:
+                resume.location = location
+            if job_role is not None:
+                resume.job_role = job_role
+        
+        db.commit()
+        db.refresh(resume)
+        if file is not None:
+            await run_in_threadpool(store_resume_embedding, resume)
+        
+        return {
+            "message": "Resume updated successfully",
+            "resume_id": resume.id,
+            "version": resume.version,
+            "extracted_skills": resume.get_skills(),
+            "experience_years": resume.experience_years,
+            "location": resume.location,
+            "job_role": resume.job_role,
+            "stale_evaluations": stale_evaluations
+        }
+        
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except StageTimeout as e:
+        raise HTTPException(status_code=422, detail=f"Resume too complex to process: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating resume: {str(e)}")
+
+@app.put("/api/v1/jd/{job_id}")
+async def update_job_description(
+    job_id: int,
+    jd_data: JobDescriptionUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update a job description. Changes to scoring inputs mark its evaluations for re-scoring."""
+    try:
+        job_desc = db.query(JobDescription).filter(JobDescription.id == job_id).first()
+        
+        if not job_desc:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        
+        inputs_changed = False
+        if jd_data.content is not None and jd_data.content != job_desc.content:
+            processed_data = await run_in_threadpool(content_processor.process_job_description, jd_data.content)
+            job_desc.content = jd_data.content
+            job_desc.required_skills = json.dumps(processed_data['required_skills'])
+            if jd_data.location is None:
+                job_desc.location = processed_data['location'] or job_desc.location
+            if jd_data.experience_required is None:
+                job_desc.experience_required = processed_data['experience_required']
+            inputs_changed = True
+        
+        if jd_data.experience_required is not None and jd_data.experience_required != job_desc.experience_required:
+            job_desc.experience_required = jd_data.experience_required
+            inputs_changed = True
+        
+        for field in ['title', 'company', 'location', 'is_active']:
+            value = getattr(jd_data, field)
+            if value is not None:
+                setattr(job_desc, field, value)
+        
+        stale_evaluations = 0
+        if inputs_changed:
+            job_desc.version += 1
+            await run_in_threadpool(compile_and_store_profile, db, job_desc, resume_scorer, job_profile_cache)
+            stale_evaluations = mark_evaluations_stale(db, job_id=job_id)
+        
+        db.commit()
+        db.refresh(job_desc)
+        
+        return {
+            "message": "Job description updated successfully",
+            "job_id": job_desc.id,
+            "version": job_desc.version,
+            "required_skills": job_desc.get_required_skills(),
+            "experience_required": job_desc.experience_required,
+            "location": job_desc.location,
+            "is_active": job_desc.is_active,
+            "stale_evaluations": stale_evaluations
+        }
+        
+    except HTTPException:
+        raise
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except StageTimeout as e:
+        raise HTTPException(status_code=422, detail=f"Job description too complex to process: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating job description: {str(e)}")
+
 @app.post("/api/v1/evaluate/{resume_id}/{job_id}")
 async def evaluate_resume(
     resume_id: int,
@@ -140,13 +363,13 @@ async def evaluate_resume(
 ):
     """Evaluate a resume against a job description."""
     try:
-        # Get resume and job description
+        # Get resume and the job's compiled scoring profile
         resume = db.query(Resume).filter(Resume.id == resume_id).first()
-        job_desc = db.query(JobDescription).filter(JobDescription.id == job_id).first()
+        job_profile = load_job_profile(db, job_id, resume_scorer, job_profile_cache)
         
         if not resume:
             raise HTTPException(status_code=404, detail="Resume not found")
-        if not job_desc:
+        if not job_profile:
             raise HTTPException(status_code=404, detail="Job description not found")
         
         # Prepare data for scoring
@@ -156,43 +379,14 @@ async def evaluate_resume(
             'experience_years': resume.experience_years
         }
         
-        job_data = {
-            'content': job_desc.content,
-            'required_skills': job_desc.get_required_skills(),
-            'experience_required': job_desc.experience_required
-        }
-        
         # Calculate scores
-        score_result = resume_scorer.score_resume(resume_data, job_data)
-        
-        # Check if evaluation already exists
-        existing_eval = db.query(Evaluation).filter(
-            Evaluation.resume_id == resume_id,
-            Evaluation.job_description_id == job_id
-        ).first()
-        
-        if existing_eval:
-            # Update existing evaluation
-            for key, value in score_result.items():
-                if key in ['matched_skills', 'missing_skills']:
-                    setattr(existing_eval, key, json.dumps(value))
-                else:
-                    setattr(existing_eval, key, value)
-        else:
-            # Create new evaluation
-            evaluation = Evaluation(
-                resume_id=resume_id,
-                job_description_id=job_id,
-                overall_score=score_result['overall_score'],
-                skills_match_score=score_result['skills_match_score'],
-                semantic_similarity_score=score_result['semantic_similarity_score'],
-                experience_score=score_result['experience_score'],
-                matched_skills=json.dumps(score_result['matched_skills']),
-                missing_skills=json.dumps(score_result['missing_skills']),
-                suggestions=score_result['suggestions'],
-                verdict=score_result['verdict']
-            )
-            db.add(evaluation)
+        # Off the event loop so reads keep being served while the model runs
+        score_result = await run_in_threadpool(
+            resume_scorer.score_resume,
+            resume_data, job_profile.job_data, custom_weights=job_profile.weights, job_profile=job_profile
+        )
+        
+        upsert_evaluation(db, resume_id, job_id, score_result)
         
         db.commit()
         
@@ -204,8 +398,113 @@ async def evaluate_resume(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error evaluating resume: {str(e)}")
 
+@app.post("/api/v1/tasks/evaluate/{resume_id}/{job_id}", status_code=202)
+async def enqueue_evaluation(
+    resume_id: int,
+    job_id: int,
+    priority: int = Query(0),
+    db: Session = Depends(get_db)
+):
+    """Queue a resume evaluation for the workers; poll /api/v1/tasks/{task_id} for the result."""
+    try:
+        if db.query(Resume.id).filter(Resume.id == resume_id).scalar() is None:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        if db.query(JobDescription.id).filter(JobDescription.id == job_id).scalar() is None:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        
+        task = enqueue(db, 'evaluate', {'resume_id': resume_id, 'job_id': job_id}, priority)
+        db.commit()
+        
+        return {"message": "Evaluation queued", "task_id": task.id, "status": task.status}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing evaluation: {str(e)}")
+
+@app.post("/api/v1/tasks/resume/upload", status_code=202)
+async def enqueue_resume_upload(
+    file: UploadFile = File(...),
+    job_role: Optional[str] = Form(None),
+    location: Optional[str] = Form(None),
+    evaluate_job_id: Optional[int] = Form(None),
+    priority: int = Form(0),
+    db: Session = Depends(get_db)
+):
+    """Store a resume and queue its parsing (and optionally its evaluation) for the workers."""
+    try:
+        allowed_types = ['pdf', 'docx', 'txt']
+        file_extension = file.filename.split('.')[-1].lower()
+        
+        if file_extension not in allowed_types:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"File type {file_extension} not supported. Allowed types: {', '.join(allowed_types)}"
+            )
+        if evaluate_job_id is not None and db.query(JobDescription.id).filter(JobDescription.id == evaluate_job_id).scalar() is None:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        
+        # Workers read the original from the blob store
+        with await run_in_threadpool(spool_upload, file.file, file_extension) as upload:
+            file_hash = await run_in_threadpool(blob_store.put_file, upload.path, upload.digest)
+        
+        task = enqueue(db, 'ingest_resume', {
+            'file_hash': file_hash,
+            'filename': file.filename,
+            'job_role': job_role,
+            'location': location,
+            'evaluate_job_id': evaluate_job_id
+        }, priority)
+        db.commit()
+        
+        return {"message": "Resume queued for processing", "task_id": task.id, "status": task.status}
+        
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing resume: {str(e)}")
+
+@app.get("/api/v1/tasks")
+async def get_tasks(
+    status: Optional[str] = Query(None),
+    kind: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """List tasks, newest first, with the queue's counts per status."""
+    try:
+        if status is not None and status not in TASK_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Unknown status {status}. Use one of: {', '.join(TASK_STATUSES)}")
+        
+        query = db.query(Task)
+        if status:
+            query = query.filter(Task.status == status)
+        if kind:
+            query = query.filter(Task.kind == kind)
+        tasks = query.order_by(Task.id.desc()).offset(skip).limit(limit).all()
+        
+        return {"counts": status_counts(db), "tasks": [task_summary(task) for task in tasks]}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching tasks: {str(e)}")
+
+@app.get("/api/v1/tasks/{task_id}")
+async def get_task(task_id: int, db: Session = Depends(get_db)):
+    """Status of a queued task, and its result once it has succeeded."""
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task_summary(task)
+
 @app.get("/api/v1/results", response_model=List[EvaluationResult])
 async def get_evaluations(
+    request: Request,
+    response: Response,
     job_id: Optional[int] = Query(None),
     verdict: Optional[str] = Query(None),
     min_score: Optional[float] = Query(None),
@@ -216,6 +515,10 @@ async def get_evaluations(
 ):
     """Get evaluations with filtering options."""
     try:
+        unchanged = not_modified(request, response, db, ["evaluations", "resumes"] if location else ["evaluations"])
+        if unchanged is not None:
+            return unchanged
+        
         query = db.query(Evaluation)
         
         # Apply filters
@@ -226,7 +529,7 @@ async def get_evaluations(
         if min_score is not None:
             query = query.filter(Evaluation.overall_score >= min_score)
         if location:
-            query = query.join(Resume).filter(Resume.location.ilike(f"%{location}%"))
+            query = query.filter(location_condition(db, location, Evaluation.resume_id))
         
         # Apply pagination
         evaluations = query.offset(skip).limit(limit).all()
@@ -246,6 +549,7 @@ async def get_evaluations(
                 missing_skills=eval.get_missing_skills(),
                 suggestions=eval.suggestions,
                 verdict=eval.verdict,
+                scoring_path=eval.scoring_path,
                 created_at=eval.created_at
             )
             results.append(result)
@@ -256,9 +560,13 @@ async def get_evaluations(
         raise HTTPException(status_code=500, detail=f"Error retrieving evaluations: {str(e)}")
 
 @app.get("/api/v1/resume/{resume_id}", response_model=ResumeDetail)
-async def get_resume_detail(resume_id: int, db: Session = Depends(get_db)):
+async def get_resume_detail(resume_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get detailed resume information with evaluations."""
     try:
+        unchanged = not_modified(request, response, db, ["resumes", "evaluations"])
+        if unchanged is not None:
+            return unchanged
+        
         resume = db.query(Resume).filter(Resume.id == resume_id).first()
         
         if not resume:
@@ -279,6 +587,7 @@ async def get_resume_detail(resume_id: int, db: Session = Depends(get_db)):
                 missing_skills=eval.get_missing_skills(),
                 suggestions=eval.suggestions,
                 verdict=eval.verdict,
+                scoring_path=eval.scoring_path,
                 created_at=eval.created_at
             )
             evaluations.append(eval_result)
@@ -301,9 +610,13 @@ async def get_resume_detail(resume_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error retrieving resume details: {str(e)}")
 
 @app.get("/api/v1/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get dashboard statistics."""
     try:
+        unchanged = not_modified(request, response, db, ["resumes", "job_descriptions", "evaluations"])
+        if unchanged is not None:
+            return unchanged
+        
         total_resumes = db.query(Resume).count()
         total_jobs = db.query(JobDescription).count()
         total_evaluations = db.query(Evaluation).count()
@@ -312,9 +625,7 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
         medium_matches = db.query(Evaluation).filter(Evaluation.verdict == "Medium").count()
         low_matches = db.query(Evaluation).filter(Evaluation.verdict == "Low").count()
         
-        # Calculate average score
-        avg_score_result = db.query(Evaluation).all()
-        average_score = sum([eval.overall_score for eval in avg_score_result]) / len(avg_score_result) if avg_score_result else 0.0
+        average_score = component_averages(db)["overall_score"]
         
         stats = DashboardStats(
             total_resumes=total_resumes,
@@ -331,8 +642,68 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving dashboard stats: {str(e)}")
 
+@app.get("/api/v1/analytics/score-histogram")
+async def get_score_histogram(
+    bucket_width: int = Query(10, ge=1, le=50),
+    job_id: Optional[int] = Query(None),
+    verdict: Optional[str] = Query(None),
+    min_score: Optional[float] = Query(None),
+    location: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Evaluation counts per overall-score bucket."""
+    try:
+        return score_histogram(db, bucket_width, job_id=job_id, verdict=verdict, min_score=min_score, location=location)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing score histogram: {str(e)}")
+
+@app.get("/api/v1/analytics/verdicts-by-job")
+async def get_verdicts_by_job(
+    job_id: Optional[int] = Query(None),
+    verdict: Optional[str] = Query(None),
+    min_score: Optional[float] = Query(None),
+    location: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """High/Medium/Low counts for each job."""
+    try:
+        return {"jobs": verdicts_by_job(db, job_id=job_id, verdict=verdict, min_score=min_score, location=location)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing verdict counts: {str(e)}")
+
+@app.get("/api/v1/analytics/component-averages")
+async def get_component_averages(
+    job_id: Optional[int] = Query(None),
+    verdict: Optional[str] = Query(None),
+    min_score: Optional[float] = Query(None),
+    location: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Average overall, skills, semantic and experience scores."""
+    try:
+        return component_averages(db, job_id=job_id, verdict=verdict, min_score=min_score, location=location)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing component averages: {str(e)}")
+
+@app.get("/api/v1/analytics/evaluations-per-day")
+async def get_evaluations_per_day(
+    days: int = Query(30, ge=1, le=365),
+    job_id: Optional[int] = Query(None),
+    verdict: Optional[str] = Query(None),
+    min_score: Optional[float] = Query(None),
+    location: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Evaluation counts and average score per day."""
+    try:
+        return {"days": evaluations_per_day(db, days, job_id=job_id, verdict=verdict, min_score=min_score, location=location)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing evaluations per day: {str(e)}")
+
 @app.get("/api/v1/jobs")
 async def get_job_descriptions(
+    request: Request,
+    response: Response,
     active_only: bool = Query(True),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
@@ -340,6 +711,10 @@ async def get_job_descriptions(
 ):
     """Get list of job descriptions."""
     try:
+        unchanged = not_modified(request, response, db, ["job_descriptions"])
+        if unchanged is not None:
+            return unchanged
+        
         query = db.query(JobDescription)
         
         if active_only:
@@ -364,6 +739,295 @@ async def get_job_descriptions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving job descriptions: {str(e)}")
 
+@app.get("/api/v1/search/resumes")
+async def search_resume_text(
+    q: str = Query(..., min_length=1, max_length=200),
+    location: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Keyword search over resume text, filename, location and role, best matches first."""
+    try:
+        return {"query": q, "results": search_resumes(db, q, location=location, skip=skip, limit=limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching resumes: {str(e)}")
+
+@app.get("/api/v1/search/jobs")
+async def search_job_text(
+    q: str = Query(..., min_length=1, max_length=200),
+    active_only: bool = Query(True),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Keyword search over job description text, title, company and location, best matches first."""
+    try:
+        return {"query": q, "results": search_jobs(db, q, active_only=active_only, skip=skip, limit=limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
+
+def ranking_stream_response(job_id: int, request: Request, persist: bool, **options) -> StreamingResponse:
+    """A job's ranking as a Server-Sent Events response; see ranking_events."""
+    return StreamingResponse(
+        ranking_events(
+            job_id, resume_scorer, job_profile_cache, SessionLocal, request.is_disconnected,
+            admission=admission_controller, persist=persist, **options
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/v1/jobs/{job_id}/rank/stream")
+async def stream_job_ranking(
+    job_id: int,
+    request: Request,
+    batch_size: int = Query(32, ge=1, le=256),
+    top_k: int = Query(10, ge=1, le=100),
+    top_interval: float = Query(1.0, ge=0),
+    location: Optional[str] = Query(None)
+):
+    """Score every resume against a job and stream candidates and the running top-k as Server-Sent Events.
+    
+    Read-only: nothing is saved. POST to the same path to store the evaluations.
+    """
+    return ranking_stream_response(
+        job_id, request, False,
+        batch_size=batch_size, top_k=top_k, top_interval=top_interval, location=location
+    )
+
+@app.post("/api/v1/jobs/{job_id}/rank/stream")
+async def stream_and_save_job_ranking(
+    job_id: int,
+    request: Request,
+    batch_size: int = Query(32, ge=1, le=256),
+    top_k: int = Query(10, ge=1, le=100),
+    top_interval: float = Query(1.0, ge=0),
+    location: Optional[str] = Query(None)
+):
+    """Stream a job's ranking like the GET, saving each scored batch as the job's evaluations."""
+    return ranking_stream_response(
+        job_id, request, True,
+        batch_size=batch_size, top_k=top_k, top_interval=top_interval, location=location
+    )
+
+@app.post("/api/v1/jobs/{job_id}/rerank")
+async def rerank_job_candidates(
+    job_id: int,
+    rerank_data: RerankRequest,
+    db: Session = Depends(get_db)
+):
+    """Re-rank a job's candidates with custom weights from their stored component scores.
+    
+    The weights are relative: they are scaled to sum to 1 (2/1/1 is the same
+    as 0.5/0.25/0.25), and the response's ``weights`` are the scaled ones that
+    were applied and, with ``persist``, saved.
+    """
+    try:
+        weights = {
+            'skills': rerank_data.skills,
+            'semantic': rerank_data.semantic,
+            'experience': rerank_data.experience
+        }
+        result = rerank_job(
+            db, resume_scorer, job_profile_cache, job_id, weights,
+            persist=rerank_data.persist, limit=rerank_data.limit
+        )
+        
+        if result is None:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error re-ranking candidates: {str(e)}")
+
+@app.get("/api/v1/jobs/{job_id}/matches")
+async def get_job_matches(
+    job_id: int,
+    limit: int = Query(50, ge=1, le=1000),
+    min_similarity: Optional[float] = Query(None, ge=0, le=100),
+    db: Session = Depends(get_db)
+):
+    """Rank every stored resume by semantic similarity to a job with one scan of the embedding store."""
+    try:
+        if embedding_store is None:
+            raise HTTPException(status_code=503, detail="Embedding store is disabled")
+        
+        job_profile = load_job_profile(db, job_id, resume_scorer, job_profile_cache)
+        if job_profile is None:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        if job_profile.embedding is None:
+            raise HTTPException(status_code=503, detail="Job description has no embedding")
+        
+        matches = embedding_store.scan(job_profile.embedding, top_k=limit, min_similarity=min_similarity)
+        resumes = {
+            row.id: row for row in db.query(Resume.id, Resume.filename, Resume.location, Resume.job_role)
+            .filter(Resume.id.in_([resume_id for resume_id, _ in matches])).all()
+        }
+        
+        return {
+            "job_id": job_id,
+            "corpus_size": len(embedding_store),
+            "matches": [
+                {
+                    "resume_id": resume_id,
+                    "filename": resumes[resume_id].filename,
+                    "location": resumes[resume_id].location,
+                    "job_role": resumes[resume_id].job_role,
+                    "semantic_similarity_score": round(similarity, 2)
+                }
+                for resume_id, similarity in matches if resume_id in resumes
+            ]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error matching resumes: {str(e)}")
+
+@app.get("/api/v1/jobs/{job_id}/skill-gaps")
+async def get_job_skill_gaps(
+    job_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Most commonly missing and matched skills across a job's evaluations."""
+    try:
+        if not db.query(JobDescription.id).filter(JobDescription.id == job_id).first():
+            raise HTTPException(status_code=404, detail="Job description not found")
+        
+        return top_skills(db, job_id, limit)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving skill gaps: {str(e)}")
+
+@app.get("/api/v1/jobs/{job_id}/skill-matches")
+async def get_job_skill_matches(
+    job_id: int,
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Rank every resume by skills match score for a job using the skill bitsets."""
+    try:
+        result = match_resumes_for_job(db, resume_scorer, job_id, limit)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error matching resume skills: {str(e)}")
+
+@app.get("/api/v1/resume/{resume_id}/job-fits")
+async def get_resume_job_fits(
+    resume_id: int,
+    limit: int = Query(20, ge=1, le=1000),
+    active_only: bool = Query(True),
+    db: Session = Depends(get_db)
+):
+    """Rank jobs by skills match score for a resume using the skill bitsets."""
+    try:
+        result = match_jobs_for_resume(db, resume_scorer, resume_id, limit, active_only)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error matching job skills: {str(e)}")
+
+@app.get("/api/v1/admin/slow-profiles", dependencies=[Depends(require_admin)])
+async def list_slow_request_profiles():
+    """List stored profiles of slow requests, newest first."""
+    return {
+        "threshold_seconds": slow_request_profiler.threshold_seconds,
+        "sample_rate": slow_request_profiler.sample_rate,
+        "profiles": slow_request_profiler.list_profiles()
+    }
+
+@app.get("/api/v1/admin/slow-profiles/{name}", dependencies=[Depends(require_admin)])
+async def download_slow_request_profile(name: str):
+    """Download a stored profile in folded-stack format (flamegraph.pl, speedscope)."""
+    path = slow_request_profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+# The memory endpoints are plain functions, so their gc and tracemalloc scans
+# run in the threadpool instead of stalling the event loop
+@app.get("/api/v1/admin/memory", dependencies=[Depends(require_admin)])
+def get_memory_footprint(top: int = Query(20, ge=1, le=200)):
+    """Report this worker's RSS and what holds memory: model, caches, sessions and live objects."""
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "tracemalloc_active": memory_snapshots.tracing,
+        "model": model_footprint(resume_scorer.sentence_model),
+        "caches": {
+            "job_profiles": job_profile_cache_footprint(job_profile_cache),
+            "embedding_store": embedding_store.stats() if embedding_store is not None else None
+        },
+        "sessions": {
+            "live": count_instances(Session),
+            "pool": engine.pool.status()
+        },
+        "skill_vocabulary_size": sum(len(skills) for skills in content_processor.skill_extractor.common_skills.values()),
+        "objects": object_counts(top)
+    }
+
+@app.post("/api/v1/admin/memory/snapshots", dependencies=[Depends(require_admin)])
+def take_memory_snapshot(
+    frames: int = Query(10, ge=1, le=100),
+    top: int = Query(20, ge=1, le=200)
+):
+    """Take a tracemalloc snapshot, starting tracing on the first call."""
+    return memory_snapshots.take(frames=frames, top=top)
+
+@app.get("/api/v1/admin/memory/snapshots", dependencies=[Depends(require_admin)])
+def list_memory_snapshots():
+    """List the snapshots held, oldest first."""
+    return {"tracemalloc_active": memory_snapshots.tracing, "snapshots": memory_snapshots.list()}
+
+@app.get("/api/v1/admin/memory/snapshots/diff", dependencies=[Depends(require_admin)])
+def diff_memory_snapshots(
+    base: int = Query(...),
+    target: int = Query(...),
+    top: int = Query(20, ge=1, le=200),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$")
+):
+    """Show which allocation sites grew between two snapshots."""
+    result = memory_snapshots.diff(base, target, top=top, key_type=group_by)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return result
+
+@app.delete("/api/v1/admin/memory/snapshots", dependencies=[Depends(require_admin)])
+def clear_memory_snapshots():
+    """Drop all snapshots and stop tracemalloc."""
+    memory_snapshots.clear()
+    return {"message": "Snapshots cleared and tracing stopped"}
+
+@app.post("/api/v1/admin/tasks/{task_id}/retry", dependencies=[Depends(require_admin)])
+async def retry_dead_task(task_id: int, db: Session = Depends(get_db)):
+    """Requeue a dead-lettered task with a fresh attempt budget."""
+    task = retry_task(db, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Dead task not found")
+    db.commit()
+    return task_summary(task)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
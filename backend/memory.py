@@ -0,0 +1,167 @@
+import gc
+import resource
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from .metrics import REGISTRY
+
+MAX_SNAPSHOTS = 5
+
+def _proc_status() -> Dict[str, int]:
+    """VmRSS/VmHWM etc. from /proc/self/status, in bytes. Empty off Linux."""
+    values = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Vm"):
+                    key, value = line.split(":", 1)
+                    parts = value.split()
+                    if len(parts) == 2 and parts[1] == "kB":
+                        values[key] = int(parts[0]) * 1024
+    except OSError:
+        pass
+    return values
+
+def rss_bytes() -> int:
+    """Current resident set size of this process."""
+    status = _proc_status()
+    if "VmRSS" in status:
+        return status["VmRSS"]
+    return peak_rss_bytes()
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process."""
+    status = _proc_status()
+    if "VmHWM" in status:
+        return status["VmHWM"]
+    # ru_maxrss is kilobytes on Linux and bytes on macOS; the macOS case is the fallback here
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+REGISTRY.gauge("process_resident_memory_bytes", "Resident set size of this worker.").set_function(rss_bytes)
+
+def object_counts(top: int = 20) -> List[Dict]:
+    """Live GC-tracked objects by type, most common first."""
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+    return [{'type': name, 'count': count} for name, count in counts.most_common(top)]
+
+def count_instances(cls) -> int:
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, cls))
+
+def model_footprint(sentence_model) -> Dict:
+    """Parameter count and bytes of a torch-backed model; best effort for anything else."""
+    info = {'class': type(sentence_model).__name__}
+    socket_path = getattr(sentence_model, "socket_path", None)
+    if socket_path:
+        # Served by the shared model server; only an in-process fallback costs this worker memory
+        info['server_socket'] = socket_path
+        sentence_model = getattr(sentence_model, "_fallback_model", None)
+        info['fallback_loaded'] = sentence_model is not None
+    parameters = getattr(sentence_model, "parameters", None)
+    if callable(parameters):
+        try:
+            tensors = list(parameters())
+            info['parameters'] = sum(t.numel() for t in tensors)
+            info['parameter_bytes'] = sum(t.numel() * t.element_size() for t in tensors)
+        except Exception as e:
+            info['error'] = str(e)
+    return info
+
+def job_profile_cache_footprint(cache) -> Dict:
+    """Entry count and approximate payload bytes (embeddings plus cleaned text) of the profile cache."""
+    profiles = cache.snapshot()
+    embedding_bytes = sum(p.embedding.nbytes for p in profiles if p.embedding is not None)
+    text_bytes = sum(len(p.cleaned_text) for p in profiles)
+    return {
+        'entries': len(profiles),
+        'maxsize': cache.maxsize,
+        'hits': cache.hits,
+        'misses': cache.misses,
+        'approx_bytes': embedding_bytes + text_bytes
+    }
+
+class TracemallocSnapshots:
+    """Takes and diffs tracemalloc snapshots for the admin memory endpoints.
+
+    Tracing starts with the first snapshot (it slows allocation down, so it is
+    off by default) and stops when the snapshots are cleared. Only the newest
+    MAX_SNAPSHOTS snapshots are kept.
+    """
+
+    def __init__(self, max_snapshots: int = MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[int, Dict]" = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def take(self, frames: int = 10, top: int = 20) -> Dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = {'snapshot': snapshot, 'taken_at': time.time()}
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+
+        return {
+            'id': snapshot_id,
+            'traced_bytes': current,
+            'traced_peak_bytes': peak,
+            'top': self._format(snapshot.statistics('lineno')[:top])
+        }
+
+    def diff(self, base_id: int, target_id: int, top: int = 20, key_type: str = 'lineno') -> Optional[Dict]:
+        """Allocation growth from one snapshot to another, largest first. None if either is unknown."""
+        with self._lock:
+            base = self._snapshots.get(base_id)
+            target = self._snapshots.get(target_id)
+        if base is None or target is None:
+            return None
+
+        stats = target['snapshot'].compare_to(base['snapshot'], key_type)
+        return {
+            'base': base_id,
+            'target': target_id,
+            'seconds_between': round(target['taken_at'] - base['taken_at'], 3),
+            'size_diff_bytes': sum(stat.size_diff for stat in stats),
+            'top': [
+                {
+                    'location': str(stat.traceback[0]) if stat.traceback else None,
+                    'size_diff_bytes': stat.size_diff,
+                    'size_bytes': stat.size,
+                    'count_diff': stat.count_diff
+                }
+                for stat in stats[:top]
+            ]
+        }
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [{'id': snapshot_id, 'taken_at': entry['taken_at']} for snapshot_id, entry in self._snapshots.items()]
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @staticmethod
+    def _format(stats) -> List[Dict]:
+        return [
+            {'location': str(stat.traceback[0]) if stat.traceback else None, 'size_bytes': stat.size, 'count': stat.count}
+            for stat in stats
+        ]
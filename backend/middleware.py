@@ -0,0 +1,133 @@
+"""Request middleware of the API, written as plain ASGI middleware.
+
+Starlette's @app.middleware("http") wraps each layer in BaseHTTPMiddleware,
+which runs the rest of the stack in a separate task and relays every message
+through memory streams; with several layers that overhead dominated the fast
+read endpoints. These classes only wrap ``send`` where they need to see the
+response status.
+"""
+import sys
+import time
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .admission import AdmissionController, AdmissionRejected, classify_request
+from .budgets import MAX_UPLOAD_BYTES
+from .metrics import HTTP_REQUEST_SECONDS
+from .profiling import SlowRequestProfiler, request_sampler
+from .uploads import exceeds_upload_limit
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def _route_path(scope: Scope, default: str) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", default)
+
+class AdmissionMiddleware:
+    """Refuse oversized uploads with 413, then limit concurrent requests per class.
+
+    The upload check uses the declared Content-Length, so the request is
+    answered before its multipart body is received or it queues for a slot.
+    Requests that find their class's wait queue full get 429 and Retry-After.
+    """
+
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if exceeds_upload_limit(_header(scope, b"content-type"), _header(scope, b"content-length")):
+            response = JSONResponse(
+                status_code=413,
+                content={"detail": f"File exceeds the {MAX_UPLOAD_BYTES} byte upload limit"}
+            )
+            await response(scope, receive, send)
+            return
+
+        request_class = classify_request(scope["method"], scope["path"]) if self.controller else None
+        if request_class is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            async with self.controller.slot(request_class):
+                await self.app(scope, receive, send)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": f"Server busy, too many {e.request_class} requests queued"},
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+
+class RequestMetricsMiddleware:
+    """Observe request latency labelled by route template, not raw path, to keep label sets bounded.
+
+    Latency is measured to the start of the response, so a streamed response
+    (SSE rankings) counts until its headers are sent, not for its whole life.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        observed = False
+
+        def observe(status: int):
+            nonlocal observed
+            observed = True
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=_route_path(scope, "unmatched"),
+                status=str(status)
+            )
+
+        async def send_observed(message: Message):
+            if message["type"] == "http.response.start" and not observed:
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_observed)
+        finally:
+            if not observed:
+                observe(500)
+
+class SlowRequestMiddleware:
+    """Profile a sampled fraction of upload/evaluate requests and keep the ones over the latency threshold."""
+
+    def __init__(self, app: ASGIApp, profiler: SlowRequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # This frame is on the event loop's stack exactly while the request runs there
+        sampler = self.profiler.start(scope["path"], sys._getframe()) if scope["type"] == "http" else None
+        if sampler is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        token = request_sampler.set(sampler)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_sampler.reset(token)
+            self.profiler.finish(
+                sampler, scope["method"], _route_path(scope, scope["path"]), time.perf_counter() - start
+            )
@@ -0,0 +1,275 @@
+"""Shared embedding model server for all API workers on a host.
+
+Usage (from the project root):
+    python -m backend.model_server [--socket PATH] [--max-batch 128] [--max-wait-ms 5]
+
+One process loads the sentence model and serves encode requests over a Unix
+socket. Requests from every worker are queued and encoded together: a batch
+closes when it reaches --max-batch texts or --max-wait-ms after its first
+request, and whatever arrives while the model is busy forms the next batch.
+Workers use it when EMBEDDING_SERVER_SOCKET is set. While the server is not
+running they fall back to TF-IDF scoring, or with EMBEDDING_SERVER_FALLBACK
+to loading the model in-process; a server too busy to answer in time is
+reported as StageOverloaded and never triggers a local load.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .budgets import StageOverloaded
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "30"))
+EMBEDDING_SERVER_RETRY_SECONDS = float(os.getenv("EMBEDDING_SERVER_RETRY_SECONDS", "30"))
+# Load the model in every worker while the server is down: N copies of the weights
+EMBEDDING_SERVER_FALLBACK = os.getenv("EMBEDDING_SERVER_FALLBACK", "False").lower() == "true"
+
+# Frame: <II header length, body length> + JSON header + raw body bytes
+_FRAME_PREFIX = struct.Struct("<II")
+
+def encode_frame(header: Dict, body: bytes = b"") -> bytes:
+    header_bytes = json.dumps(header).encode("utf-8")
+    return _FRAME_PREFIX.pack(len(header_bytes), len(body)) + header_bytes + body
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Model server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def recv_frame(sock: socket.socket) -> Tuple[Dict, bytes]:
+    header_length, body_length = _FRAME_PREFIX.unpack(_recv_exactly(sock, _FRAME_PREFIX.size))
+    header = json.loads(_recv_exactly(sock, header_length).decode("utf-8"))
+    return header, _recv_exactly(sock, body_length) if body_length else b""
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[Dict, bytes]:
+    header_length, body_length = _FRAME_PREFIX.unpack(await reader.readexactly(_FRAME_PREFIX.size))
+    header = json.loads((await reader.readexactly(header_length)).decode("utf-8"))
+    return header, (await reader.readexactly(body_length)) if body_length else b""
+
+class ModelServer:
+    """Owns the model and encodes queued requests from all clients in shared batches."""
+
+    def __init__(self, model, max_batch: int = 128, max_wait: float = 0.005, model_name: str = EMBEDDING_MODEL_NAME):
+        self.model = model
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.texts = 0
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header, _ = await _read_frame(reader)
+                op = header.get("op")
+                if op == "encode":
+                    future = asyncio.get_running_loop().create_future()
+                    await self._queue.put((list(header.get("texts", [])), future))
+                    try:
+                        embeddings = await future
+                        writer.write(encode_frame(
+                            {"shape": list(embeddings.shape), "dtype": "float32"}, embeddings.tobytes()
+                        ))
+                    except Exception as e:
+                        writer.write(encode_frame({"error": str(e)}))
+                elif op == "info":
+                    writer.write(encode_frame({
+                        "model": self.model_name,
+                        "batches": self.batches,
+                        "texts": self.texts,
+                        "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0
+                    }))
+                else:
+                    writer.write(encode_frame({"error": f"Unknown op: {op}"}))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(request)
+                size += len(request[0])
+
+            texts = [text for request_texts, _ in pending for text in request_texts]
+            try:
+                # Off the event loop so connections keep being served while the model runs
+                embeddings = await loop.run_in_executor(None, self._encode, texts)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for request_texts, future in pending:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(self.model.encode(texts), dtype=np.float32)
+
+    async def serve(self, socket_path: str):
+        self._queue = asyncio.Queue()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = await asyncio.start_unix_server(self.handle_client, path=socket_path)
+        batcher = asyncio.create_task(self._batcher())
+        print(f"Model server listening on {socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+class RemoteEmbeddingModel:
+    """Drop-in for SentenceTransformer.encode that uses the shared model server.
+
+    Each thread keeps its own connection, and a dropped one is reopened once.
+    If the server is not running (refused or missing socket), the model is
+    loaded in-process via ``fallback`` and used until ``retry_seconds`` have
+    passed, then the server is tried again; without a fallback, encode raises
+    ConnectionError meanwhile. A timeout means the server is busy, not down,
+    and raises StageOverloaded: every worker would time out together, and
+    each loading its own copy of the model is how a host runs out of memory.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        fallback: Optional[Callable] = None,
+        timeout: float = EMBEDDING_SERVER_TIMEOUT,
+        retry_seconds: float = EMBEDDING_SERVER_RETRY_SECONDS
+    ):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._fallback_factory = fallback
+        self._fallback_model = None
+        self._fallback_lock = threading.Lock()
+        self._remote_down_until = 0.0
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _request(self, header: Dict) -> Tuple[Dict, bytes]:
+        sock = self._connection()
+        try:
+            sock.sendall(encode_frame(header))
+            return recv_frame(sock)
+        except (OSError, ValueError):
+            # The stream may be mid-frame; never reuse it
+            sock.close()
+            self._local.sock = None
+            raise
+
+    def _remote_encode(self, texts: List[str]) -> np.ndarray:
+        header, body = self._request({"op": "encode", "texts": texts})
+        if "error" in header:
+            raise RuntimeError(f"Model server error: {header['error']}")
+        return np.frombuffer(body, dtype=np.float32).reshape(header["shape"])
+
+    def _fallback(self):
+        with self._fallback_lock:
+            if self._fallback_model is None:
+                if self._fallback_factory is None:
+                    raise ConnectionError(f"Model server at {self.socket_path} is unavailable")
+                self._fallback_model = self._fallback_factory()
+            return self._fallback_model
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+
+        if time.monotonic() >= self._remote_down_until:
+            for attempt in range(2):
+                try:
+                    embeddings = self._remote_encode(batch)
+                    return embeddings[0] if single else embeddings
+                except socket.timeout as e:
+                    raise StageOverloaded(
+                        "embedding", self.timeout, f"the model server did not answer within {self.timeout:g}s"
+                    ) from e
+                except (ConnectionRefusedError, FileNotFoundError) as e:
+                    logger.warning("Model server not running: %s", e)
+                    self._remote_down_until = time.monotonic() + self.retry_seconds
+                    break
+                except (OSError, ValueError):
+                    # A dropped connection (e.g. the server restarted); reconnect once
+                    if attempt:
+                        raise
+
+        return self._fallback().encode(texts, **kwargs)
+
+    def info(self) -> Dict:
+        return self._request({"op": "info"})[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve sentence embeddings to API workers over a Unix socket.")
+    parser.add_argument("--socket", default=EMBEDDING_SERVER_SOCKET or "/tmp/resume-embeddings.sock")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--max-batch", type=int, default=128, help="Texts per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long a batch waits to fill")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    server = ModelServer(SentenceTransformer(args.model), args.max_batch, args.max_wait_ms / 1000, args.model)
+    try:
+        asyncio.run(server.serve(args.socket))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, LargeBinary, Index, UniqueConstraint, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import json
 
+from .skill_bits import skill_columns
+
 Base = declarative_base()
 
 class Resume(Base):
@@ -16,10 +18,15 @@ class Resume(Base):
     file_type = Column(String(10), nullable=False)  # pdf, docx, txt
     content = Column(Text, nullable=False)
     extracted_skills = Column(Text)  # JSON string
+    skill_bits = Column(LargeBinary)  # extracted_skills as a taxonomy bitset, see skill_bits.py
+    unindexed_skills = Column(Text)  # JSON string, skills the bitset can't represent (usually NULL)
     location = Column(String(100))
     job_role = Column(String(100))
     experience_years = Column(Integer, default=0)
+    file_hash = Column(String(64), index=True)  # BlobStore digest of the original file
+    version = Column(Integer, default=1, nullable=False)  # Bumped whenever scoring inputs change
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     evaluations = relationship("Evaluation", back_populates="resume")
@@ -35,9 +42,15 @@ class JobDescription(Base):
     company = Column(String(200))
     content = Column(Text, nullable=False)
     required_skills = Column(Text)  # JSON string
+    skill_bits = Column(LargeBinary)  # required_skills as a taxonomy bitset, see skill_bits.py
+    unindexed_skills = Column(Text)  # JSON string, skills the bitset can't represent (usually NULL)
     location = Column(String(100))
     experience_required = Column(Integer, default=0)
+    compiled_profile = Column(LargeBinary)  # Serialized JobProfile for the current version
+    score_weights = Column(Text)  # JSON string, per-job overrides of the default score weights
+    version = Column(Integer, default=1, nullable=False)  # Bumped whenever scoring inputs change
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     
     # Relationships
@@ -45,6 +58,9 @@ class JobDescription(Base):
     
     def get_required_skills(self) -> List[str]:
         return json.loads(self.required_skills) if self.required_skills else []
+    
+    def get_score_weights(self) -> Optional[Dict[str, float]]:
+        return json.loads(self.score_weights) if self.score_weights else None
 
 class Evaluation(Base):
     __tablename__ = "evaluations"
@@ -64,9 +80,14 @@ class Evaluation(Base):
     missing_skills = Column(Text)  # JSON string
     suggestions = Column(Text)
     verdict = Column(String(20))  # High, Medium, Low
+    is_stale = Column(Boolean, default=False, nullable=False, index=True)  # Inputs changed since scoring
+    scoring_path = Column(String(20), default="semantic")  # semantic, or tfidf when the model fell back
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # One evaluation per pair; upsert_evaluation relies on it to insert on conflict
+    __table_args__ = (UniqueConstraint("resume_id", "job_description_id", name="uq_evaluations_resume_job"),)
+    
     # Relationships
     resume = relationship("Resume", back_populates="evaluations")
     job_description = relationship("JobDescription", back_populates="evaluations")
@@ -77,6 +98,71 @@ class Evaluation(Base):
     def get_missing_skills(self) -> List[str]:
         return json.loads(self.missing_skills) if self.missing_skills else []
 
+class JobSkillStat(Base):
+    """How many of a job's current evaluations matched or missed each skill.
+
+    Kept in step with the evaluations by upsert_evaluation; rebuild with
+    ``python -m backend.skill_stats backfill``.
+    """
+    __tablename__ = "job_skill_stats"
+    
+    job_description_id = Column(Integer, ForeignKey("job_descriptions.id"), primary_key=True)
+    skill = Column(String(100), primary_key=True)
+    matched_count = Column(Integer, default=0, nullable=False)
+    missing_count = Column(Integer, default=0, nullable=False)
+
+class TableVersion(Base):
+    """Change counter of one table, bumped by every commit that writes to it; see versions.py."""
+    __tablename__ = "table_versions"
+    
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+
+class Task(Base):
+    """A unit of background work (evaluate, ingest_resume) claimed by worker processes, see tasks.py."""
+    __tablename__ = "tasks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON string
+    status = Column(String(20), default="queued", nullable=False)  # queued, running, succeeded, dead
+    priority = Column(Integer, default=0, nullable=False)  # Higher runs first
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Not claimable before (retry backoff)
+    lease_owner = Column(String(200))
+    lease_expires_at = Column(DateTime)
+    result = Column(Text)  # JSON string
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (Index("ix_tasks_claim", "status", "priority", "available_at"),)
+    
+    def get_payload(self) -> Dict[str, Any]:
+        return json.loads(self.payload) if self.payload else {}
+    
+    def get_result(self) -> Optional[Dict[str, Any]]:
+        return json.loads(self.result) if self.result else None
+
+class Lease(Base):
+    """A named lock held by one process until it expires, see tasks.acquire_lease."""
+    __tablename__ = "leases"
+    
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(200), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+# Keep the skill bitsets in step with the JSON skill lists on every ORM write
+@event.listens_for(Resume.extracted_skills, "set")
+def _set_resume_skill_bits(target, value, oldvalue, initiator):
+    target.skill_bits, target.unindexed_skills = skill_columns(value)
+
+@event.listens_for(JobDescription.required_skills, "set")
+def _set_job_skill_bits(target, value, oldvalue, initiator):
+    target.skill_bits, target.unindexed_skills = skill_columns(value)
+
 # Pydantic models for API
 class ResumeUpload(BaseModel):
     filename: str
@@ -92,6 +178,22 @@ class JobDescriptionUpload(BaseModel):
     location: Optional[str] = None
     experience_required: Optional[int] = 0
 
+class JobDescriptionUpdate(BaseModel):
+    title: Optional[str] = None
+    company: Optional[str] = None
+    content: Optional[str] = None
+    location: Optional[str] = None
+    experience_required: Optional[int] = None
+    is_active: Optional[bool] = None
+
+class RerankRequest(BaseModel):
+    # Relative weights, scaled to sum to 1
+    skills: float
+    semantic: float
+    experience: float
+    persist: bool = False  # Save as the job's weight profile and update stored scores
+    limit: int = Field(100, ge=1, le=1000)
+
 class EvaluationResult(BaseModel):
     id: int
     resume_id: int
@@ -104,6 +206,7 @@ class EvaluationResult(BaseModel):
     missing_skills: List[str]
     suggestions: str
     verdict: str
+    scoring_path: Optional[str] = None
     created_at: datetime
 
 class ResumeDetail(BaseModel):
@@ -1,11 +1,19 @@
 import fitz  # PyMuPDF
-import docx
+import io
+import mmap
+import os
 import re
+import zipfile
+import xml.etree.ElementTree as ET
 import nltk
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional, Iterator, Union
 from sentence_transformers import SentenceTransformer
 import json
 
+from .budgets import StageBudgets, truncate_text
+from .metrics import time_stage
+from .taxonomy import skill_categories
+
 # Download required NLTK data
 try:
     nltk.data.find('tokenizers/punkt')
@@ -20,14 +28,96 @@ except LookupError:
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 
+COMMON_ROLES = [
+    'software engineer', 'data scientist', 'web developer', 'full stack developer',
+    'frontend developer', 'backend developer', 'devops engineer', 'product manager',
+    'ui/ux designer', 'business analyst', 'project manager', 'qa engineer'
+]
+
+# Single tokenizer for the lowercased-text fields (experience and job role).
+# Tokens consume as little as possible so no token can hide another:
+#   years   - a digit run followed by "[+] years/yrs" (the unit is a lookahead)
+#   digits  - any other digit run, consumed whole to keep scanning linear
+#   exp     - the "e" of an "exp"/"experience" keyword
+#   role    - one of COMMON_ROLES
+#   newline - line breaks, which the "experience ... N years" rule can't cross
+_FIELD_TOKEN_PATTERN = re.compile(
+    r'(?P<years>\d+)(?=(?P<unit>(?P<plus>\+?)\s*(?:years?|yrs?)))'
+    r'|\d+'
+    r'|(?P<exp>e)(?=xp)'
+    r'|(?P<role>' + '|'.join(re.escape(role) for role in COMMON_ROLES) + r')'
+    r'|(?P<newline>\n)'
+)
+_EXPERIENCE_SUFFIX_PATTERN = re.compile(r'\s*(?:of\s*)?(?:experience|exp)')
+_ROLE_PATTERNS = [
+    re.compile(r'(?:role|position|title):\s*([^\n,]+)'),
+    re.compile(r'seeking\s+(?:a\s+)?([^\n,]+?)\s+(?:position|role)'),
+]
+
+# Location rules run on the original text. A "City, ST" match always starts at
+# the beginning of a letters/whitespace run, so the lookbehinds pin each
+# attempt to a run start instead of retrying at every character.
+_LOCATION_LABEL_PATTERN = re.compile(r'(?:location|based in|located in):\s*([^,\n]+)')
+_CITY_STATE_PATTERN = re.compile(r'(?<![A-Za-z\s])[A-Za-z\s]+,\s*[A-Z]{2}')
+_CITY_COUNTRY_RUN_PATTERN = re.compile(
+    r'(?<![A-Za-z\s])[A-Za-z\s]+(?=,\s*(?:India|USA|UK|Canada|Australia)\b)'
+)
+_COUNTRY_SUFFIX_PATTERN = re.compile(r',\s*(?:India|USA|UK|Canada|Australia)\b')
+_WORD_BOUNDARY_PATTERN = re.compile(r'\b')
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+_DOCX_PARAGRAPH = _WORD_NS + 'p'
+_DOCX_TEXT = _WORD_NS + 't'
+_DOCX_TAB = _WORD_NS + 'tab'
+_DOCX_BREAKS = {_WORD_NS + 'br', _WORD_NS + 'cr'}
+_DOCX_HEADER_PART = re.compile(r'word/header(\d*)\.xml$')
+
+def _iter_docx_paragraphs(xml_stream) -> Iterator[str]:
+    """Yield the text of each paragraph in a WordprocessingML part, in document order.
+    
+    Parses incrementally and frees each paragraph once read. Paragraphs inside
+    tables and text boxes are ordinary w:p elements, so they are included; the
+    mc:Fallback copy of a text box is skipped to avoid duplicating it.
+    """
+    paragraphs: List[List[str]] = []  # Stack: text boxes nest paragraphs inside runs
+    fallback_depth = 0
+    
+    for event, elem in ET.iterparse(xml_stream, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag == _MC_FALLBACK:
+                fallback_depth += 1
+            elif tag == _DOCX_PARAGRAPH and not fallback_depth:
+                paragraphs.append([])
+            continue
+        
+        if tag == _MC_FALLBACK:
+            fallback_depth -= 1
+            elem.clear()
+        elif fallback_depth or not paragraphs:
+            continue
+        elif tag == _DOCX_TEXT:
+            paragraphs[-1].append(elem.text or '')
+        elif tag == _DOCX_TAB:
+            paragraphs[-1].append('\t')
+        elif tag in _DOCX_BREAKS:
+            paragraphs[-1].append('\n')
+        elif tag == _DOCX_PARAGRAPH:
+            yield ''.join(paragraphs.pop())
+            elem.clear()
+
 class TextExtractor:
     """Handles extraction of text from different file formats."""
     
     @staticmethod
-    def extract_from_pdf(file_content: bytes) -> str:
-        """Extract text from PDF bytes."""
+    def extract_from_pdf(file_content: Union[bytes, str]) -> str:
+        """Extract text from PDF bytes or a file path (read by MuPDF on demand, never loaded whole)."""
         try:
-            doc = fitz.open(stream=file_content, filetype="pdf")
+            if isinstance(file_content, str):
+                doc = fitz.open(file_content, filetype="pdf")
+            else:
+                doc = fitz.open(stream=file_content, filetype="pdf")
             text = ""
             for page in doc:
                 text += page.get_text()
@@ -37,21 +127,40 @@ class TextExtractor:
             raise Exception(f"Error extracting PDF: {str(e)}")
     
     @staticmethod
-    def extract_from_docx(file_content: bytes) -> str:
-        """Extract text from DOCX bytes."""
+    def extract_from_docx(file_content: Union[bytes, str, io.IOBase]) -> str:
+        """Extract text from DOCX bytes, a file path or a binary file object.
+        
+        Streams the headers and word/document.xml straight out of the zip with
+        an incremental XML parser, so tables, headers and text boxes are
+        covered without building the python-docx object model.
+        """
         try:
-            doc = docx.Document(file_content)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            if isinstance(file_content, (bytes, bytearray, memoryview)):
+                file_content = io.BytesIO(file_content)
+            
+            lines = []
+            with zipfile.ZipFile(file_content) as archive:
+                headers = sorted(
+                    (name for name in archive.namelist() if _DOCX_HEADER_PART.match(name)),
+                    key=lambda name: int(_DOCX_HEADER_PART.match(name).group(1) or 0)
+                )
+                for part in headers + ['word/document.xml']:
+                    with archive.open(part) as xml_stream:
+                        lines.extend(_iter_docx_paragraphs(xml_stream))
+            return "\n".join(lines).strip()
         except Exception as e:
             raise Exception(f"Error extracting DOCX: {str(e)}")
     
     @staticmethod
-    def extract_from_txt(file_content: bytes) -> str:
-        """Extract text from TXT bytes."""
+    def extract_from_txt(file_content: Union[bytes, str]) -> str:
+        """Extract text from TXT bytes or a file path, decoding a path straight from an mmap."""
         try:
+            if isinstance(file_content, str):
+                with open(file_content, 'rb') as f:
+                    if not os.fstat(f.fileno()).st_size:
+                        return ''
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        return str(mapped, 'utf-8').strip()
             return file_content.decode('utf-8').strip()
         except Exception as e:
             raise Exception(f"Error extracting TXT: {str(e)}")
@@ -60,15 +169,7 @@ class SkillExtractor:
     """Extracts skills and relevant information from text."""
     
     def __init__(self):
-        self.common_skills = {
-            'programming': ['python', 'java', 'javascript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust', 'swift'],
-            'web': ['html', 'css', 'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'spring'],
-            'database': ['mysql', 'postgresql', 'mongodb', 'sqlite', 'redis', 'elasticsearch'],
-            'cloud': ['aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform'],
-            'tools': ['git', 'jenkins', 'jira', 'confluence', 'slack'],
-            'ai_ml': ['machine learning', 'deep learning', 'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy'],
-            'soft_skills': ['communication', 'leadership', 'teamwork', 'problem solving', 'project management']
-        }
+        self.common_skills = skill_categories()
         
         self.stop_words = set(stopwords.words('english'))
     
@@ -98,107 +199,158 @@ class SkillExtractor:
         # Remove duplicates and return
         return list(set(found_skills))
     
+    def extract_fields(self, text: str) -> Dict:
+        """Extract experience years, location and job role together.
+        
+        Equivalent to the individual extract_* methods, but lowercases the text
+        once and finds every experience and role token in a single linear scan.
+        """
+        experience_years, job_role = self._scan_lowered_fields(text.lower())
+        return {
+            'experience_years': experience_years,
+            'location': self._find_location(text),
+            'job_role': job_role
+        }
+    
     def extract_experience_years(self, text: str) -> int:
         """Extract years of experience from text."""
-        patterns = [
-            r'(\d+)\s*(?:years?|yrs?)\s*(?:of\s*)?(?:experience|exp)',
-            r'(\d+)\+\s*(?:years?|yrs?)',
-            r'(?:experience|exp).*?(\d+)\s*(?:years?|yrs?)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text.lower())
-            if matches:
-                return max([int(match) for match in matches])
-        
-        return 0
+        return self._scan_lowered_fields(text.lower())[0]
     
     def extract_location(self, text: str) -> str:
         """Extract location information from text."""
-        # Common location patterns
-        patterns = [
-            r'(?:location|based in|located in):\s*([^,\n]+)',
-            r'([A-Za-z\s]+,\s*[A-Z]{2})',  # City, State format
-            r'\b([A-Za-z\s]+,\s*(?:India|USA|UK|Canada|Australia))\b',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                return matches[0].strip()
-        
-        return ""
+        return self._find_location(text)
     
     def extract_job_role(self, text: str) -> str:
         """Extract job role/title from text."""
-        common_roles = [
-            'software engineer', 'data scientist', 'web developer', 'full stack developer',
-            'frontend developer', 'backend developer', 'devops engineer', 'product manager',
-            'ui/ux designer', 'business analyst', 'project manager', 'qa engineer'
-        ]
+        return self._scan_lowered_fields(text.lower())[1]
+    
+    def _scan_lowered_fields(self, text_lower: str) -> Tuple[int, str]:
+        """One pass over lowercased text for experience years and job role.
         
-        text_lower = text.lower()
-        for role in common_roles:
-            if role in text_lower:
-                return role.title()
+        Experience rules, in priority order (the first with any match wins, and
+        the largest number is returned):
+          1. "N years of experience"
+          2. "N+ years"
+          3. "experience ... N years" on the same line
+        """
+        labelled_years = []   # rule 1
+        plus_years = []       # rule 2
+        keyword_years = []    # rule 3
+        roles_found = set()
         
-        # Try to extract from common patterns
-        patterns = [
-            r'(?:role|position|title):\s*([^\n,]+)',
-            r'seeking\s+(?:a\s+)?([^\n,]+?)\s+(?:position|role)',
-        ]
+        line = 0
+        keyword_line = None  # line of the latest "exp" keyword still waiting for a number
         
-        for pattern in patterns:
-            matches = re.findall(pattern, text_lower)
+        for match in _FIELD_TOKEN_PATTERN.finditer(text_lower):
+            kind = match.lastgroup
+            if kind == 'newline':
+                line += 1
+            elif kind == 'exp':
+                keyword_line = line
+            elif kind == 'role':
+                roles_found.add(match.group('role'))
+            elif match.group('years') is not None:
+                years = int(match.group('years'))
+                if match.group('plus'):
+                    plus_years.append(years)
+                    continue
+                if _EXPERIENCE_SUFFIX_PATTERN.match(text_lower, match.end('unit')):
+                    labelled_years.append(years)
+                if keyword_line == line:
+                    keyword_years.append(years)
+                keyword_line = None
+        
+        experience_years = 0
+        for matches in (labelled_years, plus_years, keyword_years):
             if matches:
-                return matches[0].strip().title()
+                experience_years = max(matches)
+                break
+        
+        for role in COMMON_ROLES:
+            if role in roles_found:
+                return experience_years, role.title()
+        
+        # Try to extract from common patterns
+        for pattern in _ROLE_PATTERNS:
+            match = pattern.search(text_lower)
+            if match:
+                return experience_years, match.group(1).strip().title()
         
-        return "Not Specified"
+        return experience_years, "Not Specified"
+    
+    def _find_location(self, text: str) -> str:
+        """Location rules in priority order: labelled, "City, ST", "City, Country"."""
+        match = _LOCATION_LABEL_PATTERN.search(text)
+        if match:
+            return match.group(1).strip()
+        
+        match = _CITY_STATE_PATTERN.search(text)
+        if match:
+            return match.group(0).strip()
+        
+        # "City, Country" must also start on a word boundary, which may fall
+        # after the start of the letters/whitespace run
+        for run in _CITY_COUNTRY_RUN_PATTERN.finditer(text):
+            boundary = _WORD_BOUNDARY_PATTERN.search(text, run.start(), run.end())
+            if boundary and boundary.start() < run.end():
+                suffix = _COUNTRY_SUFFIX_PATTERN.match(text, run.end())
+                return text[boundary.start():suffix.end()].strip()
+        
+        return ""
 
 class ContentProcessor:
     """Main processor for handling resume and job description content."""
     
-    def __init__(self):
+    def __init__(self, budgets: Optional[StageBudgets] = None):
         self.text_extractor = TextExtractor()
         self.skill_extractor = SkillExtractor()
+        self.budgets = budgets or StageBudgets()
     
-    def process_resume(self, file_content: bytes, filename: str) -> Dict:
-        """Process resume file and extract relevant information."""
-        file_extension = filename.lower().split('.')[-1]
+    def process_resume(self, file_content: Union[bytes, str], filename: str) -> Dict:
+        """Process resume file (bytes or a path to it) and extract relevant information.
         
-        # Extract text based on file type
-        if file_extension == 'pdf':
-            text = self.text_extractor.extract_from_pdf(file_content)
-        elif file_extension == 'docx':
-            text = self.text_extractor.extract_from_docx(file_content)
-        elif file_extension == 'txt':
-            text = self.text_extractor.extract_from_txt(file_content)
-        else:
+        Text extraction and skill/field extraction each run under their stage
+        budget (raising StageTimeout), and the extracted text is capped at
+        MAX_TEXT_CHARS.
+        """
+        file_extension = filename.lower().split('.')[-1]
+        if file_extension not in ('pdf', 'docx', 'txt'):
             raise ValueError(f"Unsupported file type: {file_extension}")
         
+        text = self.budgets.run('extraction', self._extract_text, file_content, file_extension)
+        text = truncate_text(text)
+        
         # Extract structured information
-        skills = self.skill_extractor.extract_skills(text)
-        experience_years = self.skill_extractor.extract_experience_years(text)
-        location = self.skill_extractor.extract_location(text)
-        job_role = self.skill_extractor.extract_job_role(text)
+        skills, fields = self.budgets.run('skills', self._extract_structured, text)
         
         return {
             'content': text,
             'skills': skills,
-            'experience_years': experience_years,
-            'location': location,
-            'job_role': job_role
+            'experience_years': fields['experience_years'],
+            'location': fields['location'],
+            'job_role': fields['job_role']
         }
     
     def process_job_description(self, content: str) -> Dict:
         """Process job description and extract required skills."""
-        skills = self.skill_extractor.extract_skills(content)
-        experience_required = self.skill_extractor.extract_experience_years(content)
-        location = self.skill_extractor.extract_location(content)
+        skills, fields = self.budgets.run('skills', self._extract_structured, truncate_text(content))
         
         return {
             'content': content,
             'required_skills': skills,
-            'experience_required': experience_required,
-            'location': location
-        }
\ No newline at end of file
+            'experience_required': fields['experience_years'],
+            'location': fields['location']
+        }
+    
+    def _extract_text(self, file_content: Union[bytes, str], file_extension: str) -> str:
+        """Extract text based on file type."""
+        with time_stage('text_extraction'):
+            if file_extension == 'pdf':
+                return self.text_extractor.extract_from_pdf(file_content)
+            elif file_extension == 'docx':
+                return self.text_extractor.extract_from_docx(file_content)
+            return self.text_extractor.extract_from_txt(file_content)
+    
+    def _extract_structured(self, text: str) -> Tuple[List[str], Dict]:
+        with time_stage('skill_extraction'):
+            return self.skill_extractor.extract_skills(text), self.skill_extractor.extract_fields(text)
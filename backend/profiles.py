@@ -0,0 +1,228 @@
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .metrics import CACHE_REQUESTS
+from .models import JobDescription
+
+load_dotenv()
+
+JOB_PROFILE_CACHE_SIZE = int(os.getenv("JOB_PROFILE_CACHE_SIZE", "256"))
+
+class JobProfile:
+    """Scoring inputs of one job description version, compiled once at upload."""
+
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        job_id: int,
+        version: int,
+        cleaned_text: str,
+        embedding: Optional[np.ndarray],
+        required_skills: List[str],
+        experience_required: int,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        self.job_id = job_id
+        self.version = version
+        self.cleaned_text = cleaned_text
+        self.embedding = embedding
+        self.required_skills = list(required_skills)
+        self.experience_required = experience_required or 0
+        self.weights = weights  # Per-job score weights; None means the scorer defaults
+
+        # Canonical (lowercased) skills for exact matching, plus the per-skill
+        # entries the fuzzy matcher walks: (original, lowered, length)
+        self.skill_set = frozenset(skill.lower() for skill in self.required_skills)
+        self.fuzzy_entries: List[Tuple[str, str, int]] = [
+            (skill, skill.lower(), len(skill)) for skill in self.required_skills
+        ]
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return (self.job_id, self.version)
+
+    @property
+    def job_data(self) -> Dict:
+        """The job_data dict ResumeScorer expects, built from the compiled profile."""
+        return {
+            'content': self.cleaned_text,
+            'required_skills': self.required_skills,
+            'experience_required': self.experience_required
+        }
+
+    def to_bytes(self) -> bytes:
+        """Serialize as a length-prefixed JSON header followed by raw float32 embedding bytes."""
+        embedding = None if self.embedding is None else np.asarray(self.embedding, dtype=np.float32)
+        header = json.dumps({
+            'format': self.FORMAT_VERSION,
+            'job_id': self.job_id,
+            'version': self.version,
+            'cleaned_text': self.cleaned_text,
+            'required_skills': self.required_skills,
+            'experience_required': self.experience_required,
+            'weights': self.weights,
+            'embedding_dim': 0 if embedding is None else int(embedding.shape[0])
+        }).encode('utf-8')
+        body = b"" if embedding is None else embedding.tobytes()
+        return struct.pack("<I", len(header)) + header + body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "JobProfile":
+        (header_length,) = struct.unpack_from("<I", data)
+        header = json.loads(data[4:4 + header_length].decode('utf-8'))
+        if header.get('format') != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported job profile format: {header.get('format')}")
+
+        embedding = None
+        if header['embedding_dim']:
+            embedding = np.frombuffer(data, dtype=np.float32, offset=4 + header_length, count=header['embedding_dim'])
+
+        return cls(
+            job_id=header['job_id'],
+            version=header['version'],
+            cleaned_text=header['cleaned_text'],
+            embedding=embedding,
+            required_skills=header['required_skills'],
+            experience_required=header['experience_required'],
+            weights=header.get('weights')
+        )
+
+    def with_weights(self, weights: Optional[Dict[str, float]], version: int) -> "JobProfile":
+        """Copy of this profile under new score weights, without re-embedding."""
+        return JobProfile(
+            self.job_id, version, self.cleaned_text, self.embedding,
+            self.required_skills, self.experience_required, weights
+        )
+
+class JobProfileCache:
+    """Thread-safe bounded LRU of compiled job profiles keyed by (job ID, version)."""
+
+    def __init__(self, maxsize: int = JOB_PROFILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._profiles: "OrderedDict[Tuple[int, int], JobProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, job_id: int, version: int) -> Optional[JobProfile]:
+        with self._lock:
+            profile = self._profiles.get((job_id, version))
+            if profile is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache='job_profile', result='miss')
+                return None
+            self._profiles.move_to_end((job_id, version))
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache='job_profile', result='hit')
+            return profile
+
+    def put(self, profile: JobProfile):
+        with self._lock:
+            self._profiles[profile.key] = profile
+            self._profiles.move_to_end(profile.key)
+            while len(self._profiles) > self.maxsize:
+                self._profiles.popitem(last=False)
+
+    def invalidate(self, job_id: int):
+        """Drop every cached version of a job."""
+        with self._lock:
+            for key in [key for key in self._profiles if key[0] == job_id]:
+                del self._profiles[key]
+
+    def snapshot(self) -> List[JobProfile]:
+        """The cached profiles, least recently used first, without touching their recency."""
+        with self._lock:
+            return list(self._profiles.values())
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+def _compile_arguments(job_desc: JobDescription) -> Dict:
+    return dict(
+        job_id=job_desc.id,
+        version=job_desc.version,
+        content=job_desc.content,
+        required_skills=job_desc.get_required_skills(),
+        experience_required=job_desc.experience_required,
+        weights=job_desc.get_score_weights()
+    )
+
+def compile_and_store_profile(db: Session, job_desc: JobDescription, scorer, cache: JobProfileCache) -> JobProfile:
+    """Compile a job's profile, attach it to the row and cache it. Persisted on the caller's commit."""
+    profile = scorer.compile_job_profile(**_compile_arguments(job_desc))
+    store_profile(job_desc, profile, cache)
+    return profile
+
+def store_profile(job_desc: JobDescription, profile: JobProfile, cache: JobProfileCache):
+    """Attach a profile to its row and make it the only cached version of the job."""
+    job_desc.compiled_profile = profile.to_bytes()
+    cache.invalidate(job_desc.id)
+    cache.put(profile)
+
+def _stored_job_profile(
+    db: Session, job_id: int, cache: JobProfileCache
+) -> Tuple[Optional[JobDescription], Optional[JobProfile]]:
+    """The cached or persisted profile of a job's current version as (None, profile),
+    (job_desc, None) if it has to be compiled, or (None, None) if the job doesn't exist."""
+    current = db.query(JobDescription.version, JobDescription.score_weights).filter(JobDescription.id == job_id).first()
+    if current is None:
+        return None, None
+    # A persisted rerank changes the weights but not the version
+    weights = json.loads(current.score_weights) if current.score_weights else None
+
+    profile = cache.get(job_id, current.version)
+    if profile is not None:
+        if profile.weights != weights:
+            profile = profile.with_weights(weights, current.version)
+            cache.put(profile)
+        return None, profile
+
+    job_desc = db.query(JobDescription).filter(JobDescription.id == job_id).first()
+    if job_desc.compiled_profile:
+        try:
+            profile = JobProfile.from_bytes(job_desc.compiled_profile)
+        except Exception as e:
+            print(f"Discarding unreadable profile for job {job_id}: {e}")
+            profile = None
+        if profile is not None and profile.version == job_desc.version:
+            if profile.weights != weights:
+                profile = profile.with_weights(weights, job_desc.version)
+            cache.put(profile)
+            return None, profile
+
+    return job_desc, None
+
+def load_job_profile(db: Session, job_id: int, scorer, cache: JobProfileCache) -> Optional[JobProfile]:
+    """Return the compiled profile of a job's current version, or None if the job doesn't exist.
+
+    A cache hit costs a primary-key lookup for the version and weights. On a
+    miss the persisted profile is decoded, and compiled on the spot for rows
+    that predate profile compilation.
+    """
+    job_desc, profile = _stored_job_profile(db, job_id, cache)
+    if job_desc is None:
+        return profile
+    return compile_and_store_profile(db, job_desc, scorer, cache)
+
+async def load_job_profile_async(db: Session, job_id: int, scorer, cache: JobProfileCache) -> Optional[JobProfile]:
+    """load_job_profile for the event loop: the reads and writes stay on the
+    loop with the session, and only a compile runs in the threadpool.
+
+    A profile compiled while the job was being edited is returned but not stored.
+    """
+    job_desc, profile = _stored_job_profile(db, job_id, cache)
+    if job_desc is None:
+        return profile
+    profile = await run_in_threadpool(scorer.compile_job_profile, **_compile_arguments(job_desc))
+    if db.query(JobDescription.version).filter(JobDescription.id == job_id).scalar() == profile.version:
+        store_profile(job_desc, profile, cache)
+    return profile
@@ -0,0 +1,214 @@
+import functools
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool as _run_in_threadpool
+
+from .metrics import REGISTRY
+
+load_dotenv()
+
+SLOW_REQUEST_PROFILING = os.getenv("SLOW_REQUEST_PROFILING", "True").lower() == "true"
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "0.1"))
+SLOW_REQUEST_THRESHOLD_SECONDS = float(os.getenv("SLOW_REQUEST_THRESHOLD_SECONDS", "1.0"))
+SLOW_REQUEST_SAMPLE_INTERVAL = float(os.getenv("SLOW_REQUEST_SAMPLE_INTERVAL", "0.005"))
+SLOW_REQUEST_PROFILE_DIR = os.getenv("SLOW_REQUEST_PROFILE_DIR", "./slow_request_profiles")
+SLOW_REQUEST_MAX_PROFILES = int(os.getenv("SLOW_REQUEST_MAX_PROFILES", "50"))
+SLOW_REQUEST_PATHS = [
+    prefix.strip() for prefix in
+    os.getenv("SLOW_REQUEST_PATHS", "/api/v1/evaluate,/api/v1/resume/upload,/api/v1/jd/upload").split(",")
+    if prefix.strip()
+]
+
+PROFILE_NAME_PATTERN = re.compile(r'^[\w.-]+\.folded$')
+
+SLOW_REQUEST_PROFILES = REGISTRY.counter(
+    "slow_request_profiles_total", "Sampled requests that exceeded the latency threshold and were saved.", ("route",)
+)
+
+class StackSampler:
+    """Statistical profiler: periodically records the stacks of one request's threads.
+
+    Sampling threads (rather than tracing one, as cProfile does) also catches
+    work the request hands to the threadpool and the stage worker pool. Only
+    the request's own work is kept, so concurrent requests don't show up in
+    each other's profiles: the event loop thread while it is running the
+    request (its ``request_frame`` is on the stack), and threads running
+    functions wrapped by ``attributed``. Output is in the folded-stack format
+    read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = SLOW_REQUEST_SAMPLE_INTERVAL, request_frame=None):
+        self.interval = interval
+        self.request_frame = request_frame
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._threads: Counter = Counter()  # Ident -> nesting depth of attributed calls
+        self._threads_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def attributed(self, fn: Callable) -> Callable:
+        """Wrap fn so the stacks of whichever thread runs it count toward this request."""
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            ident = threading.get_ident()
+            with self._threads_lock:
+                self._threads[ident] += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._threads_lock:
+                    self._threads[ident] -= 1
+                    if not self._threads[ident]:
+                        del self._threads[ident]
+        return call
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            with self._threads_lock:
+                attributed = set(self._threads)
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                frames = []
+                ours = ident in attributed
+                while frame is not None:
+                    ours = ours or frame is self.request_frame
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if ours:
+                    frames.append(thread_names.get(ident, str(ident)))
+                    self.stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+# The sampler profiling the current request, set by SlowRequestMiddleware;
+# run_in_threadpool and StageBudgets carry it to the threads doing the work
+request_sampler: ContextVar[Optional[StackSampler]] = ContextVar("request_sampler", default=None)
+
+def attributed(fn: Callable) -> Callable:
+    """fn wrapped for the request being profiled in this context, or fn itself."""
+    sampler = request_sampler.get()
+    return fn if sampler is None else sampler.attributed(fn)
+
+async def run_in_threadpool(fn: Callable, *args, **kwargs):
+    """starlette's run_in_threadpool, with the thread's stacks counted in the request's profile."""
+    return await _run_in_threadpool(attributed(fn), *args, **kwargs)
+
+class SlowRequestProfiler:
+    """Profiles a random fraction of matching requests and keeps the slow ones.
+
+    The latency of a request isn't known until it finishes, so sampled
+    requests are profiled from the start and the profile is discarded unless
+    the request overran the threshold. At most ``max_concurrent`` requests are
+    profiled at once, and only the newest ``max_profiles`` files are kept.
+    """
+
+    def __init__(
+        self,
+        directory: str = SLOW_REQUEST_PROFILE_DIR,
+        enabled: bool = SLOW_REQUEST_PROFILING,
+        sample_rate: float = SLOW_REQUEST_SAMPLE_RATE,
+        threshold_seconds: float = SLOW_REQUEST_THRESHOLD_SECONDS,
+        interval: float = SLOW_REQUEST_SAMPLE_INTERVAL,
+        max_profiles: int = SLOW_REQUEST_MAX_PROFILES,
+        path_prefixes: Optional[List[str]] = None,
+        max_concurrent: int = 2
+    ):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.threshold_seconds = threshold_seconds
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.path_prefixes = tuple(SLOW_REQUEST_PATHS if path_prefixes is None else path_prefixes)
+        self.max_concurrent = max_concurrent
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def start(self, path: str, request_frame=None) -> Optional[StackSampler]:
+        """Start profiling this request if it is sampled; returns the sampler or None.
+
+        request_frame is a frame that is on the event loop's stack exactly
+        while the request is running there (the middleware's own).
+        """
+        if not self.enabled or not path.startswith(self.path_prefixes) or random.random() >= self.sample_rate:
+            return None
+        with self._lock:
+            if self._active >= self.max_concurrent:
+                return None
+            self._active += 1
+        sampler = StackSampler(self.interval, request_frame)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: StackSampler, method: str, route: str, duration: float) -> Optional[str]:
+        """Stop a sampler and save its profile if the request was slow. Returns the file name if saved."""
+        sampler.stop()
+        with self._lock:
+            self._active -= 1
+        if duration < self.threshold_seconds or not sampler.stacks:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        route_slug = re.sub(r'[^\w]+', '_', route).strip('_') or 'root'
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}_{int(time.time() * 1000) % 1000:03d}_{method}_{route_slug}_{int(duration * 1000)}ms.folded"
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(sampler.folded())
+        SLOW_REQUEST_PROFILES.inc(route=route)
+        self._prune()
+        return name
+
+    def _prune(self):
+        profiles = sorted(self.list_profiles(), key=lambda profile: profile['created_at'])
+        for profile in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            try:
+                os.remove(os.path.join(self.directory, profile['name']))
+            except FileNotFoundError:
+                pass
+
+    def list_profiles(self) -> List[Dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if not PROFILE_NAME_PATTERN.match(name):
+                continue
+            path = os.path.join(self.directory, name)
+            parts = name[:-len(".folded")].split("_")
+            profiles.append({
+                'name': name,
+                'method': parts[2] if len(parts) > 3 else None,
+                'route': "_".join(parts[3:-1]) or None,
+                'duration_ms': int(parts[-1][:-2]) if parts[-1].endswith("ms") and parts[-1][:-2].isdigit() else None,
+                'size_bytes': os.path.getsize(path),
+                'created_at': os.path.getmtime(path)
+            })
+        return sorted(profiles, key=lambda profile: profile['created_at'], reverse=True)
+
+    def profile_path(self, name: str) -> Optional[str]:
+        """Path of a stored profile, or None if the name is invalid or missing."""
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
@@ -0,0 +1,163 @@
+import asyncio
+import heapq
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from .admission import AdmissionController, AdmissionRejected
+from .evaluations import upsert_evaluation
+from .models import JobDescription, Resume
+from .profiles import JobProfileCache, load_job_profile
+from .search import location_condition
+
+# The first batch is small so the first candidates arrive quickly
+FIRST_BATCH_SIZE = 8
+
+def sse_event(event: str, data: Dict) -> str:
+    """One Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _candidate(resume_id: int, filename: str, result: Dict) -> Dict:
+    return {
+        'resume_id': resume_id,
+        'filename': filename,
+        'overall_score': result['overall_score'],
+        'verdict': result['verdict'],
+        'skills_match_score': result['skills_match_score'],
+        'semantic_similarity_score': result['semantic_similarity_score'],
+        'experience_score': result['experience_score']
+    }
+
+async def ranking_events(
+    job_id: int,
+    scorer,
+    profile_cache: JobProfileCache,
+    session_factory,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    admission: Optional[AdmissionController] = None,
+    batch_size: int = 32,
+    top_k: int = 10,
+    top_interval: float = 1.0,
+    location: Optional[str] = None,
+    persist: bool = False
+) -> AsyncIterator[str]:
+    """Score a job's candidate pool batch by batch, yielding SSE messages as results arrive.
+
+    Events: ``start`` (pool size), ``candidates`` (each scored batch), ``top``
+    (the current top-k, at most every top_interval seconds and at the end),
+    ``done`` and ``error``. Batches are scored in the thread pool, each under a
+    heavy admission slot, so a long ranking shares capacity with uploads and
+    evaluations instead of holding it. The run stops before the next batch once
+    the client disconnects. With ``persist`` each batch's evaluations are saved,
+    except for resumes or jobs edited while the batch was being scored.
+    """
+    started = time.perf_counter()
+    db = session_factory()
+    try:
+        job_profile = load_job_profile(db, job_id, scorer, profile_cache)
+        if job_profile is None:
+            yield sse_event('error', {'detail': 'Job description not found'})
+            return
+
+        query = db.query(Resume.id)
+        if location:
+            query = query.filter(location_condition(db, location, Resume.id))
+        resume_ids = [row.id for row in query.order_by(Resume.id).all()]
+        total = len(resume_ids)
+        yield sse_event('start', {'job_id': job_id, 'total_candidates': total})
+
+        top: List[Tuple[float, int, Dict]] = []
+        scored = 0
+        last_top = started
+        offset = 0
+        while offset < total:
+            if await is_disconnected():
+                return
+            size = FIRST_BATCH_SIZE if offset == 0 else batch_size
+            batch_ids = resume_ids[offset:offset + size]
+            offset += len(batch_ids)
+
+            resumes = (
+                db.query(Resume.id, Resume.filename, Resume.content, Resume.extracted_skills,
+                         Resume.experience_years, Resume.version)
+                .filter(Resume.id.in_(batch_ids))
+                .order_by(Resume.id)
+                .all()
+            )
+            db.rollback()  # Don't keep a transaction open on the shared connection while scoring
+            resumes_data = [
+                {
+                    'content': resume.content,
+                    'skills': json.loads(resume.extracted_skills) if resume.extracted_skills else [],
+                    'experience_years': resume.experience_years
+                }
+                for resume in resumes
+            ]
+
+            while True:
+                try:
+                    if admission is None:
+                        results = await run_in_threadpool(
+                            scorer.score_resumes, resumes_data, job_profile.job_data,
+                            job_profile.weights, job_profile
+                        )
+                    else:
+                        async with admission.slot("heavy"):
+                            results = await run_in_threadpool(
+                                scorer.score_resumes, resumes_data, job_profile.job_data,
+                                job_profile.weights, job_profile
+                            )
+                    break
+                except AdmissionRejected as e:
+                    # Busy: back off like any other client would, unless it has gone away
+                    if await is_disconnected():
+                        return
+                    await asyncio.sleep(e.retry_after)
+
+            if persist:
+                job_version = db.query(JobDescription.version).filter(JobDescription.id == job_id).scalar()
+                if job_version == job_profile.version:
+                    current_versions = dict(
+                        db.query(Resume.id, Resume.version).filter(Resume.id.in_(batch_ids)).all()
+                    )
+                    for resume, result in zip(resumes, results):
+                        if current_versions.get(resume.id) == resume.version:
+                            upsert_evaluation(db, resume.id, job_id, result)
+                    db.commit()
+                else:
+                    # The job changed mid-run: rank the rest against its new version
+                    db.rollback()
+                    job_profile = load_job_profile(db, job_id, scorer, profile_cache)
+                    if job_profile is None:
+                        yield sse_event('error', {'detail': 'Job description was deleted'})
+                        return
+
+            candidates = [_candidate(resume.id, resume.filename, result) for resume, result in zip(resumes, results)]
+            for candidate in candidates:
+                entry = (candidate['overall_score'], -candidate['resume_id'], candidate)
+                if len(top) < top_k:
+                    heapq.heappush(top, entry)
+                elif entry[:2] > top[0][:2]:
+                    heapq.heapreplace(top, entry)
+            scored += len(candidates)
+            yield sse_event('candidates', {'scored': scored, 'total': total, 'candidates': candidates})
+
+            now = time.perf_counter()
+            if now - last_top >= top_interval or offset >= total:
+                last_top = now
+                ranked = [entry[2] for entry in sorted(top, key=lambda entry: entry[:2], reverse=True)]
+                yield sse_event('top', {'scored': scored, 'total': total, 'top': ranked})
+
+        yield sse_event('done', {
+            'scored': scored,
+            'total': total,
+            'persisted': persist,
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        })
+    except Exception as e:
+        db.rollback()
+        yield sse_event('error', {'detail': f"Error ranking candidates: {str(e)}"})
+    finally:
+        db.close()
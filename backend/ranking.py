@@ -0,0 +1,250 @@
+import json
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .models import Evaluation, JobDescription, Resume
+from .profiles import JobProfileCache, load_job_profile, store_profile
+from .scoring import ResumeScorer, VERDICT_LABELS, normalize_weights
+from .skill_bits import (
+    NEIGHBOUR_MASKS, SKILL_VOCABULARY, expand, match_resumes, popcount, skill_ids, skills_scores, stack_words, to_words
+)
+from .versions import touch
+
+def rerank_job(
+    db: Session,
+    scorer: ResumeScorer,
+    profile_cache: JobProfileCache,
+    job_id: int,
+    weights: Dict[str, float],
+    persist: bool = False,
+    limit: int = 100
+) -> Optional[Dict]:
+    """Re-rank a job's evaluated candidates under new weights from their stored component scores.
+    
+    No text is re-embedded: the overall scores and verdicts of every evaluation
+    of the job are recomputed in one vectorised pass. The weights are scaled to
+    sum to 1 and returned as applied. With ``persist`` they become the job's
+    weight profile (used by later evaluations, without bumping the job's
+    version) and the stored overall scores and verdicts are updated, along
+    with the suggestions of evaluations whose verdict changed. Returns None if
+    the job doesn't exist.
+    """
+    weights = normalize_weights(weights)
+    
+    if db.query(JobDescription.id).filter(JobDescription.id == job_id).scalar() is None:
+        return None
+    
+    rows = db.query(
+        Evaluation.id,
+        Evaluation.resume_id,
+        Evaluation.skills_match_score,
+        Evaluation.semantic_similarity_score,
+        Evaluation.experience_score,
+        Evaluation.verdict
+    ).filter(Evaluation.job_description_id == job_id).all()
+    
+    components = np.array([row[2:5] for row in rows], dtype=np.float64).reshape(-1, 3)
+    scored = scorer.score_many(components[:, 0], components[:, 1], components[:, 2], weights)
+    overall_scores = np.round(scored['overall_score'], 2)
+    
+    # Highest first; stable so ties keep evaluation order
+    order = np.argsort(-overall_scores, kind='stable')
+    verdict_counts = np.bincount(scored['verdict'], minlength=len(VERDICT_LABELS))
+    
+    if persist:
+        job_desc = db.query(JobDescription).filter(JobDescription.id == job_id).first()
+        job_profile = load_job_profile(db, job_id, scorer, profile_cache)
+        
+        # Weights are versioned by score_weights itself; the job's version
+        # tracks its content, so in-flight scoring of it stays valid
+        job_desc.score_weights = json.dumps(weights)
+        store_profile(job_desc, job_profile.with_weights(weights, job_desc.version), profile_cache)
+        
+        mappings = [
+            {
+                'id': rows[i].id,
+                'overall_score': float(overall_scores[i]),
+                'verdict': VERDICT_LABELS[scored['verdict'][i]]
+            }
+            for i in range(len(rows))
+        ]
+        # The score-dependent suggestions change exactly when the verdict does
+        changed = [i for i, mapping in enumerate(mappings) if mapping['verdict'] != rows[i].verdict]
+        if changed:
+            details = {
+                row.id: row for row in db.query(
+                    Evaluation.id, Evaluation.matched_skills, Evaluation.missing_skills, Resume.experience_years
+                ).outerjoin(Resume, Resume.id == Evaluation.resume_id)
+                .filter(Evaluation.id.in_([rows[i].id for i in changed])).all()
+            }
+            for i in changed:
+                detail = details[rows[i].id]
+                mappings[i]['suggestions'] = scorer.generate_suggestions(
+                    json.loads(detail.missing_skills or "[]"),
+                    json.loads(detail.matched_skills or "[]"),
+                    float(scored['overall_score'][i]),
+                    max(0, (job_desc.experience_required or 0) - (detail.experience_years or 0))
+                )
+        db.bulk_update_mappings(Evaluation, mappings)
+        touch(db, Evaluation.__tablename__)
+        db.commit()
+    
+    candidates = []
+    for i in order[:limit]:
+        row = rows[i]
+        candidates.append({
+            'evaluation_id': row.id,
+            'resume_id': row.resume_id,
+            'overall_score': float(overall_scores[i]),
+            'verdict': VERDICT_LABELS[scored['verdict'][i]],
+            'skills_match_score': row.skills_match_score,
+            'semantic_similarity_score': row.semantic_similarity_score,
+            'experience_score': row.experience_score
+        })
+    
+    return {
+        'job_id': job_id,
+        'weights': weights,
+        'persisted': persist,
+        'total_candidates': len(rows),
+        'verdict_counts': {label: int(count) for label, count in zip(VERDICT_LABELS, verdict_counts)},
+        'candidates': candidates
+    }
+
+def _vocabulary_names(words: np.ndarray) -> List[str]:
+    return [SKILL_VOCABULARY[skill_id] for skill_id in skill_ids(words)]
+
+def match_jobs_for_resume(
+    db: Session,
+    scorer: ResumeScorer,
+    resume_id: int,
+    limit: int = 20,
+    active_only: bool = True
+) -> Optional[Dict]:
+    """Rank jobs by skills match score for one resume with one AND/popcount pass over all job bitsets.
+    
+    Jobs (or a resume) with skills outside the bitset vocabulary, or without a
+    bitset yet, are scored by the string matcher instead. Returns None if the
+    resume doesn't exist.
+    """
+    resume = db.query(Resume.extracted_skills, Resume.skill_bits, Resume.unindexed_skills).filter(Resume.id == resume_id).first()
+    if resume is None:
+        return None
+    
+    query = db.query(
+        JobDescription.id, JobDescription.title, JobDescription.company,
+        JobDescription.skill_bits, JobDescription.unindexed_skills
+    )
+    if active_only:
+        query = query.filter(JobDescription.is_active == True)
+    jobs = query.order_by(JobDescription.id).all()
+    
+    expanded = expand(to_words(resume.skill_bits))
+    job_matrix = stack_words([job.skill_bits for job in jobs])
+    matched = popcount(job_matrix & expanded)
+    required = popcount(job_matrix)
+    scores = skills_scores(matched, required)
+    
+    resume_exact = resume.skill_bits is not None and resume.unindexed_skills is None
+    refine = [i for i, job in enumerate(jobs) if not resume_exact or job.skill_bits is None or job.unindexed_skills is not None]
+    details = {}
+    if refine:
+        resume_skills = json.loads(resume.extracted_skills or "[]")
+        required_skills = dict(
+            db.query(JobDescription.id, JobDescription.required_skills)
+            .filter(JobDescription.id.in_([jobs[i].id for i in refine])).all()
+        )
+        for i in refine:
+            skills = json.loads(required_skills[jobs[i].id] or "[]")
+            scores[i], matched_skills, missing_skills = scorer.calculate_skills_match_score(resume_skills, skills)
+            if not skills:
+                # The scorer reports every resume skill as matched when nothing is required
+                matched_skills = []
+            matched[i], required[i] = len(matched_skills), len(skills)
+            details[i] = (matched_skills, missing_skills)
+    
+    results = []
+    for i in np.argsort(-scores, kind='stable')[:limit]:
+        matched_skills, missing_skills = details.get(i) or (
+            _vocabulary_names(job_matrix[i] & expanded), _vocabulary_names(job_matrix[i] & ~expanded)
+        )
+        results.append({
+            'job_id': jobs[i].id,
+            'title': jobs[i].title,
+            'company': jobs[i].company,
+            'skills_match_score': round(float(scores[i]), 2),
+            'matched_count': int(matched[i]),
+            'required_count': int(required[i]),
+            'matched_skills': matched_skills,
+            'missing_skills': missing_skills
+        })
+    
+    return {'resume_id': resume_id, 'jobs_considered': len(jobs), 'jobs': results}
+
+def match_resumes_for_job(
+    db: Session,
+    scorer: ResumeScorer,
+    job_id: int,
+    limit: int = 50
+) -> Optional[Dict]:
+    """Rank every resume by skills match score for one job, vectorised over the resume bitsets.
+    
+    The string matcher scores resumes with unindexed skills or no bitset (all
+    of them if the job has unindexed skills). Returns None if the job doesn't
+    exist.
+    """
+    job = db.query(JobDescription.required_skills, JobDescription.skill_bits, JobDescription.unindexed_skills).filter(JobDescription.id == job_id).first()
+    if job is None:
+        return None
+    
+    resumes = db.query(
+        Resume.id, Resume.filename, Resume.location, Resume.skill_bits, Resume.unindexed_skills
+    ).order_by(Resume.id).all()
+    
+    job_words = to_words(job.skill_bits)
+    resume_matrix = stack_words([resume.skill_bits for resume in resumes])
+    matched = match_resumes(job_words, resume_matrix)
+    required = np.full(len(resumes), int(popcount(job_words)))
+    scores = skills_scores(matched, required)
+    
+    job_exact = job.skill_bits is not None and job.unindexed_skills is None
+    refine = [i for i, resume in enumerate(resumes) if not job_exact or resume.skill_bits is None or resume.unindexed_skills is not None]
+    details = {}
+    if refine:
+        required_skills = json.loads(job.required_skills or "[]")
+        resume_skills = dict(
+            db.query(Resume.id, Resume.extracted_skills)
+            .filter(Resume.id.in_([resumes[i].id for i in refine])).all()
+        )
+        for i in refine:
+            scores[i], matched_skills, missing_skills = scorer.calculate_skills_match_score(
+                json.loads(resume_skills[resumes[i].id] or "[]"), required_skills
+            )
+            if not required_skills:
+                # The scorer reports every resume skill as matched when nothing is required
+                matched_skills = []
+            matched[i], required[i] = len(matched_skills), len(required_skills)
+            details[i] = (matched_skills, missing_skills)
+    
+    job_skill_ids = skill_ids(job_words)
+    results = []
+    for i in np.argsort(-scores, kind='stable')[:limit]:
+        if i in details:
+            matched_skills, missing_skills = details[i]
+        else:
+            hits = [bool((resume_matrix[i] & NEIGHBOUR_MASKS[skill_id]).any()) for skill_id in job_skill_ids]
+            matched_skills = [SKILL_VOCABULARY[skill_id] for skill_id, hit in zip(job_skill_ids, hits) if hit]
+            missing_skills = [SKILL_VOCABULARY[skill_id] for skill_id, hit in zip(job_skill_ids, hits) if not hit]
+        results.append({
+            'resume_id': resumes[i].id,
+            'filename': resumes[i].filename,
+            'location': resumes[i].location,
+            'skills_match_score': round(float(scores[i]), 2),
+            'matched_count': int(matched[i]),
+            'required_count': int(required[i]),
+            'matched_skills': matched_skills,
+            'missing_skills': missing_skills
+        })
+    
+    return {'job_id': job_id, 'resumes_considered': len(resumes), 'resumes': results}
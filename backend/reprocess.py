@@ -0,0 +1,190 @@
+"""Re-run ContentProcessor over every stored resume original.
+
+Usage (from the project root):
+    python -m backend.reprocess [--workers N] [--batch-size N] [--restart]
+
+Originals are read from the BlobStore, parsed in a process pool and written
+back with one bulk UPDATE per batch; evaluations of re-parsed resumes are
+marked stale for the background re-scorer, and their embeddings are replaced in
+the embedding store in the same batch. Progress is checkpointed after every
+batch, so an interrupted run resumes where it stopped; the checkpoint is
+removed once a pass completes.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .db import SessionLocal, create_tables
+from .embedding_store import EmbeddingStore, EMBEDDING_STORE_ENABLED
+from .evaluations import mark_evaluations_stale
+from .models import Resume
+from .parsers import ContentProcessor
+from .skill_bits import skill_columns
+from .storage import BlobStore
+from .versions import touch
+
+DEFAULT_CHECKPOINT = os.getenv("REPROCESS_CHECKPOINT", "./reprocess_checkpoint.json")
+
+# Per-process state, populated by _init_worker in each pool process
+_processor: Optional[ContentProcessor] = None
+_blob_store: Optional[BlobStore] = None
+
+def _init_worker(blob_root: str):
+    global _processor, _blob_store
+    _processor = ContentProcessor()
+    _blob_store = BlobStore(blob_root)
+
+def _process_one(job: Tuple[int, str, str]) -> Tuple[int, Optional[Dict], Optional[str]]:
+    """Parse one stored original. Returns (resume_id, processed_data, error)."""
+    resume_id, file_hash, filename = job
+    try:
+        file_content = _blob_store.get(file_hash)
+        return resume_id, _processor.process_resume(file_content, filename), None
+    except Exception as e:
+        return resume_id, None, str(e)
+
+def load_checkpoint(path: str) -> Dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"last_resume_id": 0, "processed": 0, "failed": 0}
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    """Write the checkpoint atomically so a crash never leaves it truncated."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def _to_update(resume_id: int, processed: Dict, current: Dict) -> Dict:
+    """Build the bulk-update mapping for one resume.
+
+    Location and job role may have been supplied by the uploader, so they are
+    only overwritten when the stored value is empty.
+    """
+    skills_json = json.dumps(processed["skills"])
+    skill_bits, unindexed_skills = skill_columns(skills_json)
+    row = {
+        "id": resume_id,
+        "content": processed["content"],
+        "extracted_skills": skills_json,
+        "skill_bits": skill_bits,
+        "unindexed_skills": unindexed_skills,
+        "experience_years": processed["experience_years"],
+    }
+    if not current["location"]:
+        row["location"] = processed["location"]
+    if not current["job_role"] or current["job_role"] == "Not Specified":
+        row["job_role"] = processed["job_role"]
+    return row
+
+def reprocess_corpus(
+    workers: Optional[int] = None,
+    batch_size: int = 500,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    restart: bool = False,
+    blob_store: Optional[BlobStore] = None,
+    embedding_store: Optional[EmbeddingStore] = None,
+    scorer=None,
+) -> Dict:
+    """Re-parse all resumes that have a stored original. Returns the final checkpoint.
+
+    With an embedding_store (and the scorer to embed with), the re-parsed
+    resumes' embeddings are rewritten before each batch commits.
+    """
+    blob_store = blob_store or BlobStore()
+    checkpoint = {"last_resume_id": 0, "processed": 0, "failed": 0} if restart else load_checkpoint(checkpoint_path)
+    workers = workers or os.cpu_count() or 1
+    started = time.time()
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(blob_store.root,),
+        ) as pool:
+            while True:
+                rows = (
+                    db.query(Resume.id, Resume.file_hash, Resume.filename, Resume.location, Resume.job_role)
+                    .filter(Resume.id > checkpoint["last_resume_id"], Resume.file_hash.isnot(None))
+                    .order_by(Resume.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not rows:
+                    break
+
+                current = {row.id: {"location": row.location, "job_role": row.job_role} for row in rows}
+                jobs = [(row.id, row.file_hash, row.filename) for row in rows]
+                chunksize = max(1, len(jobs) // (workers * 4))
+
+                updates: List[Dict] = []
+                for resume_id, processed, error in pool.map(_process_one, jobs, chunksize=chunksize):
+                    if error is not None:
+                        checkpoint["failed"] += 1
+                        print(f"Resume {resume_id}: {error}")
+                        continue
+                    updates.append(_to_update(resume_id, processed, current[resume_id]))
+
+                db.bulk_update_mappings(Resume, updates)
+                touch(db, Resume.__tablename__)
+                updated_ids = [row["id"] for row in updates]
+                if updated_ids:
+                    db.query(Resume).filter(Resume.id.in_(updated_ids)).update(
+                        {Resume.version: Resume.version + 1}, synchronize_session=False
+                    )
+                    mark_evaluations_stale(db, resume_ids=updated_ids)
+                if embedding_store is not None and updates:
+                    # The text changed, so the stored vectors no longer match it
+                    embedding_store.add_many(
+                        updated_ids, scorer.embed_resumes([row["content"] for row in updates])
+                    )
+                db.commit()
+
+                checkpoint["processed"] += len(updates)
+                checkpoint["last_resume_id"] = rows[-1].id
+                save_checkpoint(checkpoint_path, checkpoint)
+
+                elapsed = time.time() - started
+                print(f"Reprocessed up to resume {checkpoint['last_resume_id']} "
+                      f"({checkpoint['processed']} ok, {checkpoint['failed']} failed, {elapsed:.1f}s)")
+    finally:
+        db.close()
+
+    # A finished pass needs no resume point; the next run starts from scratch
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return checkpoint
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse stored resume originals with the current extractors.")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Resumes per batch/checkpoint")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file path")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+
+    embedding_store, scorer = None, None
+    if EMBEDDING_STORE_ENABLED:
+        from .scoring import ResumeScorer
+        embedding_store, scorer = EmbeddingStore(), ResumeScorer()
+
+    checkpoint = reprocess_corpus(
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+        embedding_store=embedding_store,
+        scorer=scorer,
+    )
+    print(f"Done: {checkpoint['processed']} reprocessed, {checkpoint['failed']} failed.")
+
+if __name__ == "__main__":
+    main()
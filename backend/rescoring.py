@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import socket
+from typing import Callable, Optional
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from .db import SessionLocal
+from .evaluations import upsert_evaluation
+from .models import Evaluation, JobDescription, Resume
+from .profiles import JobProfileCache, load_job_profile_async
+from .scoring import ResumeScorer
+from .tasks import acquire_lease, release_lease
+
+load_dotenv()
+
+RESCORE_ENABLED = os.getenv("RESCORE_ENABLED", "True").lower() == "true"
+RESCORE_INTERVAL_SECONDS = float(os.getenv("RESCORE_INTERVAL_SECONDS", "30"))
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "64"))
+RESCORE_LEASE_SECONDS = float(os.getenv("RESCORE_LEASE_SECONDS", "120"))
+
+RESCORE_LEASE = "rescoring"
+
+class RescoringScheduler:
+    """Background re-scoring of stale evaluations.
+
+    Each pass picks the highest-priority job that has stale evaluations (active
+    jobs first), re-scores up to ``batch_size`` of its stale pairs with one
+    batched model call, and writes them back. The loop sleeps only when there
+    is nothing left to do.
+
+    Every API process starts a scheduler, but only the one holding the
+    "rescoring" lease runs passes; the others check back every interval and
+    take over once the holder stops renewing it (after lease_seconds).
+    """
+
+    def __init__(
+        self,
+        scorer: ResumeScorer,
+        profile_cache: JobProfileCache,
+        session_factory: Callable = SessionLocal,
+        interval_seconds: float = RESCORE_INTERVAL_SECONDS,
+        batch_size: int = RESCORE_BATCH_SIZE,
+        lease_seconds: float = RESCORE_LEASE_SECONDS
+    ):
+        self.scorer = scorer
+        self.profile_cache = profile_cache
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Re-score one batch of stale evaluations. Returns how many were refreshed.
+
+        The reads and writes run on the event loop, like the request handlers
+        sharing the connection; only the model calls go to the threadpool.
+        """
+        db = self.session_factory()
+        try:
+            next_job_id = (
+                db.query(JobDescription.id)
+                .join(Evaluation, Evaluation.job_description_id == JobDescription.id)
+                .filter(Evaluation.is_stale == True)
+                .order_by(JobDescription.is_active.desc(), JobDescription.id)
+                .limit(1)
+                .scalar()
+            )
+            if next_job_id is None:
+                return 0
+
+            stale = (
+                db.query(Resume)
+                .join(Evaluation, Evaluation.resume_id == Resume.id)
+                .filter(Evaluation.job_description_id == next_job_id, Evaluation.is_stale == True)
+                .order_by(Evaluation.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            resume_versions = {resume.id: resume.version for resume in stale}
+            resumes_data = [
+                {
+                    'content': resume.content,
+                    'skills': resume.get_skills(),
+                    'experience_years': resume.experience_years
+                }
+                for resume in stale
+            ]
+            job_profile = await load_job_profile_async(db, next_job_id, self.scorer, self.profile_cache)
+            job_version = job_profile.version
+            # Persist a profile compiled on the spot, and hold no transaction while scoring
+            db.commit()
+
+            score_results = await run_in_threadpool(
+                self.scorer.score_resumes,
+                resumes_data, job_profile.job_data, custom_weights=job_profile.weights, job_profile=job_profile
+            )
+
+            # Inputs edited while we were scoring stay stale for the next pass
+            current = (
+                db.query(JobDescription.version, JobDescription.score_weights)
+                .filter(JobDescription.id == next_job_id)
+                .first()
+            )
+            if current is None or current.version != job_version:
+                db.rollback()
+                return 0
+            weights = json.loads(current.score_weights) if current.score_weights else None
+            if weights != job_profile.weights:
+                # Re-weighted by a persisted rerank; the component scores still hold
+                score_results = [
+                    self.scorer.apply_weights(
+                        result, weights, max(0, job_profile.experience_required - (data['experience_years'] or 0))
+                    )
+                    for result, data in zip(score_results, resumes_data)
+                ]
+            current_versions = dict(
+                db.query(Resume.id, Resume.version).filter(Resume.id.in_(list(resume_versions))).all()
+            )
+
+            refreshed = 0
+            for resume_id, score_result in zip(resume_versions, score_results):
+                if current_versions.get(resume_id) != resume_versions[resume_id]:
+                    continue
+                upsert_evaluation(db, resume_id, next_job_id, score_result)
+                refreshed += 1
+
+            db.commit()
+            return refreshed
+        finally:
+            db.close()
+
+    def _hold_lease(self) -> bool:
+        db = self.session_factory()
+        try:
+            return acquire_lease(db, RESCORE_LEASE, self.owner, self.lease_seconds)
+        finally:
+            db.close()
+
+    def _release_lease(self):
+        db = self.session_factory()
+        try:
+            release_lease(db, RESCORE_LEASE, self.owner)
+        finally:
+            db.close()
+
+    async def run(self):
+        while True:
+            try:
+                refreshed = await self.run_once() if self._hold_lease() else 0
+            except Exception as e:
+                print(f"Error re-scoring stale evaluations: {e}")
+                refreshed = 0
+            if refreshed == 0:
+                await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                self._release_lease()
+            except Exception as e:
+                print(f"Error releasing the re-scoring lease: {e}")
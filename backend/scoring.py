@@ -1,22 +1,73 @@
 import numpy as np
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sentence_transformers import SentenceTransformer
 from Levenshtein import ratio as levenshtein_ratio
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import json
+import logging
 import re
 
+from .budgets import StageBudgets, StageTimeout, truncate_text
+from .metrics import MODEL_BATCH_SIZE, SEMANTIC_FALLBACKS, time_stage
+from .profiles import JobProfile
+from .skill_bits import FUZZY_MATCH_THRESHOLD
+from .model_server import EMBEDDING_MODEL_NAME, EMBEDDING_SERVER_FALLBACK, EMBEDDING_SERVER_SOCKET, RemoteEmbeddingModel
+
+DEFAULT_WEIGHTS = {
+    'skills': 0.5,      # 50% weight for skills matching
+    'semantic': 0.3,    # 30% weight for semantic similarity
+    'experience': 0.2   # 20% weight for experience
+}
+
+# Verdict codes used by the vectorised API; VERDICT_LABELS[code] is the label
+VERDICT_LOW, VERDICT_MEDIUM, VERDICT_HIGH = 0, 1, 2
+VERDICT_LABELS = ("Low", "Medium", "High")
+
+def normalize_weights(weights: Dict[str, float]) -> Dict[str, float]:
+    """Validate score weights and scale them to sum to 1."""
+    missing = [key for key in DEFAULT_WEIGHTS if key not in weights]
+    if missing:
+        raise ValueError(f"Missing weights: {', '.join(missing)}")
+    if any(weights[key] < 0 for key in DEFAULT_WEIGHTS):
+        raise ValueError("Weights must be non-negative")
+    total = sum(weights[key] for key in DEFAULT_WEIGHTS)
+    if total <= 0:
+        raise ValueError("At least one weight must be positive")
+    return {key: weights[key] / total for key in DEFAULT_WEIGHTS}
+
+# Which similarity method produced an evaluation's semantic score
+SCORING_PATH_SEMANTIC = "semantic"
+SCORING_PATH_TFIDF = "tfidf"
+
+logger = logging.getLogger(__name__)
+
+SCORE_DTYPE = np.dtype([('overall_score', np.float64), ('verdict', np.int8)])
+
 class ResumeScorer:
     """Advanced resume scoring system with hybrid matching."""
     
-    def __init__(self):
-        # Load sentence transformer model for semantic similarity
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, budgets: Optional[StageBudgets] = None, sentence_model=None):
+        # Load sentence transformer model for semantic similarity; any object
+        # with a compatible encode() (e.g. an offline stub) can be passed in.
+        # With a model server configured, the model is only loaded here if the
+        # server is not running and EMBEDDING_SERVER_FALLBACK is on.
+        if sentence_model is None and EMBEDDING_SERVER_SOCKET:
+            sentence_model = RemoteEmbeddingModel(
+                EMBEDDING_SERVER_SOCKET,
+                fallback=(lambda: SentenceTransformer(EMBEDDING_MODEL_NAME)) if EMBEDDING_SERVER_FALLBACK else None
+            )
+        self.sentence_model = sentence_model or SentenceTransformer(EMBEDDING_MODEL_NAME)
         self.tfidf_vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2))
+        self.budgets = budgets or StageBudgets()
     
     def calculate_skills_match_score(self, resume_skills: List[str], required_skills: List[str]) -> Tuple[float, List[str], List[str]]:
         """Calculate skills matching score using hard matching and fuzzy matching."""
+        with time_stage('fuzzy_matching'):
+            return self._skills_match(resume_skills, required_skills)
+    
+    def _skills_match(self, resume_skills: List[str], required_skills: List[str]) -> Tuple[float, List[str], List[str]]:
         if not required_skills:
             return 100.0, resume_skills, []
         
@@ -42,7 +93,7 @@ class ResumeScorer:
                 
                 for res_skill in resume_skills:
                     ratio = levenshtein_ratio(req_skill.lower(), res_skill.lower())
-                    if ratio > best_ratio and ratio >= 0.8:  # 80% similarity threshold
+                    if ratio > best_ratio and ratio >= FUZZY_MATCH_THRESHOLD:
                         best_ratio = ratio
                         best_match = req_skill
                 
@@ -56,6 +107,69 @@ class ResumeScorer:
         
         return score, matched_skills, missing_skills
     
+    def calculate_profile_skills_match(self, resume_skills: List[str], job_profile: JobProfile) -> Tuple[float, List[str], List[str]]:
+        """Same result as calculate_skills_match_score, using a job's precompiled skill index."""
+        with time_stage('fuzzy_matching'):
+            return self._profile_skills_match(resume_skills, job_profile)
+    
+    def _profile_skills_match(self, resume_skills: List[str], job_profile: JobProfile) -> Tuple[float, List[str], List[str]]:
+        if not job_profile.required_skills:
+            return 100.0, resume_skills, []
+        
+        resume_entries = [(skill.lower(), len(skill)) for skill in resume_skills]
+        resume_set = {lowered for lowered, _ in resume_entries}
+        
+        matched_skills = []
+        missing_skills = []
+        
+        for req_skill, req_lower, req_length in job_profile.fuzzy_entries:
+            if req_lower in resume_set:
+                matched_skills.append(req_skill)
+                continue
+            
+            for res_lower, res_length in resume_entries:
+                # Levenshtein ratio can't exceed 2*min(len)/sum(len); skip pairs that can't reach the threshold
+                if 2 * min(req_length, res_length) / (req_length + res_length) < FUZZY_MATCH_THRESHOLD - 1e-9:
+                    continue
+                if levenshtein_ratio(req_lower, res_lower) >= FUZZY_MATCH_THRESHOLD:
+                    matched_skills.append(req_skill)
+                    break
+            else:
+                missing_skills.append(req_skill)
+        
+        score = (len(matched_skills) / len(job_profile.required_skills)) * 100
+        
+        return score, matched_skills, missing_skills
+    
+    def compile_job_profile(
+        self,
+        job_id: int,
+        version: int,
+        content: str,
+        required_skills: List[str],
+        experience_required: int,
+        weights: Optional[Dict[str, float]] = None
+    ) -> JobProfile:
+        """Precompute everything scoring needs from a job description."""
+        cleaned_text = self._clean_text(content)
+        try:
+            embedding = np.asarray(self._encode([cleaned_text])[0], dtype=np.float32)
+        except Exception as e:
+            logger.warning("Error embedding job description %s: %s", job_id, e)
+            embedding = None
+        
+        return JobProfile(job_id, version, cleaned_text, embedding, required_skills, experience_required, weights)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the sentence model on a batch of texts, recording batch size and latency."""
+        MODEL_BATCH_SIZE.observe(len(texts))
+        with time_stage('embedding'):
+            return self.sentence_model.encode(texts)
+    
+    def embed_resumes(self, resume_texts: List[str]) -> np.ndarray:
+        """Embeddings of resume texts, cleaned exactly as semantic scoring cleans them."""
+        return np.asarray(self._encode([self._clean_text(text) for text in resume_texts]), dtype=np.float32)
+    
     def calculate_semantic_similarity(self, resume_text: str, job_description: str) -> float:
         """Calculate semantic similarity using sentence transformers."""
         try:
@@ -65,7 +179,7 @@ class ResumeScorer:
             
             # Get embeddings
             texts = [resume_clean, job_clean]
-            embeddings = self.sentence_model.encode(texts)
+            embeddings = self._encode(texts)
             
             # Calculate cosine similarity
             similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
@@ -74,7 +188,8 @@ class ResumeScorer:
             return float(similarity * 100)
             
         except Exception as e:
-            print(f"Error calculating semantic similarity: {e}")
+            logger.warning("Semantic similarity fell back to TF-IDF: %s", e)
+            SEMANTIC_FALLBACKS.inc(reason='error')
             # Fallback to TF-IDF similarity
             return self._calculate_tfidf_similarity(resume_text, job_description)
     
@@ -82,12 +197,68 @@ class ResumeScorer:
         """Fallback TF-IDF similarity calculation."""
         try:
             texts = [self._clean_text(text1), self._clean_text(text2)]
-            tfidf_matrix = self.tfidf_vectorizer.fit_transform(texts)
+            # Fit a fresh copy; the template is shared across request threads
+            tfidf_matrix = clone(self.tfidf_vectorizer).fit_transform(texts)
             similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
             return float(similarity * 100)
         except Exception:
             return 50.0  # Default fallback score
     
+    def calculate_semantic_similarities(
+        self,
+        resume_texts: List[str],
+        job_description: str,
+        job_profile: Optional[JobProfile] = None
+    ) -> List[float]:
+        """Calculate semantic similarity of many resumes against one job in a single model batch.
+        
+        With a compiled job profile only the resumes are encoded.
+        """
+        return self._score_semantic(resume_texts, job_description, job_profile)[0]
+    
+    def _score_semantic(
+        self,
+        resume_texts: List[str],
+        job_description: str,
+        job_profile: Optional[JobProfile] = None
+    ) -> Tuple[List[float], str]:
+        """Semantic scores within the semantic stage budget, plus the scoring path used.
+        
+        Falls back to TF-IDF when the model errors or overruns its budget.
+        """
+        if not resume_texts:
+            return [], SCORING_PATH_SEMANTIC
+        try:
+            scores = self.budgets.run(
+                'semantic', self._embedding_similarities, resume_texts, job_description, job_profile,
+                scale=len(resume_texts)
+            )
+            return scores, SCORING_PATH_SEMANTIC
+            
+        except StageTimeout as e:
+            logger.warning("Semantic scoring fell back to TF-IDF: %s", e)
+            SEMANTIC_FALLBACKS.inc(reason='timeout')
+        except Exception as e:
+            logger.warning("Batched semantic similarity failed, falling back to TF-IDF: %s", e)
+            SEMANTIC_FALLBACKS.inc(reason='error')
+        return [self._calculate_tfidf_similarity(text, job_description) for text in resume_texts], SCORING_PATH_TFIDF
+    
+    def _embedding_similarities(
+        self,
+        resume_texts: List[str],
+        job_description: str,
+        job_profile: Optional[JobProfile] = None
+    ) -> List[float]:
+        resume_cleans = [self._clean_text(text) for text in resume_texts]
+        if job_profile is not None and job_profile.embedding is not None:
+            resume_embeddings = self._encode(resume_cleans)
+            job_embedding = job_profile.embedding.reshape(1, -1)
+        else:
+            embeddings = self._encode([self._clean_text(job_description)] + resume_cleans)
+            resume_embeddings, job_embedding = embeddings[1:], embeddings[0:1]
+        similarities = cosine_similarity(resume_embeddings, job_embedding)[:, 0]
+        return [float(similarity * 100) for similarity in similarities]
+    
     def calculate_experience_score(self, resume_experience: int, required_experience: int) -> float:
         """Calculate experience matching score."""
         if required_experience == 0:
@@ -111,11 +282,7 @@ class ResumeScorer:
     ) -> float:
         """Calculate overall weighted score."""
         if weights is None:
-            weights = {
-                'skills': 0.5,      # 50% weight for skills matching
-                'semantic': 0.3,    # 30% weight for semantic similarity
-                'experience': 0.2   # 20% weight for experience
-            }
+            weights = DEFAULT_WEIGHTS
         
         overall_score = (
             skills_score * weights['skills'] +
@@ -134,6 +301,72 @@ class ResumeScorer:
         else:
             return "Low"
     
+    def calculate_experience_scores(self, resume_experience, required_experience) -> np.ndarray:
+        """Vectorised calculate_experience_score over arrays of years."""
+        resume_experience = np.asarray(resume_experience, dtype=np.float64)
+        required_experience = np.asarray(required_experience, dtype=np.float64)
+        
+        # Meeting the requirement always caps at 100; otherwise score the deficit ratio
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deficit_scores = (resume_experience / required_experience) * 100
+        scores = np.where(resume_experience >= required_experience, 100.0, deficit_scores)
+        return np.where(required_experience == 0, 100.0, scores)
+    
+    def score_many(
+        self,
+        skills_scores,
+        semantic_scores,
+        experience_scores,
+        weights: Dict[str, float] = None
+    ) -> np.ndarray:
+        """Vectorised calculate_overall_score + determine_verdict for N candidates.
+        
+        Takes equal-length arrays of component scores and returns a structured
+        array (SCORE_DTYPE) of overall scores and verdict codes. Element for
+        element the results are identical to the scalar methods; use
+        VERDICT_LABELS to turn codes into labels.
+        """
+        if weights is None:
+            weights = DEFAULT_WEIGHTS
+        
+        skills_scores = np.asarray(skills_scores, dtype=np.float64)
+        semantic_scores = np.asarray(semantic_scores, dtype=np.float64)
+        experience_scores = np.asarray(experience_scores, dtype=np.float64)
+        
+        # Same operation order as calculate_overall_score so floats match bit for bit
+        overall_scores = np.minimum(
+            100.0,
+            skills_scores * weights['skills'] +
+            semantic_scores * weights['semantic'] +
+            experience_scores * weights['experience']
+        )
+        
+        result = np.empty(overall_scores.shape, dtype=SCORE_DTYPE)
+        result['overall_score'] = overall_scores
+        result['verdict'] = np.where(
+            overall_scores >= 75, VERDICT_HIGH,
+            np.where(overall_scores >= 50, VERDICT_MEDIUM, VERDICT_LOW)
+        )
+        return result
+    
+    def apply_weights(self, score_result: Dict, weights: Optional[Dict[str, float]], experience_gap: int = 0) -> Dict:
+        """A score_resume result with its overall score, verdict and suggestions
+        recomputed under other weights; the component scores are kept."""
+        overall_score = self.calculate_overall_score(
+            score_result['skills_match_score'],
+            score_result['semantic_similarity_score'],
+            score_result['experience_score'],
+            weights
+        )
+        return {
+            **score_result,
+            'overall_score': round(overall_score, 2),
+            'verdict': self.determine_verdict(overall_score),
+            'suggestions': self.generate_suggestions(
+                score_result['missing_skills'], score_result['matched_skills'], overall_score, experience_gap
+            )
+        }
+    
     def generate_suggestions(
         self, 
         missing_skills: List[str], 
@@ -166,6 +399,7 @@ class ResumeScorer:
     
     def _clean_text(self, text: str) -> str:
         """Clean and preprocess text for analysis."""
+        text = truncate_text(text)
         # Remove extra whitespace and special characters
         text = re.sub(r'\s+', ' ', text)
         text = re.sub(r'[^\w\s]', ' ', text)
@@ -175,25 +409,66 @@ class ResumeScorer:
         self, 
         resume_data: Dict, 
         job_data: Dict,
-        custom_weights: Dict[str, float] = None
+        custom_weights: Dict[str, float] = None,
+        job_profile: Optional[JobProfile] = None
     ) -> Dict:
         """Complete resume scoring pipeline."""
+        job_text = job_profile.cleaned_text if job_profile is not None else job_data.get('content', '')
+        semantic_scores, scoring_path = self._score_semantic(
+            [resume_data.get('content', '')], job_text, job_profile
+        )
+        return self._build_score_result(
+            resume_data, job_data, semantic_scores[0], scoring_path, custom_weights, job_profile
+        )
+    
+    def score_resumes(
+        self,
+        resumes_data: List[Dict],
+        job_data: Dict,
+        custom_weights: Dict[str, float] = None,
+        job_profile: Optional[JobProfile] = None
+    ) -> List[Dict]:
+        """Score many resumes against one job, embedding them in a single batch."""
+        semantic_scores, scoring_path = self._score_semantic(
+            [resume_data.get('content', '') for resume_data in resumes_data],
+            job_data.get('content', ''),
+            job_profile
+        )
+        return [
+            self._build_score_result(
+                resume_data, job_data, semantic_score, scoring_path, custom_weights, job_profile
+            )
+            for resume_data, semantic_score in zip(resumes_data, semantic_scores)
+        ]
+    
+    def _build_score_result(
+        self,
+        resume_data: Dict,
+        job_data: Dict,
+        semantic_score: float,
+        scoring_path: str = SCORING_PATH_SEMANTIC,
+        custom_weights: Dict[str, float] = None,
+        job_profile: Optional[JobProfile] = None
+    ) -> Dict:
+        """Combine the per-pair scores into the final result."""
         
         # Extract data
         resume_skills = resume_data.get('skills', [])
-        resume_text = resume_data.get('content', '')
         resume_experience = resume_data.get('experience_years', 0)
         
         required_skills = job_data.get('required_skills', [])
-        job_text = job_data.get('content', '')
         required_experience = job_data.get('experience_required', 0)
         
         # Calculate individual scores
-        skills_score, matched_skills, missing_skills = self.calculate_skills_match_score(
-            resume_skills, required_skills
-        )
+        if job_profile is not None:
+            skills_score, matched_skills, missing_skills = self.calculate_profile_skills_match(
+                resume_skills, job_profile
+            )
+        else:
+            skills_score, matched_skills, missing_skills = self.calculate_skills_match_score(
+                resume_skills, required_skills
+            )
         
-        semantic_score = self.calculate_semantic_similarity(resume_text, job_text)
         experience_score = self.calculate_experience_score(resume_experience, required_experience)
         
         # Calculate overall score
@@ -218,5 +493,6 @@ class ResumeScorer:
             'matched_skills': matched_skills,
             'missing_skills': missing_skills,
             'suggestions': suggestions,
-            'verdict': verdict
+            'verdict': verdict,
+            'scoring_path': scoring_path
         }
\ No newline at end of file
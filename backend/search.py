@@ -0,0 +1,297 @@
+"""Full-text search over resume and job description text.
+
+Usage (from the project root):
+    python -m backend.search rebuild
+
+SQLite: external-content FTS5 tables (resume_fts, job_fts) with the trigram
+tokenizer, kept in step with resumes and job_descriptions by triggers, so
+every write path (ORM, bulk updates, other processes) maintains them. Trigram
+matching is case-insensitive substring matching and needs terms of at least
+three characters: shorter terms are ignored, and a search with no longer
+term falls back to a LIKE scan. Ranked by bm25.
+
+PostgreSQL: a stored generated tsvector column with a GIN index on each
+table, ranked by ts_rank_cd, with ts_headline snippets. Location filters use
+ILIKE, indexed with pg_trgm where the extension is available.
+
+create_search_index() runs with create_tables() and builds the index for rows
+that existed before it.
+"""
+import argparse
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, column, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .models import JobDescription, Resume
+
+MIN_TRIGRAM_TERM = 3
+SNIPPET_TOKENS = 64  # Trigrams, so about as many characters; 64 is the FTS5 maximum
+
+# (name, source table, indexed columns); the first column is the one snippets are cut from
+_FTS_TABLES = (
+    ("resume_fts", "resumes", ("content", "filename", "location", "job_role")),
+    ("job_fts", "job_descriptions", ("content", "title", "company", "location")),
+)
+
+_PG_VECTORS = {
+    "resumes": (
+        "setweight(to_tsvector('english', coalesce(filename, '') || ' ' || coalesce(job_role, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+    ),
+    "job_descriptions": (
+        "setweight(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(company, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+    ),
+}
+
+_available: Dict[str, bool] = {}
+
+def _sqlite_ddl(name: str, source: str, columns) -> List[str]:
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    delete_old = f"INSERT INTO {name}({name}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {name}(rowid, {column_list}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE {name} USING fts5({column_list}, content='{source}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON {source} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON {source} BEGIN {delete_old} END",
+        # Only text edits touch the index, not version bumps or score writes
+        f"CREATE TRIGGER {name}_au AFTER UPDATE OF {column_list} ON {source} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {name}({name}) VALUES ('rebuild')",
+    ]
+
+def create_search_index(engine: Engine):
+    """Create the full-text index for this database if it doesn't exist yet."""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        for name, source, columns in _FTS_TABLES:
+            try:
+                # One transaction per table: a failure leaves no half-built index behind
+                with engine.begin() as conn:
+                    exists = conn.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+                    ).first()
+                    if exists:
+                        continue
+                    for statement in _sqlite_ddl(name, source, columns):
+                        conn.execute(text(statement))
+            except Exception as e:
+                # FTS5 or its trigram tokenizer (SQLite 3.34+) missing: search falls back to LIKE
+                print(f"Full-text index {name} not available, searches will scan: {e}")
+    elif dialect == "postgresql":
+        with engine.begin() as conn:
+            for source, vector in _PG_VECTORS.items():
+                conn.execute(text(
+                    f"ALTER TABLE {source} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                    f"GENERATED ALWAYS AS ({vector}) STORED"
+                ))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{source}_search ON {source} USING GIN (search_vector)"))
+        _create_pg_location_index(engine)
+    _available.pop(str(engine.url), None)
+
+def _create_pg_location_index(engine: Engine):
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_resumes_location_trgm ON resumes USING GIN (location gin_trgm_ops)"
+            ))
+    except Exception as e:
+        print(f"Trigram index on resumes.location not created, location filters will scan: {e}")
+
+def _backend(db: Session) -> Optional[str]:
+    """'fts5', 'postgresql' or None (no index: LIKE scans)."""
+    bind = db.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        return "postgresql"
+    if dialect != "sqlite":
+        return None
+    key = str(bind.url)
+    if key not in _available:
+        _available[key] = db.execute(
+            text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name IN ('resume_fts', 'job_fts')")
+        ).scalar() == len(_FTS_TABLES)
+    return "fts5" if _available[key] else None
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def _fts_query(q: str) -> Optional[str]:
+    """FTS5 query requiring every term (as a substring), or None if no term is long enough for trigrams."""
+    terms = [term for term in q.split() if len(term) >= MIN_TRIGRAM_TERM]
+    if not terms:
+        return None
+    return " AND ".join(_quote(term) for term in terms)
+
+def location_condition(db: Session, location: str, resume_id_column):
+    """Filter clause: resume_id_column belongs to a resume whose location contains ``location``.
+
+    Uses the trigram index on SQLite; the clause is the plain ILIKE otherwise
+    (indexed by pg_trgm on PostgreSQL) and for terms too short for trigrams.
+    """
+    if _backend(db) == "fts5" and len(location) >= MIN_TRIGRAM_TERM:
+        # The whole string as one phrase, like the substring match of ILIKE
+        matches = text("SELECT rowid FROM resume_fts WHERE resume_fts MATCH :location_query").bindparams(
+            location_query=f"{{location}} : {_quote(location)}"
+        ).columns(column("rowid", Integer))
+        return resume_id_column.in_(matches)
+    return resume_id_column.in_(select(Resume.id).where(Resume.location.ilike(f"%{location}%")))
+
+def _like_terms(q: str, columns) -> list:
+    return [or_(*(c.ilike(f"%{term}%") for c in columns)) for term in q.split()]
+
+def search_resumes(
+    db: Session,
+    q: str,
+    location: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20
+) -> List[Dict]:
+    """Resumes matching every keyword, best first, with a highlighted snippet of the match."""
+    backend = _backend(db)
+    fts_query = _fts_query(q) if backend == "fts5" else None
+    params = {"q": q, "limit": limit, "skip": skip}
+    location_sql = ""
+    if fts_query is not None and location and len(location) >= MIN_TRIGRAM_TERM:
+        fts_query = f"({fts_query}) AND {{location}} : {_quote(location)}"
+    elif location:
+        params["location"] = f"%{location}%"
+        location_sql = " AND r.location ILIKE :location" if backend == "postgresql" else " AND r.location LIKE :location"
+
+    if fts_query is not None:
+        params["q"] = fts_query
+        rows = db.execute(text(
+            "SELECT r.id, r.filename, r.location, r.job_role, -bm25(resume_fts) AS score, "
+            f"snippet(resume_fts, 0, '[', ']', '…', {SNIPPET_TOKENS}) AS snippet "
+            "FROM resume_fts JOIN resumes r ON r.id = resume_fts.rowid "
+            f"WHERE resume_fts MATCH :q{location_sql} "
+            "ORDER BY bm25(resume_fts) LIMIT :limit OFFSET :skip"
+        ), params).all()
+    elif backend == "postgresql":
+        rows = db.execute(text(
+            "SELECT r.id, r.filename, r.location, r.job_role, ts_rank_cd(r.search_vector, query) AS score, "
+            "ts_headline('english', r.content, query, 'StartSel=[, StopSel=], MaxWords=20, MinWords=8') AS snippet "
+            "FROM resumes r, websearch_to_tsquery('english', :q) query "
+            f"WHERE r.search_vector @@ query{location_sql} "
+            "ORDER BY score DESC, r.id LIMIT :limit OFFSET :skip"
+        ), params).all()
+    else:
+        query = db.query(Resume.id, Resume.filename, Resume.location, Resume.job_role, Resume.content).filter(
+            *_like_terms(q, (Resume.content, Resume.filename, Resume.location, Resume.job_role))
+        )
+        if location:
+            query = query.filter(Resume.location.ilike(f"%{location}%"))
+        rows = [
+            (row.id, row.filename, row.location, row.job_role, None, _like_snippet(row.content, q))
+            for row in query.order_by(Resume.id).offset(skip).limit(limit).all()
+        ]
+
+    return [
+        {
+            'resume_id': row[0],
+            'filename': row[1],
+            'location': row[2],
+            'job_role': row[3],
+            'score': round(float(row[4]), 6) if row[4] is not None else None,
+            'snippet': row[5]
+        }
+        for row in rows
+    ]
+
+def search_jobs(
+    db: Session,
+    q: str,
+    active_only: bool = True,
+    skip: int = 0,
+    limit: int = 20
+) -> List[Dict]:
+    """Job descriptions matching every keyword, best first, with a highlighted snippet of the match."""
+    backend = _backend(db)
+    fts_query = _fts_query(q) if backend == "fts5" else None
+    params = {"q": q, "limit": limit, "skip": skip}
+    active_sql = " AND j.is_active" if active_only else ""
+
+    if fts_query is not None:
+        params["q"] = fts_query
+        rows = db.execute(text(
+            "SELECT j.id, j.title, j.company, j.location, -bm25(job_fts) AS score, "
+            f"snippet(job_fts, 0, '[', ']', '…', {SNIPPET_TOKENS}) AS snippet "
+            "FROM job_fts JOIN job_descriptions j ON j.id = job_fts.rowid "
+            f"WHERE job_fts MATCH :q{active_sql} "
+            "ORDER BY bm25(job_fts) LIMIT :limit OFFSET :skip"
+        ), params).all()
+    elif backend == "postgresql":
+        rows = db.execute(text(
+            "SELECT j.id, j.title, j.company, j.location, ts_rank_cd(j.search_vector, query) AS score, "
+            "ts_headline('english', j.content, query, 'StartSel=[, StopSel=], MaxWords=20, MinWords=8') AS snippet "
+            "FROM job_descriptions j, websearch_to_tsquery('english', :q) query "
+            f"WHERE j.search_vector @@ query{active_sql} "
+            "ORDER BY score DESC, j.id LIMIT :limit OFFSET :skip"
+        ), params).all()
+    else:
+        query = db.query(
+            JobDescription.id, JobDescription.title, JobDescription.company, JobDescription.location, JobDescription.content
+        ).filter(*_like_terms(q, (JobDescription.content, JobDescription.title, JobDescription.company, JobDescription.location)))
+        if active_only:
+            query = query.filter(JobDescription.is_active == True)
+        rows = [
+            (row.id, row.title, row.company, row.location, None, _like_snippet(row.content, q))
+            for row in query.order_by(JobDescription.id).offset(skip).limit(limit).all()
+        ]
+
+    return [
+        {
+            'job_id': row[0],
+            'title': row[1],
+            'company': row[2],
+            'location': row[3],
+            'score': round(float(row[4]), 6) if row[4] is not None else None,
+            'snippet': row[5]
+        }
+        for row in rows
+    ]
+
+def _like_snippet(content: Optional[str], q: str, width: int = 60) -> Optional[str]:
+    """Text around the first keyword hit, marked like the indexed snippets."""
+    if not content:
+        return None
+    lowered = content.lower()
+    for term in q.split():
+        start = lowered.find(term.lower())
+        if start >= 0:
+            end = start + len(term)
+            return (
+                ('…' if start > width else '') + content[max(0, start - width):start]
+                + '[' + content[start:end] + ']'
+                + content[end:end + width] + ('…' if end + width < len(content) else '')
+            )
+    return None
+
+def rebuild(engine: Engine):
+    """Rebuild the SQLite index from the source tables (PostgreSQL's generated columns need no rebuild)."""
+    if engine.dialect.name != "sqlite":
+        print("Nothing to rebuild: the PostgreSQL search columns are generated by the database.")
+        return
+    with engine.begin() as conn:
+        for name, _, _ in _FTS_TABLES:
+            conn.execute(text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+            print(f"{name} rebuilt")
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the full-text search index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Re-index every resume and job description")
+    parser.parse_args()
+
+    from .db import create_tables, engine
+    create_tables()
+    rebuild(engine)
+
+if __name__ == "__main__":
+    main()
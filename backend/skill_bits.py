@@ -0,0 +1,175 @@
+"""Skill sets as fixed-width bitsets over the skill taxonomy.
+
+Usage (from the project root):
+    python -m backend.skill_bits backfill
+
+Every taxonomy skill has a canonical integer ID (its position in
+taxonomy.SKILL_TAXONOMY) and a resume's or job's skills are stored as
+little-endian uint64 words with bit ID set for each skill. Skills outside the vocabulary are
+kept aside as "unindexed"; rows with any are scored by the string matcher.
+
+Matching keeps the semantics of ResumeScorer.calculate_skills_match_score: a
+required skill counts as matched if the resume has it or a skill within
+FUZZY_MATCH_THRESHOLD Levenshtein ratio of it. Those fuzzy neighbours are
+precomputed per vocabulary skill, so matching one resume against every job
+(or one job against every resume) is a few vectorised AND/popcount passes.
+"""
+import argparse
+import hashlib
+import json
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from Levenshtein import ratio as levenshtein_ratio
+
+from .taxonomy import SKILL_TAXONOMY
+
+FUZZY_MATCH_THRESHOLD = 0.8
+
+# A skill's position in the taxonomy is the bit stored for it in the database
+SKILL_VOCABULARY: Tuple[str, ...] = tuple(skill for skill, _ in SKILL_TAXONOMY)
+
+# (size, fingerprint) of a vocabulary the stored bitsets are built on. Appending
+# skills keeps it a prefix; reordering or removing one would silently remap
+# every stored bit, so it fails here instead
+_RECORDED_VOCABULARY = (49, "b8bf4883729652b3")
+
+def _fingerprint(skills: Tuple[str, ...]) -> str:
+    return hashlib.sha256("\n".join(skills).encode()).hexdigest()[:16]
+
+if len(set(SKILL_VOCABULARY)) != len(SKILL_VOCABULARY) or _fingerprint(
+        SKILL_VOCABULARY[:_RECORDED_VOCABULARY[0]]) != _RECORDED_VOCABULARY[1]:
+    raise RuntimeError("SKILL_TAXONOMY is append only: new skills go at the end, existing ones keep their place")
+
+SKILL_IDS = {skill: skill_id for skill_id, skill in enumerate(SKILL_VOCABULARY)}
+WORDS = (len(SKILL_VOCABULARY) + 63) // 64
+BITSET_DTYPE = np.dtype('<u8')
+
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+def _bits_to_words(bits: np.ndarray) -> np.ndarray:
+    """Pack a (..., WORDS * 64) boolean array into (..., WORDS) uint64 words."""
+    packed = np.packbits(bits.astype(np.uint8), axis=-1, bitorder='little')
+    return np.ascontiguousarray(packed).view(BITSET_DTYPE)
+
+def _words_to_bits(words: np.ndarray) -> np.ndarray:
+    return np.unpackbits(np.ascontiguousarray(words, dtype=BITSET_DTYPE).view(np.uint8), axis=-1, bitorder='little')
+
+def _neighbour_masks() -> np.ndarray:
+    """Row i: bitset of the vocabulary skills fuzzy-equal to skill i (including itself)."""
+    size = len(SKILL_VOCABULARY)
+    bits = np.zeros((size, WORDS * 64), dtype=bool)
+    for i, a in enumerate(SKILL_VOCABULARY):
+        for j, b in enumerate(SKILL_VOCABULARY):
+            bits[i, j] = i == j or levenshtein_ratio(a, b) >= FUZZY_MATCH_THRESHOLD
+    return _bits_to_words(bits)
+
+NEIGHBOUR_MASKS = _neighbour_masks()
+
+def encode_skills(skills: Iterable[str]) -> Tuple[bytes, List[str]]:
+    """Bitset bytes for the vocabulary skills, plus the skills it can't represent.
+
+    Repeats (ignoring case) are returned as unindexed too: the string matcher
+    counts each occurrence and a bitset can't.
+    """
+    bits = np.zeros(WORDS * 64, dtype=bool)
+    unindexed = []
+    for skill in skills:
+        skill_id = SKILL_IDS.get(skill.lower())
+        if skill_id is None or bits[skill_id]:
+            unindexed.append(skill)
+        else:
+            bits[skill_id] = True
+    return _bits_to_words(bits).tobytes(), unindexed
+
+def skill_columns(skills_json: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """(skill_bits, unindexed_skills) column values for a JSON-encoded skill list."""
+    bits, unindexed = encode_skills(json.loads(skills_json) if skills_json else [])
+    return bits, json.dumps(unindexed) if unindexed else None
+
+def to_words(blob: Optional[bytes]) -> np.ndarray:
+    """Stored bitset bytes as WORDS uint64 words; shorter blobs predate vocabulary growth."""
+    words = np.zeros(WORDS, dtype=BITSET_DTYPE)
+    if blob:
+        stored = np.frombuffer(blob, dtype=BITSET_DTYPE)[:WORDS]
+        words[:len(stored)] = stored
+    return words
+
+def stack_words(blobs: List[Optional[bytes]]) -> np.ndarray:
+    """(len(blobs), WORDS) matrix of stored bitsets."""
+    if not blobs:
+        return np.zeros((0, WORDS), dtype=BITSET_DTYPE)
+    return np.stack([to_words(blob) for blob in blobs])
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per bitset (last axis)."""
+    return _POPCOUNT[np.ascontiguousarray(words, dtype=BITSET_DTYPE).view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+def expand(words: np.ndarray) -> np.ndarray:
+    """Bitsets with every skill's fuzzy neighbours added."""
+    bits = _words_to_bits(words)[..., :len(SKILL_VOCABULARY)]
+    neighbours = _words_to_bits(NEIGHBOUR_MASKS)
+    expanded = (bits.astype(np.float32) @ neighbours.astype(np.float32)) > 0
+    return _bits_to_words(expanded)
+
+def skill_ids(words: np.ndarray) -> np.ndarray:
+    return np.flatnonzero(_words_to_bits(words)[:len(SKILL_VOCABULARY)])
+
+def match_jobs(resume_words: np.ndarray, job_matrix: np.ndarray) -> np.ndarray:
+    """Matched required-skill count of one resume against each job's bitset."""
+    return popcount(job_matrix & expand(resume_words))
+
+def match_resumes(job_words: np.ndarray, resume_matrix: np.ndarray) -> np.ndarray:
+    """Matched required-skill count of each resume against one job's bitset."""
+    counts = np.zeros(len(resume_matrix), dtype=np.int64)
+    for skill_id in skill_ids(job_words):
+        # A required skill matches if the resume has any of its fuzzy neighbours
+        counts += (resume_matrix & NEIGHBOUR_MASKS[skill_id]).any(axis=1)
+    return counts
+
+def skills_scores(matched: np.ndarray, required: np.ndarray) -> np.ndarray:
+    """Skills match scores (0-100) from matched and required counts; no requirements scores 100."""
+    required = np.asarray(required, dtype=np.float64)
+    return np.where(required > 0, 100.0 * matched / np.maximum(required, 1), 100.0)
+
+def backfill(batch_size: int = 1000) -> int:
+    """Compute bitsets for resumes and jobs stored before they existed. Returns rows written."""
+    from .db import SessionLocal
+    from .models import JobDescription, Resume
+    from .versions import touch
+
+    db = SessionLocal()
+    written = 0
+    try:
+        for model, column in ((Resume, Resume.extracted_skills), (JobDescription, JobDescription.required_skills)):
+            while True:
+                rows = db.query(model.id, column).filter(model.skill_bits.is_(None)).limit(batch_size).all()
+                if not rows:
+                    break
+                updates = []
+                for row_id, skills_json in rows:
+                    bits, unindexed = skill_columns(skills_json)
+                    updates.append({'id': row_id, 'skill_bits': bits, 'unindexed_skills': unindexed})
+                db.bulk_update_mappings(model, updates)
+                touch(db, model.__tablename__)
+                db.commit()
+                written += len(updates)
+                print(f"{model.__tablename__}: {written} bitsets written")
+    finally:
+        db.close()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain resume and job skill bitsets.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="Compute bitsets for rows stored before they existed")
+    backfill_parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from .db import create_tables
+    create_tables()
+    written = backfill(args.batch_size)
+    print(f"Done: {written} bitsets written.")
+
+if __name__ == "__main__":
+    main()
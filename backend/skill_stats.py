@@ -0,0 +1,132 @@
+"""Per-job matched/missing skill counters.
+
+Usage (from the project root):
+    python -m backend.skill_stats backfill [--job-id ID]
+
+upsert_evaluation applies the difference between an evaluation's old and new
+skill lists, so the counters always describe the evaluations currently
+stored. The backfill rebuilds them from the evaluations table, for databases
+that predate the counters or after editing evaluations by hand.
+"""
+import argparse
+import json
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import Evaluation, JobSkillStat
+from .upserts import insert_for
+
+def skill_deltas(
+    old_matched: Iterable[str],
+    old_missing: Iterable[str],
+    new_matched: Iterable[str],
+    new_missing: Iterable[str]
+) -> Dict[str, Tuple[int, int]]:
+    """(matched, missing) count changes per skill when an evaluation is overwritten."""
+    matched = Counter(set(new_matched))
+    matched.subtract(set(old_matched))
+    missing = Counter(set(new_missing))
+    missing.subtract(set(old_missing))
+    return {
+        skill: (matched[skill], missing[skill])
+        for skill in set(matched) | set(missing)
+        if matched[skill] or missing[skill]
+    }
+
+def apply_skill_deltas(db: Session, job_id: int, deltas: Dict[str, Tuple[int, int]]):
+    """Add the deltas to a job's counters. Does not commit.
+
+    One upsert executed once for all skills: a missing counter row is created
+    and an existing one is incremented in SQL, so concurrent writers neither
+    collide on the insert nor overwrite each other's counts.
+    """
+    if not deltas:
+        return
+    table = JobSkillStat.__table__
+    statement = insert_for(db, table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.job_description_id, table.c.skill],
+        set_={
+            'matched_count': table.c.matched_count + statement.excluded.matched_count,
+            'missing_count': table.c.missing_count + statement.excluded.missing_count
+        }
+    )
+    db.execute(statement, [
+        {'job_description_id': job_id, 'skill': skill, 'matched_count': matched, 'missing_count': missing}
+        for skill, (matched, missing) in deltas.items()
+    ])
+
+def top_skills(db: Session, job_id: int, limit: int = 10) -> Dict:
+    """The most often missing and most often matched skills for a job."""
+    total = db.query(Evaluation).filter(Evaluation.job_description_id == job_id).count()
+
+    def ranked(column):
+        rows = (
+            db.query(JobSkillStat.skill, column)
+            .filter(JobSkillStat.job_description_id == job_id, column > 0)
+            .order_by(column.desc(), JobSkillStat.skill)
+            .limit(limit)
+            .all()
+        )
+        return [
+            {'skill': skill, 'count': count, 'share': round(count / total, 4) if total else 0.0}
+            for skill, count in rows
+        ]
+
+    return {
+        'job_id': job_id,
+        'total_evaluations': total,
+        'missing': ranked(JobSkillStat.missing_count),
+        'matched': ranked(JobSkillStat.matched_count)
+    }
+
+def rebuild_skill_stats(db: Session, job_id: Optional[int] = None, batch_size: int = 1000) -> int:
+    """Recompute counters from the stored evaluations. Returns how many evaluations were read. Does not commit."""
+    evaluations = db.query(Evaluation.job_description_id, Evaluation.matched_skills, Evaluation.missing_skills)
+    stats = db.query(JobSkillStat)
+    if job_id is not None:
+        evaluations = evaluations.filter(Evaluation.job_description_id == job_id)
+        stats = stats.filter(JobSkillStat.job_description_id == job_id)
+
+    matched: Dict[int, Counter] = {}
+    missing: Dict[int, Counter] = {}
+    read = 0
+    for evaluation_job_id, matched_json, missing_json in evaluations.yield_per(batch_size):
+        matched.setdefault(evaluation_job_id, Counter()).update(set(json.loads(matched_json or "[]")))
+        missing.setdefault(evaluation_job_id, Counter()).update(set(json.loads(missing_json or "[]")))
+        read += 1
+
+    stats.delete(synchronize_session=False)
+    db.bulk_insert_mappings(JobSkillStat, [
+        {
+            'job_description_id': evaluation_job_id,
+            'skill': skill,
+            'matched_count': matched[evaluation_job_id][skill],
+            'missing_count': missing[evaluation_job_id][skill]
+        }
+        for evaluation_job_id in matched
+        for skill in set(matched[evaluation_job_id]) | set(missing[evaluation_job_id])
+    ])
+    return read
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the per-job skill counters.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = subparsers.add_parser("backfill", help="Rebuild counters from the stored evaluations")
+    backfill_parser.add_argument("--job-id", type=int, help="Only rebuild this job's counters")
+    args = parser.parse_args()
+
+    from .db import SessionLocal, create_tables
+    create_tables()
+    db = SessionLocal()
+    try:
+        read = rebuild_skill_stats(db, args.job_id)
+        db.commit()
+        print(f"Done: counters rebuilt from {read} evaluations.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import tempfile
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "./blob_store")
+
+class BlobStore:
+    """Content-addressed, zlib-compressed store for original uploaded files."""
+
+    def __init__(self, root: Optional[str] = None, compression_level: int = 6):
+        self.root = root or BLOB_STORE_DIR
+        self.compression_level = compression_level
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        """Return the content address (SHA-256 hex digest) of some bytes."""
+        return hashlib.sha256(data).hexdigest()
+
+    def path_for(self, digest: str) -> str:
+        """Return the on-disk path of a blob, sharded by its first two bytes."""
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.z")
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path_for(digest))
+
+    def put(self, data: bytes) -> str:
+        """Store bytes and return their digest. Identical content is stored once."""
+        digest = self.digest(data)
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file in the same directory, then rename atomically so
+        # concurrent writers and crashed uploads never leave a partial blob.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data, self.compression_level))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def put_file(self, path: str, digest: Optional[str] = None, chunk_size: int = 1024 * 1024) -> str:
+        """Store a file's contents, streaming them through the compressor. Same digest as put() of its bytes.
+
+        Pass the digest if it is already known (e.g. computed while spooling
+        an upload) to skip hashing the file again.
+        """
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+        blob_path = self.path_for(digest)
+        if os.path.exists(blob_path):
+            return digest
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path), suffix=".tmp")
+        try:
+            compressor = zlib.compressobj(self.compression_level)
+            with os.fdopen(fd, "wb") as out, open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    out.write(compressor.compress(chunk))
+                out.write(compressor.flush())
+            os.replace(tmp_path, blob_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Load and decompress a blob by digest."""
+        try:
+            with open(self.path_for(digest), "rb") as f:
+                return zlib.decompress(f.read())
+        except FileNotFoundError:
+            raise KeyError(f"Blob {digest} not found")
+
+    @contextmanager
+    def temp_file(self, digest: str, suffix: str = "", chunk_size: int = 1024 * 1024) -> Iterator[str]:
+        """Decompress a blob into a temporary file and yield its path. The file is removed on exit.
+
+        For readers that take a path (the extractors), so a large original is
+        streamed to disk rather than held in memory whole.
+        """
+        try:
+            source = open(self.path_for(digest), "rb")
+        except FileNotFoundError:
+            raise KeyError(f"Blob {digest} not found")
+        with source:
+            fd, tmp_path = tempfile.mkstemp(prefix="blob-", suffix=suffix)
+            try:
+                decompressor = zlib.decompressobj()
+                with os.fdopen(fd, "wb") as out:
+                    for chunk in iter(lambda: source.read(chunk_size), b""):
+                        out.write(decompressor.decompress(chunk))
+                    out.write(decompressor.flush())
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        try:
+            yield tmp_path
+        finally:
+            os.remove(tmp_path)
@@ -0,0 +1,219 @@
+"""Durable task queue stored in the application database.
+
+The API enqueues tasks; worker processes (``python -m backend.worker``) on any
+host sharing the database claim them. A claim is a lease: the worker must
+finish or renew it within TASK_LEASE_SECONDS, otherwise another worker may
+take the task over. Every claim counts as an attempt; failed tasks are
+retried with exponential backoff and moved to the dead-letter status "dead"
+after max_attempts. Higher priority tasks are claimed first, then the oldest.
+
+Claims are a conditional UPDATE on the task row, so two workers can never
+both win the same task; on PostgreSQL the candidate SELECT also skips rows
+locked by other claimers.
+"""
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from .models import Lease, Task
+from .upserts import insert_for
+
+load_dotenv()
+
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "60"))
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+TASK_RETRY_BACKOFF_SECONDS = float(os.getenv("TASK_RETRY_BACKOFF_SECONDS", "5"))
+
+TASK_QUEUED = "queued"
+TASK_RUNNING = "running"
+TASK_SUCCEEDED = "succeeded"
+TASK_DEAD = "dead"
+TASK_STATUSES = (TASK_QUEUED, TASK_RUNNING, TASK_SUCCEEDED, TASK_DEAD)
+
+class PermanentTaskError(Exception):
+    """A failure retrying can't fix (e.g. the resume was deleted); the task is dead-lettered at once."""
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict,
+    priority: int = 0,
+    max_attempts: int = TASK_MAX_ATTEMPTS
+) -> Task:
+    """Add a task. Does not commit, so it can be enqueued atomically with other writes."""
+    task = Task(kind=kind, payload=json.dumps(payload), priority=priority, max_attempts=max_attempts)
+    db.add(task)
+    return task
+
+def _claimable(now: datetime, kinds: Optional[Iterable[str]] = None):
+    condition = or_(
+        and_(Task.status == TASK_QUEUED, Task.available_at <= now),
+        # A running task whose worker stopped renewing its lease
+        and_(Task.status == TASK_RUNNING, Task.lease_expires_at < now)
+    )
+    if kinds:
+        condition = and_(condition, Task.kind.in_(list(kinds)))
+    return condition
+
+def claim(
+    db: Session,
+    worker_id: str,
+    kinds: Optional[Iterable[str]] = None,
+    lease_seconds: float = TASK_LEASE_SECONDS
+) -> Optional[Task]:
+    """Lease the most urgent claimable task to this worker and commit. None if there is nothing to do.
+
+    Tasks whose lease expired after their last allowed attempt are
+    dead-lettered here instead of being handed out again.
+    """
+    kinds = list(kinds) if kinds else None
+    for _ in range(5):
+        now = datetime.utcnow()
+        candidate = (
+            db.query(Task.id, Task.status, Task.attempts, Task.max_attempts)
+            .filter(_claimable(now, kinds))
+            .order_by(Task.priority.desc(), Task.available_at, Task.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if candidate is None:
+            db.rollback()
+            return None
+
+        still_claimable = and_(Task.id == candidate.id, _claimable(now), Task.attempts == candidate.attempts)
+        if candidate.status == TASK_RUNNING and candidate.attempts >= candidate.max_attempts:
+            db.query(Task).filter(still_claimable).update({
+                Task.status: TASK_DEAD,
+                Task.lease_owner: None,
+                Task.lease_expires_at: None,
+                Task.last_error: "Lease expired on the last attempt",
+                Task.finished_at: now
+            }, synchronize_session=False)
+            db.commit()
+            continue
+
+        claimed = db.query(Task).filter(still_claimable).update({
+            Task.status: TASK_RUNNING,
+            Task.lease_owner: worker_id,
+            Task.lease_expires_at: now + timedelta(seconds=lease_seconds),
+            Task.attempts: Task.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return db.query(Task).filter(Task.id == candidate.id).first()
+        # Another worker won this one; look again
+    return None
+
+def _owned(task_id: int, worker_id: str):
+    return and_(Task.id == task_id, Task.status == TASK_RUNNING, Task.lease_owner == worker_id)
+
+def renew_lease(db: Session, task_id: int, worker_id: str, lease_seconds: float = TASK_LEASE_SECONDS) -> bool:
+    """Extend a lease this worker still holds and commit. False if the task was taken over."""
+    renewed = db.query(Task).filter(_owned(task_id, worker_id)).update(
+        {Task.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds)},
+        synchronize_session=False
+    )
+    db.commit()
+    return bool(renewed)
+
+def acquire_lease(db: Session, name: str, owner: str, lease_seconds: float) -> bool:
+    """Take or renew a named lease and commit. False while another owner holds it unexpired.
+
+    For singleton background loops: the process that gets the lease does the
+    work, and takes it over from an owner that died once it expires.
+    """
+    now = datetime.utcnow()
+    table = Lease.__table__
+    statement = insert_for(db, table).values(
+        name=name, owner=owner, expires_at=now + timedelta(seconds=lease_seconds)
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={'owner': statement.excluded.owner, 'expires_at': statement.excluded.expires_at},
+        where=or_(table.c.owner == owner, table.c.expires_at < now)
+    )
+    acquired = db.execute(statement).rowcount
+    db.commit()
+    return bool(acquired)
+
+def release_lease(db: Session, name: str, owner: str):
+    """Give up a named lease this owner holds and commit."""
+    db.query(Lease).filter(Lease.name == name, Lease.owner == owner).delete(synchronize_session=False)
+    db.commit()
+
+def complete(db: Session, task_id: int, worker_id: str, result: Optional[Dict] = None) -> bool:
+    """Mark a task succeeded in the caller's transaction. Does not commit.
+
+    Returns False if this worker no longer holds the lease; the caller should
+    then roll back, so the task's side effects and its completion are
+    committed together or not at all.
+    """
+    completed = db.query(Task).filter(_owned(task_id, worker_id)).update({
+        Task.status: TASK_SUCCEEDED,
+        Task.result: json.dumps(result) if result is not None else None,
+        Task.lease_owner: None,
+        Task.lease_expires_at: None,
+        Task.last_error: None,
+        Task.finished_at: datetime.utcnow()
+    }, synchronize_session=False)
+    return bool(completed)
+
+def fail(db: Session, task_id: int, worker_id: str, error: str, permanent: bool = False) -> Optional[str]:
+    """Record a failed attempt and commit: retry later with backoff, or dead-letter.
+
+    Returns the task's new status, or None if this worker no longer held the lease.
+    """
+    task = db.query(Task).filter(_owned(task_id, worker_id)).first()
+    if task is None:
+        db.rollback()
+        return None
+    now = datetime.utcnow()
+    task.last_error = error
+    task.lease_owner = None
+    task.lease_expires_at = None
+    if permanent or task.attempts >= task.max_attempts:
+        task.status = TASK_DEAD
+        task.finished_at = now
+    else:
+        task.status = TASK_QUEUED
+        task.available_at = now + timedelta(seconds=TASK_RETRY_BACKOFF_SECONDS * 2 ** (task.attempts - 1))
+    db.commit()
+    return task.status
+
+def retry(db: Session, task_id: int) -> Optional[Task]:
+    """Put a dead-lettered task back in the queue with a fresh attempt budget. Does not commit."""
+    task = db.query(Task).filter(Task.id == task_id, Task.status == TASK_DEAD).first()
+    if task is None:
+        return None
+    task.status = TASK_QUEUED
+    task.attempts = 0
+    task.available_at = datetime.utcnow()
+    task.finished_at = None
+    return task
+
+def status_counts(db: Session) -> Dict[str, int]:
+    counts = dict(db.query(Task.status, func.count(Task.id)).group_by(Task.status).all())
+    return {status: counts.get(status, 0) for status in TASK_STATUSES}
+
+def task_summary(task: Task) -> Dict:
+    return {
+        'id': task.id,
+        'kind': task.kind,
+        'status': task.status,
+        'priority': task.priority,
+        'attempts': task.attempts,
+        'max_attempts': task.max_attempts,
+        'payload': task.get_payload(),
+        'result': task.get_result(),
+        'last_error': task.last_error,
+        'lease_owner': task.lease_owner,
+        'available_at': task.available_at,
+        'created_at': task.created_at,
+        'finished_at': task.finished_at
+    }
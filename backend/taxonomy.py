@@ -0,0 +1,31 @@
+"""The skill taxonomy: the skills SkillExtractor looks for, and their categories.
+
+A skill's position in SKILL_TAXONOMY is also its bit in the stored skill
+bitsets (see skill_bits), so the list is append only: add a new skill at the
+end whatever its category, and never reorder or remove one.
+"""
+from typing import Dict, List, Tuple
+
+SKILL_TAXONOMY: Tuple[Tuple[str, str], ...] = (
+    ('python', 'programming'), ('java', 'programming'), ('javascript', 'programming'),
+    ('c++', 'programming'), ('c#', 'programming'), ('php', 'programming'), ('ruby', 'programming'),
+    ('go', 'programming'), ('rust', 'programming'), ('swift', 'programming'),
+    ('html', 'web'), ('css', 'web'), ('react', 'web'), ('angular', 'web'), ('vue', 'web'),
+    ('node.js', 'web'), ('express', 'web'), ('django', 'web'), ('flask', 'web'), ('spring', 'web'),
+    ('mysql', 'database'), ('postgresql', 'database'), ('mongodb', 'database'),
+    ('sqlite', 'database'), ('redis', 'database'), ('elasticsearch', 'database'),
+    ('aws', 'cloud'), ('azure', 'cloud'), ('gcp', 'cloud'),
+    ('docker', 'cloud'), ('kubernetes', 'cloud'), ('terraform', 'cloud'),
+    ('git', 'tools'), ('jenkins', 'tools'), ('jira', 'tools'), ('confluence', 'tools'), ('slack', 'tools'),
+    ('machine learning', 'ai_ml'), ('deep learning', 'ai_ml'), ('tensorflow', 'ai_ml'),
+    ('pytorch', 'ai_ml'), ('scikit-learn', 'ai_ml'), ('pandas', 'ai_ml'), ('numpy', 'ai_ml'),
+    ('communication', 'soft_skills'), ('leadership', 'soft_skills'), ('teamwork', 'soft_skills'),
+    ('problem solving', 'soft_skills'), ('project management', 'soft_skills'),
+)
+
+def skill_categories() -> Dict[str, List[str]]:
+    """The taxonomy grouped by category, each in taxonomy order."""
+    categories: Dict[str, List[str]] = {}
+    for skill, category in SKILL_TAXONOMY:
+        categories.setdefault(category, []).append(skill)
+    return categories
@@ -0,0 +1,83 @@
+"""Uploaded files spooled to disk instead of held in memory.
+
+An upload is copied in fixed-size chunks from the request's file object to a
+temporary file, hashing it on the way and giving up as soon as it passes the
+size cap. The extractors and the blob store then read from that path, so a
+worker holds at most one chunk of each upload in memory however many large
+files arrive at once.
+"""
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Optional
+
+from dotenv import load_dotenv
+
+from .budgets import MAX_UPLOAD_BYTES
+
+load_dotenv()
+
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None  # None: the system temp directory
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+# Allowance for multipart boundaries, part headers and the small form fields
+# when judging a request's Content-Length against MAX_UPLOAD_BYTES
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+class UploadTooLarge(Exception):
+    """The upload is larger than the byte limit."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"File exceeds the {limit} byte upload limit")
+
+class SpooledUpload:
+    """An upload on disk: its path, size and SHA-256 digest. Removes the file on exit."""
+
+    def __init__(self, path: str, size: int, digest: str):
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+    def discard(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.discard()
+
+def spool_upload(source: BinaryIO, file_extension: str, max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledUpload:
+    """Copy a file object to a temporary file, raising UploadTooLarge once it passes max_bytes.
+
+    The temporary file keeps the upload's extension so extractors that sniff
+    the type from the name see the right one.
+    """
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=f".{file_extension}", dir=UPLOAD_SPOOL_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, size, digest.hexdigest())
+
+def exceeds_upload_limit(content_type: Optional[str], content_length: Optional[str], max_bytes: int = MAX_UPLOAD_BYTES) -> bool:
+    """Whether a multipart request's declared length already rules it out, before any body is read."""
+    if not content_type or not content_type.startswith("multipart/form-data") or not content_length:
+        return False
+    try:
+        return int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES
+    except ValueError:
+        return False
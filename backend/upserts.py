@@ -0,0 +1,14 @@
+"""INSERT ... ON CONFLICT for the databases the app supports.
+
+SQLite (3.24+) and PostgreSQL share the ON CONFLICT syntax, but SQLAlchemy
+builds it from each dialect's own insert(); insert_for() picks the one that
+matches the session's database.
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+def insert_for(db: Session, table):
+    """An insert() on the table that supports on_conflict_do_update/do_nothing."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
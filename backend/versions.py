@@ -0,0 +1,92 @@
+"""Per-table change counters behind the ETags of the polled read endpoints.
+
+Every commit that inserts, updates or deletes ORM rows of a tracked table adds
+one to that table's counter in ``table_versions``, in the same transaction.
+Writes that bypass the ORM unit of work (bulk_update_mappings, Query.update)
+must call touch() for the tables they change. An endpoint's ETag is derived
+from the counters of the tables it reads, so a conditional GET can be answered
+with 304 after a single primary-key lookup, from any worker process.
+"""
+import hashlib
+from itertools import chain
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import TableVersion
+
+TRACKED_TABLES = ("resumes", "job_descriptions", "evaluations")
+
+_TOUCHED = "touched_tables"
+
+def touch(db: Session, *tables: str):
+    """Bump these tables' counters when the session's transaction commits."""
+    db.info.setdefault(_TOUCHED, set()).update(tables)
+
+def _collect_flushed(session: Session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table in TRACKED_TABLES:
+            touch(session, table)
+
+def _bump_touched(session: Session):
+    # Flush first so the commit's own flush is counted too; bumping last keeps
+    # the counter rows locked only for the commit itself
+    session.flush()
+    tables = session.info.pop(_TOUCHED, None)
+    if tables:
+        session.execute(
+            update(TableVersion)
+            .where(TableVersion.name.in_(sorted(tables)))
+            .values(version=TableVersion.version + 1)
+        )
+
+def _forget_touched(session: Session, previous_transaction):
+    session.info.pop(_TOUCHED, None)
+
+def track_table_versions(session_factory):
+    """Register the listeners that maintain the counters on sessions from session_factory."""
+    event.listen(session_factory, "after_flush", _collect_flushed)
+    event.listen(session_factory, "before_commit", _bump_touched)
+    event.listen(session_factory, "after_soft_rollback", _forget_touched)
+
+def seed_table_versions(db: Session):
+    """Create missing counter rows. Safe to run from several processes at once."""
+    existing = {name for (name,) in db.query(TableVersion.name).all()}
+    missing = [name for name in TRACKED_TABLES if name not in existing]
+    if not missing:
+        return
+    db.add_all([TableVersion(name=name, version=0) for name in missing])
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another process seeded them first
+        db.rollback()
+
+def table_versions(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    return dict(db.query(TableVersion.name, TableVersion.version).filter(TableVersion.name.in_(list(tables))).all())
+
+def compute_etag(db: Session, tables: Iterable[str], *parts) -> str:
+    """Weak ETag over the tables' counters and any request parts (path, query) the response depends on."""
+    tables = list(tables)
+    versions = table_versions(db, tables)
+    token = ";".join(f"{table}={versions.get(table, 0)}" for table in tables)
+    token += "|" + "|".join(str(part) for part in parts)
+    return f'W/"{hashlib.sha1(token.encode("utf-8")).hexdigest()[:20]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
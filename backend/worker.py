@@ -0,0 +1,265 @@
+"""Standalone worker processes for the task queue.
+
+Usage (from the project root):
+    python -m backend.worker [--kinds evaluate,ingest_resume] [--poll-interval 1] [--once]
+
+Each worker claims tasks from the database queue (see tasks.py), runs them
+with its own ContentProcessor and ResumeScorer, and records the result. Start
+as many as the CPUs allow, on this host or on others sharing DATABASE_URL and
+the blob store (SQLite only supports workers on the database's host). A task's
+side effects and its completion commit in one transaction, so a task retried
+after its worker died or lost the lease is never applied twice. While a task
+is parsing or scoring, a background thread keeps renewing its lease, so long
+tasks aren't taken over by another worker halfway through.
+
+Task kinds:
+    evaluate       {resume_id, job_id}
+    ingest_resume  {file_hash, filename, job_role, location, evaluate_job_id}
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from .budgets import StageOverloaded, StageTimeout
+from .evaluations import upsert_evaluation
+from .models import Resume, Task
+from .profiles import JobProfileCache, load_job_profile
+from .tasks import PermanentTaskError, TASK_LEASE_SECONDS, claim, complete, enqueue, fail, renew_lease
+
+class Worker:
+    """Claims and runs queued tasks until stopped."""
+
+    def __init__(
+        self,
+        content_processor,
+        scorer,
+        blob_store,
+        session_factory: Callable,
+        embedding_store=None,
+        kinds: Optional[Iterable[str]] = None,
+        lease_seconds: float = TASK_LEASE_SECONDS,
+        worker_id: Optional[str] = None
+    ):
+        self.content_processor = content_processor
+        self.scorer = scorer
+        self.blob_store = blob_store
+        self.session_factory = session_factory
+        self.embedding_store = embedding_store
+        self.profile_cache = JobProfileCache()
+        self.handlers = {
+            'evaluate': self._evaluate,
+            'ingest_resume': self._ingest_resume,
+        }
+        self.kinds = list(kinds) if kinds else list(self.handlers)
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Finish the current task, then exit run()."""
+        self._stop.set()
+
+    @contextmanager
+    def _lease_kept(self, task_id: int):
+        """Renew the task's lease every third of lease_seconds while the block runs.
+
+        Only wrap the parsing and scoring, never the task's writes: renewing
+        commits, and on SQLite every session shares one connection.
+        """
+        done = threading.Event()
+
+        def heartbeat():
+            while not done.wait(self.lease_seconds / 3):
+                db = self.session_factory()
+                try:
+                    if not renew_lease(db, task_id, self.worker_id, self.lease_seconds):
+                        return  # Taken over; complete() will discard our result
+                except Exception as e:
+                    db.rollback()
+                    print(f"Task {task_id} lease renewal failed: {type(e).__name__}: {e}")
+                finally:
+                    db.close()
+
+        thread = threading.Thread(target=heartbeat, name=f"lease-{task_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def run_once(self) -> bool:
+        """Claim and run one task. Returns False if there was nothing to do."""
+        db = self.session_factory()
+        try:
+            task = claim(db, self.worker_id, self.kinds, self.lease_seconds)
+            if task is None:
+                return False
+            task_id, kind, payload = task.id, task.kind, task.get_payload()
+
+            handler = self.handlers.get(kind)
+            try:
+                if handler is None:
+                    raise PermanentTaskError(f"Unknown task kind {kind}")
+                result, after_commit = handler(db, task_id, payload)
+                if not complete(db, task_id, self.worker_id, result):
+                    # Lease expired and the task was taken over; its new owner redoes the work
+                    db.rollback()
+                    print(f"Task {task_id} lost its lease, discarding the result")
+                    return True
+                db.commit()
+            except PermanentTaskError as e:
+                db.rollback()
+                fail(db, task_id, self.worker_id, str(e), permanent=True)
+                print(f"Task {task_id} ({kind}) failed permanently: {e}")
+                return True
+            except Exception as e:
+                db.rollback()
+                status = fail(db, task_id, self.worker_id, f"{type(e).__name__}: {e}")
+                print(f"Task {task_id} ({kind}) failed, now {status}: {e}")
+                return True
+
+            if after_commit is not None:
+                after_commit()
+            return True
+        except Exception:
+            # The queue itself failed (claim, fail, a dropped connection); run() retries
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def run(self, poll_interval: float = 1.0, once: bool = False):
+        """Work until stopped; with ``once``, until the queue has nothing claimable."""
+        print(f"Worker {self.worker_id} running {', '.join(self.kinds)}")
+        while not self._stop.is_set():
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                # A database outage shouldn't kill the worker; back off and try again
+                print(f"Worker {self.worker_id} error: {type(e).__name__}: {e}")
+                self._stop.wait(poll_interval)
+                continue
+            if not worked:
+                if once:
+                    break
+                self._stop.wait(poll_interval)
+
+    def _evaluate(self, db: Session, task_id: int, payload: Dict):
+        resume_id, job_id = payload['resume_id'], payload['job_id']
+        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        if resume is None:
+            raise PermanentTaskError(f"Resume {resume_id} not found")
+        resume_data = {
+            'content': resume.content,
+            'skills': resume.get_skills(),
+            'experience_years': resume.experience_years
+        }
+        db.rollback()  # Don't keep a transaction open on the shared connection while scoring
+
+        with self._lease_kept(task_id):
+            job_profile = load_job_profile(db, job_id, self.scorer, self.profile_cache)
+            if job_profile is None:
+                raise PermanentTaskError(f"Job description {job_id} not found")
+            score_result = self.scorer.score_resume(
+                resume_data, job_profile.job_data, custom_weights=job_profile.weights, job_profile=job_profile
+            )
+        evaluation = upsert_evaluation(db, resume_id, job_id, score_result)
+        db.flush()
+        return {'evaluation_id': evaluation.id, 'evaluation_result': score_result}, None
+
+    def _ingest_resume(self, db: Session, task_id: int, payload: Dict):
+        filename = payload['filename']
+        if not self.blob_store.exists(payload['file_hash']):
+            raise PermanentTaskError(f"Blob {payload['file_hash']} not found")
+        try:
+            # The extractors read from a path, so the original is never held in memory whole
+            with self.blob_store.temp_file(payload['file_hash'], f".{filename.split('.')[-1].lower()}") as path, \
+                    self._lease_kept(task_id):
+                processed_data = self.content_processor.process_resume(path, filename)
+        except StageOverloaded:
+            # Retried with backoff, like any other transient failure
+            raise
+        except StageTimeout as e:
+            raise PermanentTaskError(f"Resume too complex to process: {str(e)}")
+        # A full lease for the writes still to come
+        renew_lease(db, task_id, self.worker_id, self.lease_seconds)
+
+        resume = Resume(
+            filename=filename,
+            file_type=filename.split('.')[-1].lower(),
+            content=processed_data['content'],
+            extracted_skills=json.dumps(processed_data['skills']),
+            location=payload.get('location') or processed_data['location'],
+            job_role=payload.get('job_role') or processed_data['job_role'],
+            experience_years=processed_data['experience_years'],
+            file_hash=payload['file_hash']
+        )
+        db.add(resume)
+        db.flush()
+
+        result = {
+            'resume_id': resume.id,
+            'extracted_skills': processed_data['skills'],
+            'experience_years': processed_data['experience_years'],
+            'location': resume.location,
+            'job_role': resume.job_role
+        }
+        evaluate_job_id = payload.get('evaluate_job_id')
+        if evaluate_job_id is not None:
+            priority = db.query(Task.priority).filter(Task.id == task_id).scalar() or 0
+            evaluation_task = enqueue(db, 'evaluate', {'resume_id': resume.id, 'job_id': evaluate_job_id}, priority)
+            db.flush()
+            result['evaluation_task_id'] = evaluation_task.id
+
+        def store_embedding():
+            if self.embedding_store is None:
+                return
+            try:
+                self.embedding_store.add(resume.id, self.scorer.embed_resumes([resume.content])[0])
+            except Exception as e:
+                print(f"Error storing embedding for resume {resume.id}: {e}")
+
+        return result, store_embedding
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued evaluation and ingestion tasks.")
+    parser.add_argument("--kinds", default=None, help="Comma-separated task kinds to run (default: all)")
+    parser.add_argument("--lease-seconds", type=float, default=TASK_LEASE_SECONDS,
+                        help="How long a claimed task stays reserved for this worker")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="Exit once nothing is claimable")
+    args = parser.parse_args()
+
+    from .db import SessionLocal, create_tables
+    from .embedding_store import EmbeddingStore, EMBEDDING_STORE_ENABLED
+    from .parsers import ContentProcessor
+    from .scoring import ResumeScorer
+    from .storage import BlobStore
+
+    create_tables()
+    worker = Worker(
+        ContentProcessor(),
+        ResumeScorer(),
+        BlobStore(),
+        SessionLocal,
+        embedding_store=EmbeddingStore() if EMBEDDING_STORE_ENABLED else None,
+        kinds=args.kinds.split(",") if args.kinds else None,
+        lease_seconds=args.lease_seconds
+    )
+    # Let the task in hand finish (and commit) on shutdown
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    try:
+        worker.run(args.poll_interval, args.once)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Benchmarks for the resume processing pipeline.
+
+Run a suite from the project root, e.g. ``python -m benchmarks.suite`` for the
+full pipeline or ``python -m benchmarks.field_extraction`` for one component.
+"""
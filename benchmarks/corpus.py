@@ -0,0 +1,193 @@
+"""Deterministic synthetic resumes and job descriptions.
+
+    python -m benchmarks.corpus --resumes 50 --jobs 5 --out ./bench_corpus
+
+Documents are filled from templates with skills drawn from SkillExtractor's
+taxonomy, so every extractor and scoring path has something to find. The
+same seed always yields the same corpus. Resumes are rendered as TXT, DOCX
+(with a skills table and header) or PDF, rotating through the formats.
+"""
+import argparse
+import io
+import os
+import random
+from typing import Dict, List, Sequence
+
+import docx
+import fitz  # PyMuPDF
+
+from backend.parsers import COMMON_ROLES, SkillExtractor
+
+FORMATS = ("txt", "docx", "pdf")
+
+FIRST_NAMES = ["Asha", "Ravi", "Meera", "John", "Priya", "Arjun", "Sara", "Vikram", "Lena", "Omar"]
+LAST_NAMES = ["Sharma", "Patel", "Smith", "Iyer", "Khan", "Garcia", "Nair", "Chen", "Rao", "Müller"]
+LOCATIONS = [
+    "San Francisco, CA", "Austin, TX", "New York, NY", "Seattle, WA",
+    "Bangalore, India", "Pune, India", "Toronto, Canada", "London, UK"
+]
+COMPANIES = ["Innomatics", "Acme Analytics", "Northwind", "Globex", "Initech", "Umbrella Labs"]
+DEGREES = ["B.Tech in Computer Science", "M.Sc. in Data Science", "B.E. in Information Technology", "MBA"]
+
+def skill_taxonomy() -> List[str]:
+    """All skills the extractor knows about, in a stable order."""
+    skills = []
+    for category_skills in SkillExtractor().common_skills.values():
+        skills.extend(category_skills)
+    return skills
+
+def _bullets(rng: random.Random, skills: Sequence[str], count: int) -> List[str]:
+    verbs = ["Built", "Designed", "Maintained", "Migrated", "Optimised", "Led the rollout of"]
+    objects = ["a reporting pipeline", "customer-facing APIs", "an internal dashboard", "batch ETL jobs",
+               "the recommendation service", "CI/CD for the platform team"]
+    return [
+        f"- {rng.choice(verbs)} {rng.choice(objects)} using {rng.choice(skills)} and {rng.choice(skills)}."
+        for _ in range(count)
+    ]
+
+def resume_text(rng: random.Random, index: int, taxonomy: Sequence[str], bullets: int = 6) -> Dict:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    role = rng.choice(COMMON_ROLES)
+    years = rng.randint(0, 12)
+    location = rng.choice(LOCATIONS)
+    skills = rng.sample(list(taxonomy), rng.randint(5, 14))
+
+    lines = [
+        name,
+        role.title(),
+        f"Email: candidate{index}@example.com | Phone: (555) 010-{index % 10000:04d}",
+        f"Location: {location}",
+        "",
+        "PROFESSIONAL SUMMARY",
+        f"{role.title()} with {years} years of experience delivering production systems.",
+        "",
+        "TECHNICAL SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE",
+    ]
+    for company in rng.sample(COMPANIES, 2):
+        lines.append(f"{company} - {role.title()}")
+        lines.extend(_bullets(rng, skills, bullets // 2))
+        lines.append("")
+    lines.extend(["EDUCATION", rng.choice(DEGREES)])
+
+    return {
+        "name": name,
+        "text": "\n".join(lines),
+        "skills": skills,
+        "experience_years": years,
+        "location": location,
+    }
+
+def job_text(rng: random.Random, index: int, taxonomy: Sequence[str]) -> Dict:
+    role = rng.choice(COMMON_ROLES)
+    years = rng.randint(0, 8)
+    location = rng.choice(LOCATIONS)
+    skills = rng.sample(list(taxonomy), rng.randint(4, 10))
+    company = rng.choice(COMPANIES)
+
+    lines = [
+        f"{role.title()} - {company}",
+        f"Location: {location}",
+        "",
+        f"We are hiring a {role} to join our platform team.",
+        "",
+        "Requirements:",
+        f"- {years}+ years of experience in a similar role",
+    ]
+    lines.extend(f"- Strong knowledge of {skill}" for skill in skills)
+    lines.extend(["", "Nice to have:", f"- Exposure to {rng.choice(list(taxonomy))}"])
+
+    return {
+        "title": f"{role.title()} #{index}",
+        "company": company,
+        "text": "\n".join(lines),
+        "skills": skills,
+        "experience_required": years,
+        "location": location,
+    }
+
+def render_docx(document: Dict) -> bytes:
+    """Name in the page header, skills in a table, everything else as paragraphs."""
+    out = docx.Document()
+    lines = document["text"].split("\n")
+    out.sections[0].header.paragraphs[0].text = lines[0]
+    for line in lines[1:]:
+        if line == ", ".join(document["skills"]):
+            table = out.add_table(rows=1, cols=len(document["skills"]))
+            for cell, skill in zip(table.rows[0].cells, document["skills"]):
+                cell.text = skill
+        else:
+            out.add_paragraph(line)
+    buffer = io.BytesIO()
+    out.save(buffer)
+    return buffer.getvalue()
+
+def render_pdf(text: str, lines_per_page: int = 55) -> bytes:
+    pdf = fitz.open()
+    lines = text.split("\n")
+    for start in range(0, len(lines), lines_per_page):
+        page = pdf.new_page()
+        page.insert_text((50, 60), "\n".join(lines[start:start + lines_per_page]), fontsize=10)
+    content = pdf.tobytes()
+    pdf.close()
+    return content
+
+def render(document: Dict, fmt: str) -> bytes:
+    if fmt == "txt":
+        return document["text"].encode("utf-8")
+    if fmt == "docx":
+        return render_docx(document)
+    if fmt == "pdf":
+        return render_pdf(document["text"])
+    raise ValueError(f"Unknown format: {fmt}")
+
+def generate_corpus(
+    resumes: int = 30,
+    jobs: int = 3,
+    seed: int = 42,
+    formats: Sequence[str] = FORMATS,
+    bullets: int = 6
+) -> Dict[str, List[Dict]]:
+    """Build the corpus in memory. Each resume carries its rendered file under 'filename'/'content'."""
+    rng = random.Random(seed)
+    taxonomy = skill_taxonomy()
+
+    resume_docs = []
+    for i in range(resumes):
+        document = resume_text(rng, i, taxonomy, bullets)
+        fmt = formats[i % len(formats)]
+        document["format"] = fmt
+        document["filename"] = f"resume_{i:04d}.{fmt}"
+        document["content"] = render(document, fmt)
+        resume_docs.append(document)
+
+    job_docs = [job_text(rng, i, taxonomy) for i in range(jobs)]
+    return {"resumes": resume_docs, "jobs": job_docs}
+
+def write_corpus(corpus: Dict[str, List[Dict]], out_dir: str):
+    os.makedirs(out_dir, exist_ok=True)
+    for document in corpus["resumes"]:
+        with open(os.path.join(out_dir, document["filename"]), "wb") as f:
+            f.write(document["content"])
+    for i, document in enumerate(corpus["jobs"]):
+        with open(os.path.join(out_dir, f"job_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(document["text"])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=30)
+    parser.add_argument("--jobs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--bullets", type=int, default=6, help="Experience bullets per resume (document length)")
+    parser.add_argument("--out", default="./bench_corpus")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.resumes, args.jobs, args.seed, args.formats, args.bullets)
+    write_corpus(corpus, args.out)
+    print(f"Wrote {len(corpus['resumes'])} resumes and {len(corpus['jobs'])} job descriptions to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Micro-benchmark: streaming DOCX extraction vs the python-docx object model.
+
+    python -m benchmarks.docx_extraction [--paragraphs 200 2000 20000] [--repeat 3]
+
+Builds a resume-like DOCX of each size (body paragraphs, a skills table and a
+header), then reports best-of-N wall time and tracemalloc peak for both
+extractors, plus whether each one saw the table and header text. The
+python-docx column walks ``Document.paragraphs`` the way the previous
+extractor did, which never reaches tables or headers.
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+import docx
+
+from backend.parsers import TextExtractor
+
+HEADER_MARKER = "Header Contact Line"
+TABLE_MARKER = "Table Skill Cell"
+
+def build_docx(paragraphs: int) -> bytes:
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = f"{HEADER_MARKER} | Pune, India"
+    document.add_heading("Jane Doe - Software Engineer", level=1)
+    for i in range(paragraphs):
+        document.add_paragraph(
+            f"Project {i}: built Python and Docker services with 5 years of experience, "
+            f"working on SQL pipelines and React dashboards."
+        )
+    table = document.add_table(rows=3, cols=2)
+    for row, (label, value) in enumerate([("Languages", "Python, Go"), ("Cloud", "AWS, GCP"), ("Other", TABLE_MARKER)]):
+        table.cell(row, 0).text = label
+        table.cell(row, 1).text = value
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def python_docx_text(file_content: bytes) -> str:
+    document = docx.Document(io.BytesIO(file_content))
+    return "\n".join(paragraph.text for paragraph in document.paragraphs).strip()
+
+def measure(fn, file_content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = fn(file_content)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(file_content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return text, best, peak
+
+def run(paragraph_counts, repeat):
+    rows = []
+    for paragraphs in paragraph_counts:
+        file_content = build_docx(paragraphs)
+        for name, fn in (("python-docx", python_docx_text), ("streaming", TextExtractor.extract_from_docx)):
+            text, seconds, peak = measure(fn, file_content, repeat)
+            rows.append({
+                "extractor": name,
+                "paragraphs": paragraphs,
+                "bytes": len(file_content),
+                "seconds": seconds,
+                "peak_mb": peak / (1024 * 1024),
+                "tables": TABLE_MARKER in text,
+                "headers": HEADER_MARKER in text,
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[200, 2_000, 20_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'extractor':<12} {'paragraphs':>10} {'bytes':>10} {'time (s)':>10} {'peak (MB)':>10} {'tables':>7} {'headers':>8}")
+    for row in run(args.paragraphs, args.repeat):
+        print(f"{row['extractor']:<12} {row['paragraphs']:>10} {row['bytes']:>10} {row['seconds']:>10.4f} "
+              f"{row['peak_mb']:>10.2f} {str(row['tables']):>7} {str(row['headers']):>8}")
+
+if __name__ == "__main__":
+    main()
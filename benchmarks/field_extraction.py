@@ -0,0 +1,122 @@
+"""Micro-benchmark: single-pass field extraction vs the previous per-field regexes.
+
+    python -m benchmarks.field_extraction [--sizes 2000 8000 32000] [--repeat 3]
+
+For each input size it checks that both implementations agree, then reports
+the best-of-N time of each. The legacy column grows super-linearly on the
+adversarial input (long lines full of "experience" with no year count);
+the single-pass column should grow linearly.
+"""
+import argparse
+import re
+import time
+
+from backend.parsers import SkillExtractor
+
+LEGACY_ROLES = [
+    'software engineer', 'data scientist', 'web developer', 'full stack developer',
+    'frontend developer', 'backend developer', 'devops engineer', 'product manager',
+    'ui/ux designer', 'business analyst', 'project manager', 'qa engineer'
+]
+
+def legacy_experience_years(text):
+    patterns = [
+        r'(\d+)\s*(?:years?|yrs?)\s*(?:of\s*)?(?:experience|exp)',
+        r'(\d+)\+\s*(?:years?|yrs?)',
+        r'(?:experience|exp).*?(\d+)\s*(?:years?|yrs?)',
+    ]
+    for pattern in patterns:
+        matches = re.findall(pattern, text.lower())
+        if matches:
+            return max([int(match) for match in matches])
+    return 0
+
+def legacy_location(text):
+    patterns = [
+        r'(?:location|based in|located in):\s*([^,\n]+)',
+        r'([A-Za-z\s]+,\s*[A-Z]{2})',
+        r'\b([A-Za-z\s]+,\s*(?:India|USA|UK|Canada|Australia))\b',
+    ]
+    for pattern in patterns:
+        matches = re.findall(pattern, text)
+        if matches:
+            return matches[0].strip()
+    return ""
+
+def legacy_job_role(text):
+    text_lower = text.lower()
+    for role in LEGACY_ROLES:
+        if role in text_lower:
+            return role.title()
+    patterns = [
+        r'(?:role|position|title):\s*([^\n,]+)',
+        r'seeking\s+(?:a\s+)?([^\n,]+?)\s+(?:position|role)',
+    ]
+    for pattern in patterns:
+        matches = re.findall(pattern, text_lower)
+        if matches:
+            return matches[0].strip().title()
+    return "Not Specified"
+
+def legacy_fields(text):
+    return {
+        'experience_years': legacy_experience_years(text),
+        'location': legacy_location(text),
+        'job_role': legacy_job_role(text),
+    }
+
+def realistic_text(size: int) -> str:
+    """Resume-like text: short lines with the usual field cues."""
+    block = (
+        "Senior engineer with strong Python and cloud background\n"
+        "Location: Bengaluru\n"
+        "Experienced in distributed systems; 3 yrs on data pipelines\n"
+        "Worked as backend developer and mentored the team\n"
+    )
+    return (block * (size // len(block) + 1))[:size] + "\n7 years of experience\n"
+
+def adversarial_text(size: int) -> str:
+    """One long line of experience keywords, with the only year count at the end."""
+    chunk = "expertise in experimental export expectations "
+    return (chunk * (size // len(chunk) + 1))[:size] + " 4 years"
+
+def best_of(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run(sizes, repeat):
+    extractor = SkillExtractor()
+    rows = []
+    for name, generator in (("realistic", realistic_text), ("adversarial", adversarial_text)):
+        for size in sizes:
+            text = generator(size)
+            expected = legacy_fields(text)
+            actual = extractor.extract_fields(text)
+            if expected != actual:
+                raise AssertionError(f"{name}/{size}: legacy {expected} != single-pass {actual}")
+            rows.append({
+                "input": name,
+                "chars": len(text),
+                "legacy_s": best_of(legacy_fields, text, repeat),
+                "single_pass_s": best_of(extractor.extract_fields, text, repeat),
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2_000, 8_000, 32_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'input':<12} {'chars':>10} {'legacy (s)':>12} {'single-pass (s)':>16} {'speedup':>8}")
+    for row in run(args.sizes, args.repeat):
+        speedup = row["legacy_s"] / row["single_pass_s"] if row["single_pass_s"] else float("inf")
+        print(f"{row['input']:<12} {row['chars']:>10} {row['legacy_s']:>12.4f} "
+              f"{row['single_pass_s']:>16.4f} {speedup:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Asyncio load generator for the API, with Student and Recruiter workload profiles.
+
+    python -m benchmarks.load --base-url http://localhost:8000 --profile student --concurrency 32 --duration 60
+    python -m benchmarks.load --profile mixed --concurrency 8 --duration 10     # in-process, offline
+
+Each virtual user loops over its profile's weighted action mix (with optional
+think time) until the duration or request count is reached. Without
+--base-url the app is driven in-process through httpx's ASGI transport with
+the stub sentence model and a scratch database, so it runs offline; point
+--base-url at a real server (e.g. ``uvicorn backend.main:app --workers 4``)
+to size worker counts. The report is JSON: overall throughput plus count,
+errors, 429 rejections, throughput and p50/p95/p99 latency per endpoint.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.corpus import generate_corpus
+
+# (action, weight). Students upload and check their own resume against
+# openings; recruiters post jobs, page through ranked results and poll the dashboard.
+PROFILES: Dict[str, List[Tuple[str, int]]] = {
+    "student": [
+        ("resume_upload", 2),
+        ("jobs", 3),
+        ("evaluate", 3),
+        ("resume_detail", 2),
+        ("results", 1),
+    ],
+    "recruiter": [
+        ("jd_upload", 1),
+        ("results", 5),
+        ("dashboard_stats", 3),
+        ("jobs", 2),
+        ("evaluate", 2),
+    ],
+}
+PROFILES["mixed"] = PROFILES["student"] + PROFILES["recruiter"]
+
+class LoadState:
+    """Shared pools of created IDs and documents to upload, plus per-endpoint latencies."""
+
+    def __init__(self, corpus: Dict, rng: random.Random):
+        self.corpus = corpus
+        self.rng = rng
+        self.resume_ids: List[int] = []
+        self.job_ids: List[int] = []
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, ok: bool, rejected: bool = False):
+        self.latencies.setdefault(name, []).append(seconds)
+        if rejected:
+            # Shed by admission control (429): expected under overload, so not an error
+            self.rejected[name] = self.rejected.get(name, 0) + 1
+        elif not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+async def _request(client: httpx.AsyncClient, state: LoadState, name: str, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    rejected = False
+    try:
+        response = await client.request(method, url, **kwargs)
+        ok = response.status_code < 400
+        rejected = response.status_code == 429
+    except httpx.HTTPError:
+        response, ok = None, False
+    state.record(name, time.perf_counter() - start, ok, rejected)
+    return response if ok else None
+
+async def resume_upload(client, state: LoadState):
+    document = state.rng.choice(state.corpus["resumes"])
+    response = await _request(client, state, "resume_upload", "POST", "/api/v1/resume/upload",
+                              files={"file": (document["filename"], document["content"])})
+    if response is not None:
+        state.resume_ids.append(response.json()["resume_id"])
+
+async def jd_upload(client, state: LoadState):
+    job = state.rng.choice(state.corpus["jobs"])
+    response = await _request(client, state, "jd_upload", "POST", "/api/v1/jd/upload", json={
+        "title": job["title"], "company": job["company"], "content": job["text"]
+    })
+    if response is not None:
+        state.job_ids.append(response.json()["job_id"])
+
+async def evaluate(client, state: LoadState):
+    if not state.resume_ids or not state.job_ids:
+        return
+    resume_id = state.rng.choice(state.resume_ids)
+    job_id = state.rng.choice(state.job_ids)
+    await _request(client, state, "evaluate", "POST", f"/api/v1/evaluate/{resume_id}/{job_id}")
+
+async def results(client, state: LoadState):
+    params = {"skip": state.rng.choice([0, 0, 20, 40]), "limit": 20}
+    if state.job_ids and state.rng.random() < 0.8:
+        params["job_id"] = state.rng.choice(state.job_ids)
+    await _request(client, state, "results", "GET", "/api/v1/results", params=params)
+
+async def resume_detail(client, state: LoadState):
+    if state.resume_ids:
+        await _request(client, state, "resume_detail", "GET", f"/api/v1/resume/{state.rng.choice(state.resume_ids)}")
+
+async def dashboard_stats(client, state: LoadState):
+    await _request(client, state, "dashboard_stats", "GET", "/api/v1/dashboard/stats")
+
+async def jobs(client, state: LoadState):
+    await _request(client, state, "jobs", "GET", "/api/v1/jobs")
+
+ACTIONS: Dict[str, Callable] = {
+    "resume_upload": resume_upload,
+    "jd_upload": jd_upload,
+    "evaluate": evaluate,
+    "results": results,
+    "resume_detail": resume_detail,
+    "dashboard_stats": dashboard_stats,
+    "jobs": jobs,
+}
+
+async def _virtual_user(client, state: LoadState, profile, deadline: float, budget: List[int], think_time: float):
+    names = [name for name, _ in profile]
+    weights = [weight for _, weight in profile]
+    while time.perf_counter() < deadline:
+        if budget[0] <= 0:
+            return
+        budget[0] -= 1
+        await ACTIONS[state.rng.choices(names, weights)[0]](client, state)
+        # In-process, a request that never waits on I/O or a thread completes
+        # without suspending; yield anyway, as a network client would, so the
+        # other users and the requests waiting on the threadpool get to run
+        await asyncio.sleep(state.rng.uniform(0, 2 * think_time) if think_time > 0 else 0)
+
+def summarize(state: LoadState, elapsed: float) -> Dict:
+    endpoints = {}
+    for name, samples in sorted(state.latencies.items()):
+        values = np.array(samples) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        endpoints[name] = {
+            "count": len(samples),
+            "errors": state.errors.get(name, 0),
+            "rejected": state.rejected.get(name, 0),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "mean_ms": round(float(values.mean()), 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(values.max()), 2),
+        }
+    total = sum(len(samples) for samples in state.latencies.values())
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total_requests": total,
+        "total_errors": sum(state.errors.values()),
+        "total_rejected": sum(state.rejected.values()),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+async def run_load(
+    client: httpx.AsyncClient,
+    profile_name: str,
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int] = None,
+    think_time: float = 0.0,
+    seed_resumes: int = 10,
+    seed_jobs: int = 3,
+    seed: int = 42,
+) -> Dict:
+    corpus = generate_corpus(resumes=max(seed_resumes, 12), jobs=max(seed_jobs, 3), seed=seed)
+    state = LoadState(corpus, random.Random(seed))
+
+    # Seed data so reads and evaluations have something to hit; not part of the report
+    for _ in range(seed_jobs):
+        await jd_upload(client, state)
+    for _ in range(seed_resumes):
+        await resume_upload(client, state)
+    for _ in range(min(seed_resumes, 20)):
+        await evaluate(client, state)
+    state.latencies.clear()
+    state.errors.clear()
+    state.rejected.clear()
+
+    budget = [max_requests if max_requests else float("inf")]
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _virtual_user(client, state, PROFILES[profile_name], started + duration, budget, think_time)
+        for _ in range(concurrency)
+    ])
+    report = summarize(state, time.perf_counter() - started)
+    report.update({"profile": profile_name, "concurrency": concurrency, "think_time_s": think_time})
+    return report
+
+def _in_process_client(timeout: float) -> httpx.AsyncClient:
+    """An AsyncClient bound to the app itself, using the stub model and a scratch database."""
+    workdir = tempfile.mkdtemp(prefix="resume_load_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.environ["BLOB_STORE_DIR"] = os.path.join(workdir, "blobs")
+    os.environ["RESCORE_ENABLED"] = "false"
+
+    from benchmarks import stub_model
+    stub_model.install()
+    from backend.db import init_db
+    from backend.main import app
+
+    init_db()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+
+async def _main(args) -> Dict:
+    if args.base_url:
+        client = httpx.AsyncClient(
+            base_url=args.base_url,
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+        )
+    else:
+        client = _in_process_client(args.timeout)
+    async with client:
+        return await run_load(
+            client, args.profile, args.concurrency, args.duration, args.requests,
+            args.think_time, args.seed_resumes, args.seed_jobs, args.seed,
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default=None, help="Running server to target (default: drive the app in-process)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's requests (s)")
+    parser.add_argument("--seed-resumes", type=int, default=10)
+    parser.add_argument("--seed-jobs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", default=None, help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Memory benchmark: ingesting large PDFs through ContentProcessor.
+
+    python -m benchmarks.memory [--pages 10 50 200] [--iterations 20]
+
+For each document size it reports the tracemalloc peak of one
+process_resume call, then ingests the document --iterations times and
+reports RSS growth from the second iteration to the last; steady growth
+there points at a leak rather than warm-up. tracemalloc only sees Python
+allocations, so MuPDF's own buffers show up in the RSS columns only. PDFs
+carry a random image per page by default, so file size grows like real
+scanned resumes. Runs offline: no model is loaded.
+"""
+import argparse
+import gc
+import os
+import random
+import tracemalloc
+
+import fitz  # PyMuPDF
+
+from backend.memory import peak_rss_bytes, rss_bytes
+from backend.parsers import ContentProcessor
+from benchmarks.corpus import render_pdf, resume_text, skill_taxonomy
+
+MB = 1024 * 1024
+
+def large_pdf(pages: int, image_side: int = 0, seed: int = 7) -> bytes:
+    """A resume padded with experience bullets to roughly the given page count.
+
+    With image_side > 0 every page also carries an incompressible RGB image of
+    that many pixels square, like a scanned or designer-template resume.
+    """
+    document = resume_text(random.Random(seed), 0, skill_taxonomy(), bullets=pages * 50)
+    content = render_pdf(document["text"])
+    if not image_side:
+        return content
+
+    pdf = fitz.open(stream=content, filetype="pdf")
+    for page in pdf:
+        pixmap = fitz.Pixmap(fitz.csRGB, image_side, image_side, os.urandom(image_side * image_side * 3), 0)
+        page.insert_image(fitz.Rect(300, 600, 550, 800), pixmap=pixmap)
+    content = pdf.tobytes()
+    pdf.close()
+    return content
+
+def measure(processor: ContentProcessor, content: bytes, iterations: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    processor.process_resume(content, "large.pdf")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    gc.collect()
+    rss_after_first = rss_bytes()
+    for _ in range(iterations - 1):
+        processor.process_resume(content, "large.pdf")
+    gc.collect()
+    rss_after_last = rss_bytes()
+
+    return {
+        "pdf_mb": len(content) / MB,
+        "traced_peak_mb": peak / MB,
+        "rss_growth_mb": (rss_after_last - rss_after_first) / MB,
+        "rss_mb": rss_after_last / MB,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--image-side", type=int, default=256, help="Pixels per side of the image on each page (0: text only)")
+    args = parser.parse_args()
+
+    processor = ContentProcessor()
+    print(f"baseline RSS: {rss_bytes() / MB:.1f} MB")
+    print(f"{'pages':>6} {'pdf (MB)':>9} {'traced peak (MB)':>17} {'RSS growth (MB)':>16} {'RSS (MB)':>9}")
+    for pages in args.pages:
+        row = measure(processor, large_pdf(pages, args.image_side), max(args.iterations, 2))
+        print(f"{pages:>6} {row['pdf_mb']:>9.2f} {row['traced_peak_mb']:>17.2f} "
+              f"{row['rss_growth_mb']:>16.2f} {row['rss_mb']:>9.1f}")
+    print(f"peak RSS: {peak_rss_bytes() / MB:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Offline stand-in for the sentence-transformers model.
+
+Embeds text as an L2-normalised bag of hashed tokens, so similar texts still
+get similar vectors, results are identical across runs and processes, and
+nothing is downloaded.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+class HashingEmbeddingModel:
+    """Implements the subset of SentenceTransformer the backend uses."""
+
+    def __init__(self, model_name: str = "stub", dim: int = EMBEDDING_DIM, **kwargs):
+        self.model_name = model_name
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, normalize_embeddings: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN_PATTERN.findall(text.lower()):
+                bucket = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                embeddings[row, bucket % self.dim] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            embeddings /= norms
+        return embeddings[0] if single else embeddings
+
+def install():
+    """Make every ResumeScorer created from now on use the stub model.
+
+    Call before importing backend.main, which builds its scorer at import time.
+    """
+    from backend import scoring
+    scoring.SentenceTransformer = HashingEmbeddingModel
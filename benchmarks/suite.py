@@ -0,0 +1,298 @@
+"""End-to-end benchmark suite with score-equivalence checks and stored baselines.
+
+    python -m benchmarks.suite [--resumes 30] [--jobs 3] [--repeat 3]
+    python -m benchmarks.suite --check              # exit 1 on a regression
+    python -m benchmarks.suite --update-baselines   # record this machine's numbers
+
+Runs offline: the sentence model is replaced by benchmarks.stub_model, and
+the endpoint suite uses a throwaway SQLite database and blob store. Timed
+suites cover ContentProcessor.process_resume (per format), SkillExtractor,
+ResumeScorer.score_resume/score_resumes and the main API endpoints through
+FastAPI's TestClient. Every timing is seconds per item (best of --repeat).
+
+Before timing, the scorer's code paths are checked against each other
+(single vs batched, raw job vs compiled profile, score_many vs the scalar
+path) and against the evaluate endpoint. A fingerprint of all scores is
+compared with the stored one, so an optimisation that changes results fails
+--check just like one that makes things slower.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.corpus import FORMATS, generate_corpus
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_TOLERANCE = 0.5  # Allowed slowdown over baseline before --check fails
+
+SCORE_FIELDS = ("overall_score", "skills_match_score", "semantic_similarity_score", "experience_score")
+
+def _prepare_environment(workdir: str):
+    """Point the backend at scratch storage and the stub model. Must run before backend imports."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["BLOB_STORE_DIR"] = os.path.join(workdir, "blobs")
+    os.environ["RESCORE_ENABLED"] = "false"
+
+    from benchmarks import stub_model
+    stub_model.install()
+
+def best_per_item(fn: Callable[[], int], repeat: int) -> float:
+    """Run fn (which returns how many items it processed) repeat times; best seconds per item."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = fn()
+        best = min(best, (time.perf_counter() - start) / max(items, 1))
+    return best
+
+def _resume_data(processed: Dict) -> Dict:
+    return {
+        "content": processed["content"],
+        "skills": processed["skills"],
+        "experience_years": processed["experience_years"],
+    }
+
+def _score_key(result: Dict) -> Tuple:
+    return tuple(result[field] for field in SCORE_FIELDS) + (result["verdict"],)
+
+def score_fingerprint(rows: List[Tuple]) -> str:
+    """Order-independent digest of (resume, job, scores...) rows."""
+    digest = hashlib.sha256()
+    for row in sorted(rows):
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()
+
+def check_equivalence(scorer, resumes: List[Dict], jobs: List[Dict]) -> Tuple[List[str], str]:
+    """Compare the scorer's code paths pairwise. Returns (failures, score fingerprint)."""
+    from backend.scoring import VERDICT_LABELS
+
+    failures = []
+    rows = []
+    for job_index, job in enumerate(jobs):
+        profile = scorer.compile_job_profile(
+            job_index + 1, 1, job["content"], job["required_skills"], job["experience_required"]
+        )
+        single = [scorer.score_resume(resume, job) for resume in resumes]
+        with_profile = [scorer.score_resume(resume, job, job_profile=profile) for resume in resumes]
+        batched = scorer.score_resumes(resumes, job, job_profile=profile)
+
+        for resume_index, (a, b, c) in enumerate(zip(single, with_profile, batched)):
+            if not (_score_key(a) == _score_key(b) == _score_key(c)):
+                failures.append(f"job {job_index} resume {resume_index}: single {_score_key(a)} "
+                                f"profile {_score_key(b)} batched {_score_key(c)}")
+            rows.append((resume_index, job_index) + _score_key(a))
+
+        # score_many must reproduce the rounded overall score and verdict of the scalar path
+        scored = scorer.score_many(
+            [r["skills_match_score"] for r in single],
+            [r["semantic_similarity_score"] for r in single],
+            [r["experience_score"] for r in single],
+        )
+        for resume_index, (result, many) in enumerate(zip(single, scored)):
+            rescored = scorer.calculate_overall_score(
+                result["skills_match_score"], result["semantic_similarity_score"], result["experience_score"]
+            )
+            if round(float(many["overall_score"]), 2) != round(rescored, 2) \
+                    or VERDICT_LABELS[int(many["verdict"])] != scorer.determine_verdict(rescored):
+                failures.append(f"job {job_index} resume {resume_index}: score_many disagrees with scalar path")
+
+    return failures, score_fingerprint(rows)
+
+def run_component_suites(corpus: Dict, repeat: int) -> Tuple[Dict[str, float], List[str], str]:
+    from backend.parsers import ContentProcessor, SkillExtractor
+    from backend.scoring import ResumeScorer
+
+    processor = ContentProcessor()
+    extractor = SkillExtractor()
+    scorer = ResumeScorer()
+    metrics: Dict[str, float] = {}
+
+    for fmt in FORMATS:
+        documents = [d for d in corpus["resumes"] if d["format"] == fmt]
+        if not documents:
+            continue
+
+        def process_all(documents=documents):
+            for document in documents:
+                processor.process_resume(document["content"], document["filename"])
+            return len(documents)
+        metrics[f"process_resume.{fmt}"] = best_per_item(process_all, repeat)
+
+    processed = [processor.process_resume(d["content"], d["filename"]) for d in corpus["resumes"]]
+    texts = [p["content"] for p in processed]
+
+    def extract_skills():
+        for text in texts:
+            extractor.extract_skills(text)
+        return len(texts)
+
+    def extract_fields():
+        for text in texts:
+            extractor.extract_fields(text)
+        return len(texts)
+
+    metrics["skill_extractor.extract_skills"] = best_per_item(extract_skills, repeat)
+    metrics["skill_extractor.extract_fields"] = best_per_item(extract_fields, repeat)
+
+    resumes = [_resume_data(p) for p in processed]
+    jobs = [processor.process_job_description(job["text"]) for job in corpus["jobs"]]
+    failures, fingerprint = check_equivalence(scorer, resumes, jobs)
+
+    def score_each():
+        for job in jobs:
+            for resume in resumes:
+                scorer.score_resume(resume, job)
+        return len(jobs) * len(resumes)
+
+    profiles = [
+        scorer.compile_job_profile(i + 1, 1, job["content"], job["required_skills"], job["experience_required"])
+        for i, job in enumerate(jobs)
+    ]
+
+    def score_batched():
+        for job, profile in zip(jobs, profiles):
+            scorer.score_resumes(resumes, job, job_profile=profile)
+        return len(jobs) * len(resumes)
+
+    metrics["scorer.score_resume"] = best_per_item(score_each, repeat)
+    metrics["scorer.score_resumes"] = best_per_item(score_batched, repeat)
+    return metrics, failures, fingerprint
+
+def run_endpoint_suite(corpus: Dict, expected_fingerprint: str) -> Tuple[Dict[str, float], List[str]]:
+    """Upload the corpus, evaluate every pair and read results back through the API."""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    timings: Dict[str, List[float]] = {}
+    failures = []
+
+    def call(name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = client.request(method, url, **kwargs)
+        timings.setdefault(name, []).append(time.perf_counter() - start)
+        if response.status_code != 200:
+            failures.append(f"{method} {url}: {response.status_code} {response.text[:200]}")
+        return response
+
+    with TestClient(app) as client:
+        job_ids = []
+        for job in corpus["jobs"]:
+            response = call("endpoint.jd_upload", "POST", "/api/v1/jd/upload", json={
+                "title": job["title"], "company": job["company"], "content": job["text"]
+            })
+            job_ids.append(response.json().get("job_id"))
+
+        resume_ids = []
+        for document in corpus["resumes"]:
+            response = call("endpoint.resume_upload", "POST", "/api/v1/resume/upload",
+                            files={"file": (document["filename"], document["content"])})
+            resume_ids.append(response.json().get("resume_id"))
+
+        rows = []
+        for job_index, job_id in enumerate(job_ids):
+            for resume_index, resume_id in enumerate(resume_ids):
+                response = call("endpoint.evaluate", "POST", f"/api/v1/evaluate/{resume_id}/{job_id}")
+                result = response.json().get("evaluation_result")
+                if result:
+                    rows.append((resume_index, job_index) + _score_key(result))
+
+        for job_id in job_ids:
+            call("endpoint.results", "GET", "/api/v1/results", params={"job_id": job_id, "limit": 100})
+        for resume_id in resume_ids:
+            call("endpoint.resume_detail", "GET", f"/api/v1/resume/{resume_id}")
+        call("endpoint.dashboard_stats", "GET", "/api/v1/dashboard/stats")
+        call("endpoint.jobs", "GET", "/api/v1/jobs")
+
+    if score_fingerprint(rows) != expected_fingerprint:
+        failures.append("evaluate endpoint scores differ from direct ResumeScorer scores")
+
+    return {name: sum(values) / len(values) for name, values in timings.items()}, failures
+
+def load_baselines(path: str = BASELINES_PATH) -> Dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def compare(baselines: Dict, metrics: Dict[str, float], fingerprint: str, corpus_params: Dict, tolerance: float) -> List[str]:
+    """Regressions against stored baselines, as human-readable lines."""
+    regressions = []
+    for name, baseline in baselines.get("metrics", {}).items():
+        current = metrics.get(name)
+        if current is not None and baseline > 0 and current > baseline * (1 + tolerance):
+            regressions.append(f"{name}: {current * 1000:.3f} ms vs baseline {baseline * 1000:.3f} ms "
+                               f"(+{(current / baseline - 1) * 100:.0f}%, tolerance {tolerance * 100:.0f}%)")
+    # Scores are only comparable on the corpus the baseline was recorded on
+    if baselines.get("corpus") == corpus_params and baselines.get("score_fingerprint") not in (None, fingerprint):
+        regressions.append("score fingerprint changed: scoring results differ from the baseline")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=30)
+    parser.add_argument("--jobs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero on regressions against the baselines")
+    parser.add_argument("--update-baselines", action="store_true", help="Store this run as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=None, help="Allowed slowdown, e.g. 0.5 for +50%%")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="resume_bench_")
+    _prepare_environment(workdir)
+
+    corpus_params = {"resumes": args.resumes, "jobs": args.jobs, "seed": args.seed}
+    corpus = generate_corpus(args.resumes, args.jobs, args.seed)
+
+    metrics, failures, fingerprint = run_component_suites(corpus, args.repeat)
+    if not args.skip_endpoints:
+        endpoint_metrics, endpoint_failures = run_endpoint_suite(corpus, fingerprint)
+        metrics.update(endpoint_metrics)
+        failures.extend(endpoint_failures)
+
+    baselines = load_baselines(args.baselines)
+    tolerance = args.tolerance if args.tolerance is not None else baselines.get("tolerance", DEFAULT_TOLERANCE)
+
+    print(f"{'metric':<34} {'ms/item':>10} {'baseline':>10} {'change':>8}")
+    for name in sorted(metrics):
+        current = metrics[name]
+        baseline = baselines.get("metrics", {}).get(name)
+        if baseline:
+            print(f"{name:<34} {current * 1000:>10.3f} {baseline * 1000:>10.3f} {(current / baseline - 1) * 100:>7.0f}%")
+        else:
+            print(f"{name:<34} {current * 1000:>10.3f} {'-':>10} {'':>8}")
+    print(f"score fingerprint: {fingerprint}")
+
+    for failure in failures:
+        print(f"EQUIVALENCE FAILURE: {failure}")
+
+    if args.update_baselines:
+        if failures:
+            print("Not updating baselines while equivalence checks fail.")
+            sys.exit(1)
+        with open(args.baselines, "w") as f:
+            json.dump({
+                "tolerance": tolerance,
+                "corpus": corpus_params,
+                "score_fingerprint": fingerprint,
+                "metrics": {name: round(value, 6) for name, value in sorted(metrics.items())},
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baselines written to {args.baselines}")
+        return
+
+    regressions = compare(baselines, metrics, fingerprint, corpus_params, tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if args.check and (failures or regressions):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
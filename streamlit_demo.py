@@ -1,17 +1,23 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import pandas as pd
 import os
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Configuration
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+API_CACHE_TTL_SECONDS = int(os.getenv("API_CACHE_TTL_SECONDS", "30"))
+API_TIMEOUT_SECONDS = float(os.getenv("API_TIMEOUT_SECONDS", "60"))
+ETAG_STORE_SIZE = int(os.getenv("ETAG_STORE_SIZE", "256"))
 
 # Page configuration
 st.set_page_config(
@@ -89,29 +95,118 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Helper functions
-def make_api_request(endpoint, method="GET", data=None, files=None):
-    """Make API request with error handling."""
+class ApiError(Exception):
+    """Non-200 response. Raised inside cached calls so errors are never cached."""
+
+@st.cache_resource
+def get_http_session():
+    """One pooled keep-alive session shared by all reruns and browser sessions of this server."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class EtagStore:
+    """Last ETag and JSON body per GET, keeping the ETAG_STORE_SIZE most recently used."""
+
+    def __init__(self, max_entries=ETAG_STORE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, etag, body):
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+@st.cache_resource
+def get_etag_store():
+    """Shared by all sessions, so expired cache entries revalidate with If-None-Match."""
+    return EtagStore()
+
+@st.cache_data(ttl=API_CACHE_TTL_SECONDS, show_spinner=False)
+def cached_get(endpoint, params=None):
+    """GET an endpoint, caching the JSON response for API_CACHE_TTL_SECONDS.
+    
+    Once the entry expires the request is conditional: an unchanged resource
+    comes back as a bodiless 304 and the previous body is reused.
+    """
+    etags = get_etag_store()
+    key = (endpoint, params)
+    previous = etags.get(key)
+    headers = {"If-None-Match": previous[0]} if previous else None
+    response = get_http_session().get(
+        f"{BACKEND_URL}{endpoint}", params=params, headers=headers, timeout=API_TIMEOUT_SECONDS
+    )
+    if response.status_code == 304 and previous:
+        return previous[1]
+    if response.status_code != 200:
+        raise ApiError(f"API Error: {response.status_code} - {response.text}")
+    body = response.json()
+    if response.headers.get("ETag"):
+        etags.put(key, response.headers["ETag"], body)
+    return body
+
+def invalidate_api_cache():
+    """Drop cached GET responses, e.g. after an upload or evaluation changed the data."""
+    cached_get.clear()
+
+def make_api_request(endpoint, method="GET", data=None, files=None, params=None):
+    """Make API request with error handling. GETs are cached; a successful POST clears the cache."""
     try:
-        url = f"{BACKEND_URL}{endpoint}"
-        
         if method == "GET":
-            response = requests.get(url)
-        elif method == "POST":
-            if files:
-                response = requests.post(url, data=data, files=files)
-            else:
-                response = requests.post(url, json=data)
+            # Sorted tuple so equal filters hit the same cache entry
+            return cached_get(endpoint, tuple(sorted(params.items())) if params else None), None
+        
+        url = f"{BACKEND_URL}{endpoint}"
+        session = get_http_session()
+        if files:
+            response = session.post(url, data=data, files=files, timeout=API_TIMEOUT_SECONDS)
+        else:
+            response = session.post(url, json=data, timeout=API_TIMEOUT_SECONDS)
         
         if response.status_code == 200:
+            invalidate_api_cache()
             return response.json(), None
         else:
             return None, f"API Error: {response.status_code} - {response.text}"
             
+    except ApiError as e:
+        return None, str(e)
     except requests.exceptions.ConnectionError:
         return None, "❌ Cannot connect to backend. Please ensure the API server is running."
     except Exception as e:
         return None, f"Error: {str(e)}"
 
+def stream_api_events(endpoint, params=None):
+    """Yield (event, data) pairs from a Server-Sent Events endpoint as they arrive.
+    
+    Leaving the loop early (or a Streamlit rerun) closes the connection, which
+    stops the server-side work.
+    """
+    url = f"{BACKEND_URL}{endpoint}"
+    with get_http_session().get(url, params=params, stream=True, timeout=API_TIMEOUT_SECONDS) as response:
+        if response.status_code != 200:
+            raise ApiError(f"API Error: {response.status_code} - {response.text}")
+        event = "message"
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):])
+            elif not line:
+                event = "message"
+
 def render_skills_chips(skills, chip_type="skill"):
     """Render skills as styled chips."""
     if not skills:
@@ -240,9 +335,10 @@ elif page == "📝 Student Portal":
     st.title("📝 Student Portal")
     st.write("Upload your resume and get instant feedback on job compatibility")
     
-    tab1, tab2 = st.tabs(["📤 Upload Resume", "📋 My Evaluations"])
+    # A radio instead of st.tabs: tabs run every tab's code (and API calls) on each rerun
+    tab = st.radio("Section", ["📤 Upload Resume", "📋 My Evaluations"], horizontal=True, label_visibility="collapsed")
     
-    with tab1:
+    if tab == "📤 Upload Resume":
         st.subheader("Upload Your Resume")
         
         uploaded_file = st.file_uploader(
@@ -289,7 +385,7 @@ elif page == "📝 Student Portal":
                     else:
                         st.info("No skills detected. Consider adding more technical skills to your resume.")
     
-    with tab2:
+    else:
         st.subheader("Your Recent Evaluations")
         # This would show evaluations for the current user
         st.info("Feature coming soon: View your evaluation history")
@@ -298,9 +394,9 @@ elif page == "👔 Recruiter Portal":
     st.title("👔 Recruiter Portal")
     st.write("Manage job descriptions and review candidate matches")
     
-    tab1, tab2 = st.tabs(["📋 Post Job", "🔍 Review Candidates"])
+    tab = st.radio("Section", ["📋 Post Job", "🔍 Review Candidates"], horizontal=True, label_visibility="collapsed")
     
-    with tab1:
+    if tab == "📋 Post Job":
         st.subheader("Post New Job Description")
         
         with st.form("job_form"):
@@ -351,7 +447,31 @@ elif page == "👔 Recruiter Portal":
                 else:
                     st.error("Please fill in the required fields (marked with *)")
     
-    with tab2:
+    else:
+        st.subheader("🔎 Search Resumes")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            keywords = st.text_input("Keywords", placeholder="e.g., kubernetes terraform")
+        with col2:
+            search_location = st.text_input("Location", placeholder="e.g., Bangalore")
+        
+        if keywords.strip():
+            params = {"q": keywords.strip(), "limit": 20}
+            if search_location.strip():
+                params["location"] = search_location.strip()
+            search_data, error = make_api_request("/api/v1/search/resumes", params=params)
+            
+            if error:
+                st.error(error)
+            elif search_data["results"]:
+                for hit in search_data["results"]:
+                    st.markdown(f"**{hit['filename']}** (ID {hit['resume_id']}) - {hit.get('location') or 'Unknown location'}")
+                    if hit.get("snippet"):
+                        st.caption(hit["snippet"])
+            else:
+                st.info("No resumes match those keywords.")
+        
         st.subheader("Available Jobs")
         
         jobs_data, error = make_api_request("/api/v1/jobs")
@@ -381,16 +501,51 @@ elif page == "👔 Recruiter Portal":
                         st.markdown(skills_html, unsafe_allow_html=True)
         else:
             st.info("No job descriptions found. Post your first job to get started!")
+        
+        if st.session_state.get("selected_job_id"):
+            job_id = st.session_state.selected_job_id
+            st.subheader(f"⚡ Live Candidate Ranking - Job {job_id}")
+            
+            progress = st.progress(0.0, text="Starting...")
+            top_table = st.empty()
+            try:
+                for event, data in stream_api_events(f"/api/v1/jobs/{job_id}/rank/stream", params={"top_k": 10}):
+                    if event in ("candidates", "top") and data["total"]:
+                        progress.progress(data["scored"] / data["total"], text=f"Scored {data['scored']} of {data['total']} candidates")
+                    if event == "top":
+                        top_table.dataframe(pd.DataFrame([
+                            {
+                                "Resume ID": candidate["resume_id"],
+                                "File": candidate["filename"],
+                                "Overall Score": candidate["overall_score"],
+                                "Verdict": candidate["verdict"],
+                                "Skills": candidate["skills_match_score"],
+                                "Semantic": candidate["semantic_similarity_score"],
+                                "Experience": candidate["experience_score"]
+                            }
+                            for candidate in data["top"]
+                        ]), use_container_width=True, hide_index=True)
+                    elif event == "done":
+                        progress.progress(1.0, text=f"Ranked {data['scored']} candidates in {data['elapsed_seconds']}s")
+                    elif event == "error":
+                        st.error(data["detail"])
+            except ApiError as e:
+                st.error(str(e))
+            except requests.exceptions.ConnectionError:
+                st.error("❌ Cannot connect to backend. Please ensure the API server is running.")
 
 elif page == "📊 Results Analysis":
     st.title("📊 Results Analysis")
     st.write("Comprehensive analysis of all resume evaluations")
     
+    jobs_data, _ = make_api_request("/api/v1/jobs")
+    job_titles = {job["id"]: f"{job['title']} (#{job['id']})" for job in jobs_data or []}
+    
     # Filters
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        job_filter = st.selectbox("Filter by Job", ["All Jobs"] + [f"Job {i}" for i in range(1, 6)])
+        job_filter = st.selectbox("Filter by Job", [None] + list(job_titles), format_func=lambda job_id: job_titles.get(job_id, "All Jobs"))
     
     with col2:
         verdict_filter = st.selectbox("Verdict", ["All", "High", "Medium", "Low"])
@@ -403,6 +558,8 @@ elif page == "📊 Results Analysis":
     
     # Build query parameters
     params = {}
+    if job_filter:
+        params["job_id"] = job_filter
     if verdict_filter != "All":
         params["verdict"] = verdict_filter
     if min_score > 0:
@@ -410,20 +567,108 @@ elif page == "📊 Results Analysis":
     if location_filter:
         params["location"] = location_filter
     
-    # Construct query string
-    query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-    endpoint = f"/api/v1/results?{query_string}" if query_string else "/api/v1/results"
-    
-    evaluations_data, error = make_api_request(endpoint)
+    # Charts come from the aggregation endpoints; only the detail page fetches rows
+    averages, error = make_api_request("/api/v1/analytics/component-averages", params=params)
     
     if error:
         st.error(error)
-    elif evaluations_data:
-        st.subheader(f"📈 Found {len(evaluations_data)} Evaluations")
+    elif averages["total_evaluations"]:
+        total_evaluations = averages["total_evaluations"]
+        st.subheader(f"📈 Found {total_evaluations} Evaluations")
         
-        # Create DataFrame for analysis
-        df_data = []
-        for eval_data in evaluations_data:
+        histogram, _ = make_api_request("/api/v1/analytics/score-histogram", params={**params, "bucket_width": 5})
+        verdicts, _ = make_api_request("/api/v1/analytics/verdicts-by-job", params=params)
+        per_day, _ = make_api_request("/api/v1/analytics/evaluations-per-day", params=params)
+        
+        # Display summary charts
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Score distribution
+            buckets = histogram["buckets"] if histogram else []
+            fig_hist = px.bar(
+                x=[f"{bucket['min']}-{bucket['max']}" for bucket in buckets],
+                y=[bucket["count"] for bucket in buckets],
+                labels={"x": "Overall Score", "y": "Evaluations"},
+                title="Score Distribution",
+                color_discrete_sequence=["#667eea"]
+            )
+            st.plotly_chart(fig_hist, use_container_width=True)
+        
+        with col2:
+            # Verdict counts
+            verdict_jobs = verdicts["jobs"] if verdicts else []
+            verdict_names = ["High", "Medium", "Low"]
+            fig_pie = px.pie(
+                values=[sum(job[name] for job in verdict_jobs) for name in verdict_names],
+                names=verdict_names,
+                title="Verdict Distribution",
+                color=verdict_names,
+                color_discrete_map={"High": "#10B981", "Medium": "#F59E0B", "Low": "#EF4444"}
+            )
+            st.plotly_chart(fig_pie, use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Average component scores
+            components = {
+                "Overall": averages["overall_score"],
+                "Skills Match": averages["skills_match_score"],
+                "Semantic": averages["semantic_similarity_score"],
+                "Experience": averages["experience_score"]
+            }
+            fig_components = px.bar(
+                x=list(components),
+                y=list(components.values()),
+                labels={"x": "Component", "y": "Average Score"},
+                title="Average Component Scores",
+                color=list(components)
+            )
+            fig_components.update_layout(showlegend=False)
+            st.plotly_chart(fig_components, use_container_width=True)
+        
+        with col2:
+            # Evaluations per day
+            days = per_day["days"] if per_day else []
+            fig_days = px.line(
+                x=[day["date"] for day in days],
+                y=[day["count"] for day in days],
+                labels={"x": "Date", "y": "Evaluations"},
+                title="Evaluations per Day (last 30 days)",
+                markers=True
+            )
+            st.plotly_chart(fig_days, use_container_width=True)
+        
+        if not job_filter and len(verdict_jobs) > 1:
+            # Verdicts per job
+            top_jobs = verdict_jobs[:15]
+            fig_jobs = go.Figure(data=[
+                go.Bar(
+                    name=name,
+                    x=[job_titles.get(job["job_id"], job["title"] or f"Job {job['job_id']}") for job in top_jobs],
+                    y=[job[name] for job in top_jobs],
+                    marker_color=color
+                )
+                for name, color in [("High", "#10B981"), ("Medium", "#F59E0B"), ("Low", "#EF4444")]
+            ])
+            fig_jobs.update_layout(barmode="stack", title="Verdicts by Job")
+            st.plotly_chart(fig_jobs, use_container_width=True)
+        
+        # Detailed results table, one page at a time
+        st.subheader("📋 Detailed Results")
+        
+        page_size = 20
+        page_count = (total_evaluations + page_size - 1) // page_size
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+        evaluations_data, error = make_api_request(
+            "/api/v1/results",
+            params={**params, "skip": (page_number - 1) * page_size, "limit": page_size}
+        )
+        if error:
+            st.error(error)
+        
+        for eval_data in evaluations_data or []:
             df_data.append({
                 "Resume ID": eval_data["resume_id"],
                 "Job ID": eval_data["job_description_id"],
@@ -600,4 +845,8 @@ with st.sidebar:
         st.caption("API server is not responding")
     else:
         st.success("🟢 Backend Online")
-        st.caption("API server is running")
\ No newline at end of file
+        st.caption("API server is running")
+    
+    if st.button("🔄 Refresh Data"):
+        invalidate_api_cache()
+        st.rerun()